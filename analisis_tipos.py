@@ -0,0 +1,109 @@
+# analisis_tipos.py
+
+from arbol_sintaxis import NodeType
+from ejecucion import recolectar_declaraciones, valor_literal, tipo_constante
+
+NODOS_ARITMETICOS = (NodeType.SUMA, NodeType.RESTA, NodeType.MULTIPLICACION, NodeType.POTENCIA)
+
+
+class AnalizadorTipos:
+    """Inferencia de tipos estáticos: anota cada expresión del AST con su tipo (int, float o bool).
+
+    Las reglas son las de la ejecución: la división y el resto solo dan un entero con dos
+    operandos int, y la potencia de enteros solo es entera con un exponente constante no
+    negativo. Las expresiones cuyo tipo depende de los valores quedan con tipo None.
+    """
+
+    def __init__(self, ast):
+        self.ast = ast
+        self.declaraciones = recolectar_declaraciones(ast)
+        self.expresiones = []       # (nodo, tipo) en el orden en que aparecen
+        self.promociones = []
+
+    def analizar(self):
+        self.sentencia(self.ast)
+        return self
+
+    def promocion(self, origen, nodo, detalle):
+        self.promociones.append(f"Promoción implícita de {origen} a float en línea {nodo.line}, "
+                                f"columna {nodo.column}: {detalle}")
+
+    def sentencia(self, nodo):
+        tipo = nodo.node_type
+        if tipo in (NodeType.LISTA, NodeType.MAIN):
+            for hijo in nodo.children:
+                self.sentencia(hijo)
+        elif tipo == NodeType.ASIGNACION and len(nodo.children) == 2:
+            destino, valor = nodo.children
+            tipo_destino = self.declaraciones.get(destino.name)
+            destino.tipo = tipo_destino
+            tipo_valor = self.expresion(valor)
+            if tipo_destino == "float" and tipo_valor in ("int", "bool"):
+                self.promocion(tipo_valor, nodo, f"asignación a '{destino.name}'")
+        elif tipo == NodeType.INPUT:
+            for hijo in nodo.children:
+                hijo.tipo = self.declaraciones.get(hijo.name)
+        elif tipo == NodeType.OUTPUT:
+            for hijo in nodo.children:
+                if hijo.node_type != NodeType.CADENA:
+                    self.expresion(hijo)
+        elif tipo in (NodeType.IF, NodeType.WHILE, NodeType.DO):
+            for hijo in nodo.children:
+                if hijo.node_type in EXPRESIONES:
+                    self.expresion(hijo)
+                else:
+                    self.sentencia(hijo)
+
+    def expresion(self, nodo):
+        tipo = self.tipo(nodo)
+        nodo.tipo = tipo
+        self.expresiones.append((nodo, tipo))
+        return tipo
+
+    def tipo(self, nodo):
+        tipo_nodo = nodo.node_type
+        hijos = nodo.children
+        if tipo_nodo == NodeType.FACTOR:
+            return tipo_constante(valor_literal(nodo))
+        if tipo_nodo == NodeType.IDENTIFICADOR:
+            return self.declaraciones.get(nodo.name)
+        if tipo_nodo in (NodeType.INCREMENTO, NodeType.DECREMENTO):
+            operando = self.expresion(hijos[0]) if hijos else None
+            return None if operando is None else ("float" if operando == "float" else "int")
+        if tipo_nodo in (NodeType.RELACIONAL, NodeType.LOGICO):
+            for hijo in hijos:
+                self.expresion(hijo)
+            return "bool"
+        if tipo_nodo not in NODOS_ARITMETICOS or len(hijos) != 2:
+            return None
+
+        izquierda, derecha = (self.expresion(hijo) for hijo in hijos)
+        if izquierda is None or derecha is None:
+            return None
+        operador = nodo.name
+        if operador in ("/", "%"):
+            resultado = "int" if izquierda == derecha == "int" else "float"
+        elif operador == "^":
+            if izquierda == derecha == "int":
+                exponente = hijos[1]
+                if exponente.node_type == NodeType.FACTOR and valor_literal(exponente) >= 0:
+                    return "int"
+                return None
+            resultado = "float"
+        else:
+            resultado = "float" if "float" in (izquierda, derecha) else "int"
+        if resultado == "float":
+            for lado, tipo_lado in (("izquierdo", izquierda), ("derecho", derecha)):
+                if tipo_lado != "float":
+                    self.promocion(tipo_lado, nodo, f"operando {lado} de '{operador}'")
+        return resultado
+
+
+# Nodos que son expresiones (condiciones de if, while y do)
+EXPRESIONES = (NodeType.FACTOR, NodeType.IDENTIFICADOR, NodeType.RELACIONAL, NodeType.LOGICO,
+               NodeType.INCREMENTO, NodeType.DECREMENTO) + NODOS_ARITMETICOS
+
+
+def analizar_tipos(ast):
+    """Anota el AST con los tipos estáticos; devuelve el analizador con expresiones y promociones"""
+    return AnalizadorTipos(ast).analizar()
@@ -39,7 +39,9 @@ class ASTNode:
         self.node_type = node_type        # Tipo de nodo (NodeType)
         self.line = line                  # Línea en el código fuente
         self.column = column              # Columna en el código fuente
+        self.end_line = None              # Última línea de un bloque if/while/do
         self.children = []                # Lista de hijos (nodos AST)
+        self.tipo = None                  # Tipo estático inferido ('int', 'float', 'bool') o None
 
     def add_child(self, child_node):
         if child_node:
@@ -56,4 +58,24 @@ class ASTNode:
             "line": self.line,
             "column": self.column,
             "children": [child.to_dict() for child in self.children]
-        }
\ No newline at end of file
+        }
+
+def aplanar_arbol(raiz):
+    """El árbol en preorden como filas (nombre, tipo, línea, columna, cantidad de hijos, fin).
+
+    fin es la posición que sigue al subárbol de la fila: los hijos de la fila i empiezan
+    en i + 1 y cada uno termina donde empieza el siguiente. Se arma sin recursión, así
+    un árbol muy profundo se puede pasar a otro proceso y mostrar por partes.
+    """
+    filas = []
+    pila = [raiz] if raiz is not None else []
+    while pila:
+        nodo = pila.pop()
+        if isinstance(nodo, int):
+            # Marca de fin del subárbol que empieza en esa fila
+            filas[nodo][5] = len(filas)
+            continue
+        pila.append(len(filas))
+        filas.append([nodo.name, nodo.node_type.name, nodo.line, nodo.column, len(nodo.children), None])
+        pila.extend(reversed(nodo.children))
+    return [tuple(fila) for fila in filas]
@@ -0,0 +1,63 @@
+# archivos.py
+
+import codecs
+import os
+import shutil
+
+# Caracteres que se insertan en el editor por turno al abrir un archivo: entre un bloque
+# y otro Tk atiende la ventana y se muestra el avance
+TAMANO_BLOQUE_CARGA = int(os.environ.get("COMPILADOR_BLOQUE_CARGA", str(256 * 1024)))
+
+
+def decodificar(datos):
+    """(texto, codificación) de los bytes de un archivo, leídos una sola vez.
+
+    UTF-8 (con o sin BOM) si los bytes lo son; si no, latin-1, que acepta cualquier byte.
+    """
+    if datos.startswith(codecs.BOM_UTF8):
+        return datos[len(codecs.BOM_UTF8):].decode("utf-8", errors="replace"), "utf-8-sig"
+    try:
+        return datos.decode("utf-8"), "utf-8"
+    except UnicodeDecodeError:
+        return datos.decode("latin-1"), "latin-1"
+
+
+def leer_texto(ruta):
+    """(texto, codificación) del archivo, con los saltos de línea normalizados a '\\n' como
+    al abrirlo en modo texto"""
+    with open(ruta, "rb") as f:
+        texto, codificacion = decodificar(f.read())
+    if "\r" in texto:
+        texto = texto.replace("\r\n", "\n").replace("\r", "\n")
+    return texto, codificacion
+
+
+def bloques_de_texto(texto, tamano=None):
+    """Parte el texto en bloques de unos tamano caracteres, cortando después de un salto de línea"""
+    tamano = tamano or TAMANO_BLOQUE_CARGA
+    inicio = 0
+    while inicio < len(texto):
+        fin = texto.find("\n", inicio + tamano)
+        fin = len(texto) if fin == -1 else fin + 1
+        yield texto[inicio:fin]
+        inicio = fin
+
+
+def guardar_atomico(ruta, texto, codificacion="utf-8"):
+    """Escribe el texto con la codificación con que se abrió el archivo, conservando sus permisos"""
+    # Se escribe en un archivo temporal y se renombra: si algo falla a mitad de camino el
+    # archivo anterior queda intacto y nunca se ve uno escrito a medias
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        with open(temporal, "w", encoding=codificacion) as f:
+            f.write(texto)
+        if os.path.exists(ruta):
+            # El temporal nace con los permisos por omisión: se le copian los del original
+            shutil.copymode(ruta, temporal)
+        os.replace(temporal, ruta)
+    except (OSError, UnicodeEncodeError):
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,562 @@
+# backend_c.py
+
+import ctypes
+import hashlib
+import math
+import os
+import shutil
+import subprocess
+import sys
+
+from arbol_sintaxis import NodeType
+from ejecucion import (ErrorCompilacion, ErrorEjecucion, analizar_programa, recolectar_declaraciones,
+                       valor_literal, texto_cadena, leer_valor)
+from entrada_salida import entrada_estandar, salida_estandar
+from optimizador_ast import optimizar
+import transpilador
+
+# Compilador de C a usar; si no existe se ejecuta con el backend de Python
+COMPILADOR_C = os.environ.get("CC", "cc")
+# -frounding-math: sin ella GCC cambia 0.0 - (double)n por -(double)n, que da -0.0
+# cuando n es 0 y Python da 0.0
+OPCIONES_C = ["-O2", "-frounding-math", "-shared", "-fPIC"]
+VERSION_GENERADOR = "4"
+
+TIPOS_C = {"int": "long long", "float": "double", "bool": "int"}
+
+# Códigos de error que devuelve el programa nativo
+MENSAJES_ERROR = {
+    1: "división entre cero",
+    2: "módulo entre cero",
+    3: "potencia de cero con exponente negativo",
+    4: "potencia con resultado no real",
+}
+ERROR_ENTRADA = 5
+# Un entero no cupo en 64 bits: el programa se repite con el backend de Python, cuyos
+# enteros no tienen límite
+ERROR_DESBORDE = 6
+
+ENTERO_MINIMO, ENTERO_MAXIMO = -2 ** 63, 2 ** 63 - 1
+
+# Tipos de los valores que se guardan en el buffer de salida
+SALIDA_ENTERO, SALIDA_REAL, SALIDA_BOOL, SALIDA_CADENA = range(4)
+CAPACIDAD_SALIDA = 4096
+
+PRELUDIO_C = r"""
+#include <math.h>
+#include <setjmp.h>
+
+typedef struct { int tipo; long long entero; double real; } Valor;
+typedef int (*leer_fn)(int tipo, long long *entero, double *real);
+typedef void (*vaciar_fn)(int cantidad);
+
+static jmp_buf salto;
+static int codigo_error, linea_error, columna_error;
+static Valor *salida;
+static int capacidad, usados;
+static vaciar_fn vaciar;
+
+static void fallar(int codigo, int linea, int columna) {
+    codigo_error = codigo;
+    linea_error = linea;
+    columna_error = columna;
+    longjmp(salto, 1);
+}
+
+static void emitir(int tipo, long long entero, double real) {
+    if (usados == capacidad) {
+        vaciar(usados);
+        usados = 0;
+    }
+    salida[usados].tipo = tipo;
+    salida[usados].entero = entero;
+    salida[usados].real = real;
+    usados++;
+}
+
+static long long suma_e(long long a, long long b, int l, int c) {
+    long long r;
+    if (__builtin_add_overflow(a, b, &r)) fallar(6, l, c);
+    return r;
+}
+
+static long long resta_e(long long a, long long b, int l, int c) {
+    long long r;
+    if (__builtin_sub_overflow(a, b, &r)) fallar(6, l, c);
+    return r;
+}
+
+static long long mult_e(long long a, long long b, int l, int c) {
+    long long r;
+    if (__builtin_mul_overflow(a, b, &r)) fallar(6, l, c);
+    return r;
+}
+
+static long long a_entero(double x, int l, int c) {
+    /* int() de Python: fuera de rango (o inf/nan) lo resuelve el backend de Python */
+    if (!(x >= -9223372036854775808.0 && x < 9223372036854775808.0)) fallar(6, l, c);
+    return (long long)x;
+}
+
+static long long div_e(long long a, long long b, int l, int c) {
+    if (b == 0) fallar(1, l, c);
+    if (b == -1) return resta_e(0, a, l, c);
+    return a / b;
+}
+
+static double div_r(double a, double b, int l, int c) {
+    if (b == 0.0) fallar(1, l, c);
+    return a / b;
+}
+
+static long long mod_e(long long a, long long b, int l, int c) {
+    if (b == 0) fallar(2, l, c);
+    if (b == -1) return 0;
+    return a % b;
+}
+
+static double mod_r(double a, double b, int l, int c) {
+    if (b == 0.0) fallar(2, l, c);
+    return fmod(a, b);
+}
+
+static long long pot_e(long long base, long long exponente, int l, int c) {
+    long long resultado = 1;
+    while (exponente > 0) {
+        if (exponente & 1) resultado = mult_e(resultado, base, l, c);
+        exponente >>= 1;
+        if (exponente > 0) base = mult_e(base, base, l, c);
+    }
+    return resultado;
+}
+
+static double pot_r(double a, double b, int l, int c) {
+    double r;
+    if (a == 0.0 && b < 0.0) fallar(3, l, c);
+    r = pow(a, b);
+    if (isnan(r) && !isnan(a) && !isnan(b)) fallar(4, l, c);
+    /* Python lanza OverflowError donde C da infinito */
+    if (isinf(r) && isfinite(a) && isfinite(b)) fallar(6, l, c);
+    return r;
+}
+"""
+
+
+class ConstruccionNoSoportada(Exception):
+    """El programa usa algo que el backend nativo no reproduce igual que el de Python"""
+
+
+class Desborde(Exception):
+    """El programa nativo se detuvo porque un entero no cabía en 64 bits.
+
+    Lleva los textos que ya leyó 'cin' y cuántos valores ya se escribieron, para que el
+    backend de Python continúe desde el principio sin repetir ni perder nada.
+    """
+
+    def __init__(self, entradas, escritos):
+        super().__init__("entero de más de 64 bits")
+        self.entradas = entradas
+        self.escritos = escritos
+
+
+# Funciones del preludio que hacen +, - y * enteros avisando si desbordan
+OPERACIONES_VERIFICADAS = {"+": "suma_e", "-": "resta_e", "*": "mult_e"}
+
+
+class GeneradorC:
+    """Traduce el AST a una función de C con las variables declaradas como locales"""
+
+    def __init__(self, ast):
+        self.ast = ast
+        self.declaraciones = recolectar_declaraciones(ast)
+        self.lineas = []
+        self.cadenas = []
+        self.errores = []
+
+    def generar(self):
+        self.lineas.append(PRELUDIO_C)
+        self.lineas.append("int programa(leer_fn leer, vaciar_fn v, Valor *buffer, int cap, int *error) {")
+        for nombre, tipo in self.declaraciones.items():
+            self.emitir(1, f"{TIPOS_C[tipo]} {self.variable(nombre)} = 0;")
+        self.emitir(1, "salida = buffer; capacidad = cap; usados = 0; vaciar = v;")
+        self.emitir(1, "if (setjmp(salto)) {")
+        self.emitir(2, "vaciar(usados);")
+        self.emitir(2, "error[0] = codigo_error; error[1] = linea_error; error[2] = columna_error;")
+        self.emitir(2, "return 1;")
+        self.emitir(1, "}")
+        self.generar_sentencia(self.ast, 1)
+        self.emitir(1, "vaciar(usados);")
+        self.emitir(1, "return 0;")
+        self.lineas.append("}")
+        if self.errores:
+            raise ErrorCompilacion(self.errores)
+        return "\n".join(self.lineas) + "\n", self.cadenas
+
+    def emitir(self, nivel, texto):
+        self.lineas.append("    " * nivel + texto)
+
+    def error(self, mensaje, nodo):
+        mensaje = f"Error de traducción en línea {nodo.line}, columna {nodo.column}: {mensaje}"
+        if mensaje not in self.errores:
+            self.errores.append(mensaje)
+
+    def variable(self, nombre):
+        return f"v_{nombre}"
+
+    def posicion(self, nodo):
+        return f"{nodo.line or 0}, {nodo.column or 0}"
+
+    def generar_sentencia(self, nodo, nivel):
+        tipo = nodo.node_type
+        if tipo in (NodeType.LISTA, NodeType.MAIN):
+            for hijo in nodo.children:
+                self.generar_sentencia(hijo, nivel)
+        elif tipo == NodeType.TIPO:
+            return
+        elif tipo == NodeType.ASIGNACION:
+            if len(nodo.children) < 2:
+                return
+            destino = nodo.children[0]
+            tipo_var = self.tipo_variable(destino)
+            valor = self.convertir(nodo.children[1], tipo_var)
+            self.emitir(nivel, f"{self.variable(destino.name)} = {valor};")
+        elif tipo == NodeType.INPUT:
+            if not nodo.children:
+                return
+            destino = nodo.children[0]
+            tipo_var = self.tipo_variable(destino)
+            codigo_tipo = {"int": SALIDA_ENTERO, "float": SALIDA_REAL, "bool": SALIDA_BOOL}[tipo_var]
+            campo = "r" if tipo_var == "float" else "e"
+            self.emitir(nivel, "{")
+            self.emitir(nivel + 1, "long long e = 0; double r = 0.0;")
+            self.emitir(nivel + 1, "int codigo = leer(%d, &e, &r);" % codigo_tipo)
+            self.emitir(nivel + 1, f"if (codigo) fallar(codigo, {self.posicion(nodo)});")
+            self.emitir(nivel + 1, f"{self.variable(destino.name)} = {campo};")
+            self.emitir(nivel, "}")
+        elif tipo == NodeType.OUTPUT:
+            if not nodo.children:
+                return
+            valor = nodo.children[0]
+            if valor.node_type == NodeType.CADENA:
+                self.cadenas.append(texto_cadena(valor))
+                self.emitir(nivel, f"emitir({SALIDA_CADENA}, {len(self.cadenas) - 1}LL, 0.0);")
+                return
+            tipo_valor = self.tipo(valor)
+            expresion = self.expresion(valor)
+            if tipo_valor == "float":
+                self.emitir(nivel, f"emitir({SALIDA_REAL}, 0LL, {expresion});")
+            elif tipo_valor == "bool":
+                self.emitir(nivel, f"emitir({SALIDA_BOOL}, ({expresion}) != 0, 0.0);")
+            else:
+                self.emitir(nivel, f"emitir({SALIDA_ENTERO}, {expresion}, 0.0);")
+        elif tipo == NodeType.IF:
+            self.emitir(nivel, f"if ({self.expresion(nodo.children[0])}) {{")
+            self.generar_sentencia(nodo.children[1], nivel + 1)
+            if len(nodo.children) > 2:
+                self.emitir(nivel, "} else {")
+                self.generar_sentencia(nodo.children[2], nivel + 1)
+            self.emitir(nivel, "}")
+        elif tipo == NodeType.WHILE:
+            self.emitir(nivel, f"while ({self.expresion(nodo.children[0])}) {{")
+            self.generar_sentencia(nodo.children[1], nivel + 1)
+            self.emitir(nivel, "}")
+        elif tipo == NodeType.DO:
+            condicion = nodo.children[1] if len(nodo.children) > 1 else None
+            self.emitir(nivel, "do {")
+            self.generar_sentencia(nodo.children[0], nivel + 1)
+            self.emitir(nivel, f"}} while ({self.expresion(condicion) if condicion else '0'});")
+        else:
+            self.error(f"Sentencia '{nodo.name}' no soportada", nodo)
+
+    def tipo_variable(self, nodo_id):
+        tipo = self.declaraciones.get(nodo_id.name)
+        if tipo is None:
+            self.error(f"Variable '{nodo_id.name}' no declarada", nodo_id)
+            return "int"
+        return tipo
+
+    def convertir(self, nodo, tipo_destino):
+        expresion = self.expresion(nodo)
+        if tipo_destino == "bool":
+            return f"(({expresion}) != 0)"
+        if tipo_destino == "float":
+            return f"(double)({expresion})"
+        if self.tipo(nodo) == "float":
+            return f"a_entero({expresion}, {self.posicion(nodo)})"
+        return f"(long long)({expresion})"
+
+    def tipo(self, nodo):
+        """Tipo estático de la expresión; bool se comporta como entero en aritmética"""
+        tipo = nodo.node_type
+        if tipo == NodeType.FACTOR:
+            return {int: "int", float: "float", bool: "bool"}[type(valor_literal(nodo))]
+        if tipo == NodeType.IDENTIFICADOR:
+            return self.declaraciones.get(nodo.name, "int")
+        if tipo in (NodeType.RELACIONAL, NodeType.LOGICO):
+            return "bool"
+        if tipo in (NodeType.INCREMENTO, NodeType.DECREMENTO):
+            return "float" if nodo.children and self.tipo(nodo.children[0]) == "float" else "int"
+        if len(nodo.children) != 2:
+            return "int"
+        tipos = {self.tipo(hijo) for hijo in nodo.children}
+        if "float" in tipos:
+            return "float"
+        if nodo.name in ("/", "%", "^") and tipos != {"int"}:
+            # Como tipo_estatico, dividir, modulo y potencia: un bool no cuenta como int
+            return "float"
+        if tipo == NodeType.POTENCIA:
+            exponente = nodo.children[1]
+            # Con exponente entero variable el backend de Python decide el tipo en ejecución
+            if exponente.node_type != NodeType.FACTOR or valor_literal(exponente) < 0:
+                raise ConstruccionNoSoportada("potencia entera con exponente no constante")
+        return "int"
+
+    def expresion(self, nodo):
+        if nodo is None:
+            return "0"
+        tipo = nodo.node_type
+        hijos = nodo.children
+        if tipo == NodeType.FACTOR:
+            valor = valor_literal(nodo)
+            if type(valor) is bool:
+                return "1" if valor else "0"
+            if type(valor) is float:
+                if not math.isfinite(valor):
+                    raise ConstruccionNoSoportada("literal real no finito")
+                return repr(valor)
+            # El mínimo se excluye: en C '-9223372036854775808LL' desborda antes del signo
+            if not ENTERO_MINIMO < valor <= ENTERO_MAXIMO:
+                raise ConstruccionNoSoportada("literal entero de más de 64 bits")
+            return f"{valor}LL"
+        if tipo == NodeType.IDENTIFICADOR:
+            self.tipo_variable(nodo)
+            return self.variable(nodo.name)
+        if tipo == NodeType.CADENA:
+            self.error("Las cadenas solo pueden usarse con 'cout'", nodo)
+            return "0"
+        if tipo in (NodeType.INCREMENTO, NodeType.DECREMENTO):
+            operando = self.expresion(hijos[0] if hijos else None)
+            if self.tipo(nodo) == "float":
+                signo = "+" if tipo == NodeType.INCREMENTO else "-"
+                return f"({operando} {signo} 1)"
+            funcion = "suma_e" if tipo == NodeType.INCREMENTO else "resta_e"
+            return f"{funcion}({operando}, 1LL, {self.posicion(nodo)})"
+        if tipo == NodeType.LOGICO:
+            if len(hijos) == 1 and nodo.name == "!":
+                return f"(!{self.expresion(hijos[0])})"
+            if len(hijos) == 2 and nodo.name in ("&&", "||"):
+                return f"({self.expresion(hijos[0])} {nodo.name} {self.expresion(hijos[1])})"
+            self.error(f"Operador lógico '{nodo.name}' incompleto", nodo)
+            return "0"
+        if len(hijos) != 2:
+            self.error(f"Operador '{nodo.name}' incompleto", nodo)
+            return "0"
+        izquierda = self.expresion(hijos[0])
+        derecha = self.expresion(hijos[1])
+        if nodo.name in ("<", ">", "<=", ">=", "==", "!="):
+            return f"({izquierda} {nodo.name} {derecha})"
+        sufijo = "r" if self.tipo(nodo) == "float" else "e"
+        if sufijo == "r":
+            if self.tipo(hijos[0]) == "bool":
+                izquierda = f"(double)({izquierda})"
+            if self.tipo(hijos[1]) == "bool":
+                derecha = f"(double)({derecha})"
+        if nodo.name in OPERACIONES_VERIFICADAS:
+            if sufijo == "r":
+                return f"({izquierda} {nodo.name} {derecha})"
+            # Con enteros, un desborde no da la vuelta: detiene el programa nativo
+            return f"{OPERACIONES_VERIFICADAS[nodo.name]}({izquierda}, {derecha}, {self.posicion(nodo)})"
+        if nodo.name == "/":
+            return f"div_{sufijo}({izquierda}, {derecha}, {self.posicion(nodo)})"
+        if nodo.name == "%":
+            return f"mod_{sufijo}({izquierda}, {derecha}, {self.posicion(nodo)})"
+        if nodo.name == "^":
+            if sufijo == "e":
+                return f"pot_e({izquierda}, {derecha}, {self.posicion(nodo)})"
+            return f"pot_r({izquierda}, {derecha}, {self.posicion(nodo)})"
+        self.error(f"Operador '{nodo.name}' no soportado", nodo)
+        return "0"
+
+
+class Valor(ctypes.Structure):
+    _fields_ = [("tipo", ctypes.c_int), ("entero", ctypes.c_longlong), ("real", ctypes.c_double)]
+
+
+LEER_FN = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_int, ctypes.POINTER(ctypes.c_longlong),
+                           ctypes.POINTER(ctypes.c_double))
+VACIAR_FN = ctypes.CFUNCTYPE(None, ctypes.c_int)
+
+TIPOS_ENTRADA = {SALIDA_ENTERO: "int", SALIDA_REAL: "float", SALIDA_BOOL: "bool"}
+
+
+class ProgramaNativo:
+    def __init__(self, biblioteca, cadenas):
+        self.funcion = biblioteca.programa
+        self.funcion.restype = ctypes.c_int
+        self.funcion.argtypes = [LEER_FN, VACIAR_FN, ctypes.POINTER(Valor), ctypes.c_int,
+                                 ctypes.POINTER(ctypes.c_int)]
+        self.biblioteca = biblioteca
+        self.cadenas = cadenas
+
+    def ejecutar(self, leer, escribir):
+        buffer = (Valor * CAPACIDAD_SALIDA)()
+        error = (ctypes.c_int * 3)()
+        excepciones = []
+        entradas = []
+        escritos = 0
+
+        # Las excepciones no pueden atravesar código de C: se guardan y se relanzan al volver
+        def leer_c(tipo, entero, real):
+            try:
+                texto = leer()
+                entradas.append(texto)
+                valor = leer_valor(texto, TIPOS_ENTRADA[tipo])
+            except Exception as e:
+                excepciones.append(e)
+                return ERROR_ENTRADA
+            if tipo == SALIDA_REAL:
+                real[0] = valor
+            elif not ENTERO_MINIMO <= valor <= ENTERO_MAXIMO:
+                return ERROR_DESBORDE
+            else:
+                entero[0] = int(valor)
+            return 0
+
+        def vaciar_c(cantidad):
+            nonlocal escritos
+            try:
+                for i in range(cantidad):
+                    registro = buffer[i]
+                    if registro.tipo == SALIDA_ENTERO:
+                        escribir(registro.entero)
+                    elif registro.tipo == SALIDA_REAL:
+                        escribir(registro.real)
+                    elif registro.tipo == SALIDA_BOOL:
+                        escribir(bool(registro.entero))
+                    else:
+                        escribir(self.cadenas[registro.entero])
+                    escritos += 1
+            except Exception as e:
+                excepciones.append(e)
+
+        resultado = self.funcion(LEER_FN(leer_c), VACIAR_FN(vaciar_c), buffer, CAPACIDAD_SALIDA, error)
+        if excepciones:
+            excepcion = excepciones[0]
+            if isinstance(excepcion, ErrorEjecucion) and excepcion.line is None:
+                excepcion.line, excepcion.column = error[1], error[2]
+            raise excepcion
+        if resultado and error[0] == ERROR_DESBORDE:
+            raise Desborde(entradas, escritos)
+        if resultado:
+            raise ErrorEjecucion(MENSAJES_ERROR.get(error[0], "error desconocido"), error[1], error[2])
+
+
+_programas_cargados = {}
+
+
+def compilador_disponible():
+    return shutil.which(COMPILADOR_C) is not None
+
+
+def traducir(codigo):
+    """Devuelve el código C generado y la tabla de cadenas del programa"""
+    ast, _ = optimizar(analizar_programa(codigo))
+    return GeneradorC(ast).generar()
+
+
+def compilar(codigo):
+    """Compila el programa a una biblioteca compartida y la carga con ctypes.
+
+    Devuelve None cuando no hay compilador de C o el programa usa construcciones que
+    solo el backend de Python reproduce fielmente, como literales de más de 64 bits. Los
+    enteros que desbordan al ejecutar los detecta el propio programa nativo (Desborde).
+    """
+    if not compilador_disponible():
+        return None
+    try:
+        fuente, cadenas = traducir(codigo)
+    except ConstruccionNoSoportada:
+        return None
+
+    clave = hashlib.sha256((VERSION_GENERADOR + COMPILADOR_C + fuente).encode("utf-8")).hexdigest()
+    if clave in _programas_cargados:
+        return _programas_cargados[clave]
+
+    extension = ".dll" if os.name == "nt" else ".so"
+    ruta = os.path.join(transpilador.DIRECTORIO_CACHE, f"{clave}{extension}")
+    if not os.path.exists(ruta) and not _compilar_biblioteca(fuente, ruta):
+        return None
+    try:
+        programa = ProgramaNativo(ctypes.CDLL(ruta), cadenas)
+    except OSError:
+        return None
+    _programas_cargados[clave] = programa
+    return programa
+
+
+def _compilar_biblioteca(fuente, ruta):
+    temporal = f"{ruta}.{os.getpid()}"
+    try:
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with open(f"{temporal}.c", "w", encoding="utf-8") as f:
+            f.write(fuente)
+        proceso = subprocess.run([COMPILADOR_C, *OPCIONES_C, "-o", temporal, f"{temporal}.c", "-lm"],
+                                 capture_output=True)
+        if proceso.returncode != 0:
+            return False
+        os.replace(temporal, ruta)
+        return True
+    except OSError:
+        return False
+    finally:
+        for archivo in (temporal, f"{temporal}.c"):
+            if os.path.exists(archivo):
+                os.remove(archivo)
+
+
+def ejecutar(codigo, leer, escribir):
+    """Ejecuta con código nativo si es posible; si no, con el backend de Python.
+
+    Devuelve "c" o "python" según el backend que se usó.
+    """
+    programa = compilar(codigo)
+    if programa is None:
+        transpilador.ejecutar(codigo, leer, escribir)
+        return "python"
+    try:
+        programa.ejecutar(leer, escribir)
+    except Desborde as e:
+        _continuar_en_python(codigo, leer, escribir, e)
+        return "python"
+    return "c"
+
+
+def _continuar_en_python(codigo, leer, escribir, desborde):
+    # Se repite desde el principio con las mismas entradas; lo que el programa nativo ya
+    # escribió no se vuelve a escribir
+    entradas = iter(desborde.entradas)
+    omitir = desborde.escritos
+
+    def leer_repetido():
+        texto = next(entradas, None)
+        return leer() if texto is None else texto
+
+    def escribir_resto(valor):
+        nonlocal omitir
+        if omitir:
+            omitir -= 1
+        else:
+            escribir(valor)
+
+    transpilador.ejecutar(codigo, leer_repetido, escribir_resto)
+
+
+if __name__ == '__main__':
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        fuente_programa = f.read()
+    try:
+        with salida_estandar() as escribir:
+            ejecutar(fuente_programa, entrada_estandar(), escribir)
+    except (ErrorCompilacion, ErrorEjecucion) as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,333 @@
+# benchmarks.py
+
+import gc
+import io
+import os
+import sys
+import time
+
+from ejecucion import analizar_programa, lector, formatear
+from optimizador_ast import optimizar as optimizar_ast
+from codigo_intermedio import Instruccion, ProgramaIntermedio, generar_intermedio
+from optimizador_ir import optimizar_intermedio
+from maquina_virtual import EnsambladorPila, MaquinaPila, OptimizadorMirilla
+from maquina_registros import EnsambladorRegistros, MaquinaRegistros
+from ssa import FormaSSA, optimizar_ssa
+from optimizador_lazos import optimizar_lazos
+from ejecucion_lotes import ejecutar_lote, ejecutar_fila, numpy_disponible
+import transpilador
+from entrada_salida import EntradaBuffer, SalidaBuffer
+
+# Programas de prueba con ciclos; cada uno lee un único valor: el número de iteraciones
+PROGRAMAS = {
+    "suma_cuadrados": """
+main {
+  int n, i, s;
+  cin >> n;
+  i = 0;
+  while i < n
+    s = s + i * i % 7;
+    i++;
+  end
+  cout << s;
+}
+""",
+    "subexpresiones": """
+main {
+  int n, i, a, b, c, s;
+  cin >> n;
+  a = n % 13;
+  b = n % 7;
+  while i < n
+    c = a * b + i;
+    s = s + a * b + i;
+    s = s - c;
+    i = i + 1;
+  end
+  cout << s;
+}
+""",
+    "reales": """
+main {
+  int n, i;
+  float x, y;
+  cin >> n;
+  x = 1.5;
+  while i < n
+    y = y + x * x / 2.0;
+    x = x + 0.001;
+    i++;
+  end
+  cout << y;
+}
+""",
+    "lazos": """
+main {
+  int n, i, j, s, a, b, m;
+  cin >> n;
+  a = n % 11;
+  b = n % 5;
+  while i < n
+    j = 0;
+    while j < 10
+      m = a * b + 3;
+      s = s + (i * 7 + j) % 8 + j ^ 2 + m;
+      j++;
+    end
+    i++;
+  end
+  cout << s;
+}
+""",
+}
+
+CONFIGURACIONES_IR = {
+    "sin optimizar": None,
+    "inalcanzables": {"inalcanzables": True, "asignaciones_muertas": False, "subexpresiones": False},
+    "asignaciones muertas": {"inalcanzables": False, "asignaciones_muertas": True, "subexpresiones": False},
+    "subexpresiones": {"inalcanzables": False, "asignaciones_muertas": False, "subexpresiones": True},
+    "todas": {},
+}
+
+CONFIGURACIONES_LAZOS = {
+    "sin optimizar lazos": None,
+    "invariantes": {"invariantes": True, "reduccion": False},
+    "reducción de fuerza": {"invariantes": False, "reduccion": True},
+    "ambas": {},
+}
+
+TAMANOS_SSA = [10_000, 100_000, 1_000_000]
+
+
+def medir(funcion, repeticiones=3):
+    """Mejor tiempo (en segundos) de varias ejecuciones"""
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        transcurrido = time.perf_counter() - inicio
+        mejor = transcurrido if mejor is None else min(mejor, transcurrido)
+    return mejor
+
+
+def benchmark_optimizador_ir(fuente, entrada, repeticiones=3):
+    """Tiempo de ejecución en la máquina de pila con cada transformación del optimizador de IR"""
+    ast, _ = optimizar_ast(analizar_programa(fuente))
+    programa = generar_intermedio(ast)
+    resultados = []
+    for nombre, opciones in CONFIGURACIONES_IR.items():
+        if opciones is None:
+            optimizado, estadisticas = programa, {}
+        else:
+            optimizado, estadisticas = optimizar_intermedio(programa, **opciones)
+        maquina = MaquinaPila(EnsambladorPila(optimizado).ensamblar())
+        tiempo = medir(lambda: maquina.ejecutar(lector(entrada), lambda valor: None), repeticiones)
+        resultados.append((nombre, len(optimizado.instrucciones), maquina.instrucciones_ejecutadas,
+                           tiempo, estadisticas))
+    return resultados
+
+
+def benchmark_lazos(fuente, entrada, repeticiones=3):
+    """Tiempo en la máquina de pila con cada transformación del optimizador de lazos.
+
+    Las demás optimizaciones (AST, SSA y código intermedio) se aplican en todos los casos.
+    """
+    ast, _ = optimizar_ast(analizar_programa(fuente))
+    programa, _ = optimizar_ssa(generar_intermedio(ast))
+    resultados = []
+    for nombre, opciones in CONFIGURACIONES_LAZOS.items():
+        estadisticas = {}
+        optimizado = programa
+        if opciones is not None:
+            optimizado, estadisticas = optimizar_lazos(programa, **opciones)
+        optimizado, _ = optimizar_intermedio(optimizado)
+        maquina = MaquinaPila(EnsambladorPila(optimizado).ensamblar())
+        tiempo = medir(lambda: maquina.ejecutar(lector(entrada), lambda valor: None), repeticiones)
+        resultados.append((nombre, len(optimizado.instrucciones), maquina.instrucciones_ejecutadas,
+                           tiempo, estadisticas))
+    return resultados
+
+
+def benchmark_mirilla(fuente, entrada, repeticiones=3):
+    """Despachos y tiempo de la máquina de pila antes y después del optimizador de mirilla"""
+    ast, _ = optimizar_ast(analizar_programa(fuente))
+    programa, _ = optimizar_ssa(generar_intermedio(ast))
+    programa, _ = optimizar_lazos(programa)
+    programa, _ = optimizar_intermedio(programa)
+    bytecode = EnsambladorPila(programa).ensamblar()
+    optimizado, estadisticas = OptimizadorMirilla(bytecode).optimizar()
+    resultados = []
+    for nombre, codigo, datos in (("sin mirilla", bytecode, {}), ("con mirilla", optimizado, estadisticas)):
+        maquina = MaquinaPila(codigo)
+        tiempo = medir(lambda: maquina.ejecutar(lector(entrada), lambda valor: None), repeticiones)
+        resultados.append((nombre, len(codigo.codigo), maquina.instrucciones_ejecutadas, tiempo, datos))
+    return resultados
+
+
+def benchmark_maquinas(fuente, entrada, repeticiones=3):
+    """Máquina de pila (con mirilla) contra máquina de registros sobre el mismo código intermedio"""
+    ast, _ = optimizar_ast(analizar_programa(fuente))
+    programa, _ = optimizar_ssa(generar_intermedio(ast))
+    programa, _ = optimizar_lazos(programa)
+    programa, _ = optimizar_intermedio(programa)
+    bytecode, _ = OptimizadorMirilla(EnsambladorPila(programa).ensamblar()).optimizar()
+    ensamblador = EnsambladorRegistros(programa)
+    codigo_registros = ensamblador.ensamblar()
+    resultados = []
+    for nombre, maquina, longitud, datos in (
+            ("pila", MaquinaPila(bytecode), len(bytecode.codigo), {"casillas": len(bytecode.nombres)}),
+            ("registros", MaquinaRegistros(codigo_registros), len(codigo_registros.codigo),
+             ensamblador.estadisticas)):
+        tiempo = medir(lambda: maquina.ejecutar(lector(entrada), lambda valor: None), repeticiones)
+        resultados.append((nombre, longitud, maquina.instrucciones_ejecutadas, tiempo, datos))
+    return resultados
+
+
+def imprimir_optimizador_ir(nombre_programa, resultados, columna="Instr. IR"):
+    print(f"\n{nombre_programa}")
+    print(f"{'Configuración':<22}{columna:>10}{'Despachos':>12}{'Tiempo (s)':>12}")
+    base = resultados[0][3]
+    for nombre, instrucciones, despachos, tiempo, _ in resultados:
+        print(f"{nombre:<22}{instrucciones:>10}{despachos:>12}{tiempo:>12.4f}  x{base / tiempo:.2f}")
+
+
+def generar_ir_sintetico(instrucciones):
+    """Código de tres direcciones artificial con ciclos y condicionales anidados.
+
+    Se arma directamente (sin pasar por el analizador) para llegar a tamaños grandes;
+    cada tramo es un ciclo con un if dentro que usa pocas variables compartidas.
+    """
+    declaraciones = {"a": "int", "b": "int", "c": "int", "i": "int", "s": "int"}
+    codigo = [Instruccion("leer", "a", "int")]
+    tramo = 0
+    while len(codigo) < instrucciones:
+        tramo += 1
+        inicio, fin, salto = f"L{tramo}a", f"L{tramo}b", f"L{tramo}c"
+        t = [f"_t{tramo}_{k}" for k in range(5)]
+        codigo += [
+            Instruccion("copiar", "i", 0),
+            Instruccion("copiar", "c", tramo % 7),
+            Instruccion("etiqueta", arg1=inicio),
+            Instruccion("<", t[0], "i", "a"),
+            Instruccion("si_falso", arg1=t[0], arg2=fin),
+            Instruccion("*", t[1], "c", 2),
+            Instruccion("+", t[2], "s", t[1]),
+            Instruccion("%", t[3], t[2], 1000),
+            Instruccion("copiar", "s", t[3]),
+            Instruccion(">", t[4], "s", "b"),
+            Instruccion("si_falso", arg1=t[4], arg2=salto),
+            Instruccion("copiar", "b", "s"),
+            Instruccion("etiqueta", arg1=salto),
+            Instruccion("+", "i", "i", 1),
+            Instruccion("saltar", arg1=inicio),
+            Instruccion("etiqueta", arg1=fin),
+        ]
+    codigo.append(Instruccion("escribir", arg1="s"))
+    return ProgramaIntermedio(codigo, declaraciones)
+
+
+def benchmark_ssa(tamanos=TAMANOS_SSA):
+    """Tiempo de cada fase de SSA por instrucción, para ver que crece de forma casi lineal"""
+    resultados = []
+    for tamano in tamanos:
+        programa = generar_ir_sintetico(tamano)
+        tiempos = {}
+        # Como timeit, sin el recolector de ciclos: con millones de objetos vivos su costo
+        # crece con el tamaño del montículo y ocultaría el de los algoritmos
+        gc.disable()
+        try:
+            inicio = time.perf_counter()
+            forma = FormaSSA(programa).construir()
+            tiempos["construcción"] = time.perf_counter() - inicio
+            for fase, paso in (("constantes", forma.propagar_constantes), ("copias", forma.propagar_copias),
+                               ("salida", forma.destruir)):
+                inicio = time.perf_counter()
+                paso()
+                tiempos[fase] = time.perf_counter() - inicio
+        finally:
+            gc.enable()
+        resultados.append((len(programa.instrucciones), tiempos, forma.estadisticas))
+    return resultados
+
+
+def benchmark_lotes(fuente, filas=10000, maximo=200, repeticiones=3):
+    """Una fila por ejecución (transpilador) contra todas las filas juntas por carriles.
+
+    Cada fila trae un número de iteraciones distinto entre 0 y maximo, así que los
+    carriles terminan sus ciclos en momentos diferentes.
+    """
+    entradas = [[(indice * 7919) % (maximo + 1)] for indice in range(filas)]
+    programa = transpilador.compilar(fuente)
+    resultados = [("por fila", medir(lambda: [ejecutar_fila(programa, fila) for fila in entradas], repeticiones))]
+    if numpy_disponible():
+        resultados.append(("por carriles", medir(lambda: ejecutar_lote(fuente, entradas), repeticiones)))
+    return resultados
+
+
+def imprimir_lotes(nombre_programa, resultados, cantidad, unidad="filas"):
+    print(f"\n{nombre_programa} ({cantidad} {unidad})")
+    base = resultados[0][1]
+    for nombre, tiempo in resultados:
+        print(f"{nombre:<22}{tiempo:>12.4f}  x{base / tiempo:.2f}")
+
+
+# Programa que lee y escribe un valor por iteración
+PROGRAMA_ENTRADA_SALIDA = """
+main {
+  int n, i, x;
+  cin >> n;
+  while i < n
+    cin >> x;
+    cout << x * 2;
+    i++;
+  end
+}
+"""
+
+
+def benchmark_entrada_salida(valores=1000000, repeticiones=3):
+    """Un valor por llamada (leer línea a línea, un print por valor) contra la entrada y salida con buffer"""
+    texto = f"{valores}\n" + "\n".join(str(indice % 1000) for indice in range(valores)) + "\n"
+    programa = transpilador.compilar(PROGRAMA_ENTRADA_SALIDA)
+    resultados = []
+    with open(os.devnull, "w") as destino:
+        def por_valor():
+            lineas = io.StringIO(texto)
+            programa.ejecutar(lector(dato for linea in lineas for dato in linea.split()),
+                              lambda valor: print(formatear(valor), file=destino))
+
+        def con_buffer():
+            with SalidaBuffer(destino.write) as salida:
+                programa.ejecutar(EntradaBuffer.desde_texto(texto), salida)
+
+        resultados.append(("por valor", medir(por_valor, repeticiones)))
+        resultados.append(("con buffer", medir(con_buffer, repeticiones)))
+    return resultados
+
+
+def imprimir_ssa(resultados):
+    fases = list(resultados[0][1])
+    print("\nSSA (microsegundos por instrucción)")
+    print(f"{'Instr. IR':>10}" + "".join(f"{fase:>14}" for fase in fases) + f"{'Total (s)':>12}")
+    for instrucciones, tiempos, _ in resultados:
+        por_instruccion = "".join(f"{tiempos[fase] / instrucciones * 1e6:>14.2f}" for fase in fases)
+        print(f"{instrucciones:>10}{por_instruccion}{sum(tiempos.values()):>12.2f}")
+
+
+if __name__ == '__main__':
+    iteraciones = sys.argv[1] if len(sys.argv) > 1 else "200000"
+    for nombre, fuente in PROGRAMAS.items():
+        imprimir_optimizador_ir(nombre, benchmark_optimizador_ir(fuente, [iteraciones]))
+    for nombre, fuente in PROGRAMAS.items():
+        imprimir_optimizador_ir(f"{nombre} (lazos)", benchmark_lazos(fuente, [iteraciones]))
+    for nombre, fuente in PROGRAMAS.items():
+        imprimir_optimizador_ir(f"{nombre} (mirilla)", benchmark_mirilla(fuente, [iteraciones]), "Bytecode")
+    for nombre, fuente in PROGRAMAS.items():
+        resultados = benchmark_maquinas(fuente, [iteraciones])
+        imprimir_optimizador_ir(f"{nombre} (máquinas)", resultados, "Código")
+        print("casillas del marco: " + ", ".join(f"{nombre_maquina} {datos['casillas']}"
+                                                 for nombre_maquina, _, _, _, datos in resultados))
+    for nombre, fuente in PROGRAMAS.items():
+        imprimir_lotes(f"{nombre} (lotes)", benchmark_lotes(fuente), 10000)
+    imprimir_lotes("entrada y salida", benchmark_entrada_salida(), 1000000, "valores")
+    imprimir_ssa(benchmark_ssa())
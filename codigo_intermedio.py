@@ -0,0 +1,327 @@
+# codigo_intermedio.py
+
+from arbol_sintaxis import NodeType
+from ejecucion import (ErrorCompilacion, recolectar_declaraciones, valor_literal, texto_cadena,
+                       tipo_estatico, tipo_constante, formatear)
+
+# Operaciones de tres direcciones:
+#   copiar      destino = arg1
+#   <operador>  destino = arg1 <operador> arg2   (+ - * / % ^ < > <= >= == != && ||)
+#   &           destino = arg1 % (arg2 + 1) para enteros, con arg2 + 1 potencia de dos
+#               (lo genera la reducción de fuerza; el resto conserva el signo de arg1)
+#   !           destino = !arg1
+#   convertir   destino = convertir(arg1, arg2)  (arg2 es el tipo destino)
+#   leer        destino = cin, arg1 es el tipo de la variable
+#   escribir    cout << arg1  (arg2 es True cuando arg1 es el texto de una cadena)
+#   etiqueta    arg1:
+#   saltar      ir a arg1
+#   si_falso    si no arg1 ir a arg2
+#   si_verdadero si arg1 ir a arg2
+#   phi         destino = phi(arg1), arg1 es {bloque predecesor: operando} y arg2 la variable
+#               original; solo existe en forma SSA
+# Los operandos que son str son nombres de variables o temporales; el resto son constantes.
+OPERADORES_BINARIOS = {"+", "-", "*", "/", "%", "^", "<", ">", "<=", ">=", "==", "!=", "&&", "||", "&"}
+OPERADORES_RELACIONALES = {"<", ">", "<=", ">=", "==", "!=", "&&", "||"}
+SALTOS = {"saltar", "si_falso", "si_verdadero"}
+
+# Los temporales empiezan con '_' para no chocar con los identificadores del lenguaje
+PREFIJO_TEMPORAL = "_t"
+
+
+class Instruccion:
+    __slots__ = ("op", "destino", "arg1", "arg2", "line", "column", "tipo")
+
+    def __init__(self, op, destino=None, arg1=None, arg2=None, line=None, column=None):
+        self.op = op
+        self.destino = destino
+        self.arg1 = arg1
+        self.arg2 = arg2
+        self.line = line
+        self.column = column
+        self.tipo = None        # tipo estático del resultado, lo pone anotar_tipos
+
+    def usos(self):
+        """Variables y temporales que lee la instrucción"""
+        if self.op == "escribir" and self.arg2:
+            return []
+        if self.op in ("leer", "etiqueta", "saltar"):
+            return []
+        if self.op == "phi":
+            return [arg for arg in self.arg1.values() if isinstance(arg, str)]
+        if self.op in ("si_falso", "si_verdadero", "copiar", "!", "convertir", "escribir"):
+            return [self.arg1] if isinstance(self.arg1, str) else []
+        return [arg for arg in (self.arg1, self.arg2) if isinstance(arg, str)]
+
+    def __repr__(self):
+        op = self.op
+        if op == "etiqueta":
+            return f"{self.arg1}:"
+        if op == "saltar":
+            return f"    ir_a {self.arg1}"
+        if op in ("si_falso", "si_verdadero"):
+            return f"    {op} {_texto(self.arg1)} ir_a {self.arg2}"
+        if op == "leer":
+            return f"    leer {self.destino} ({self.arg1})"
+        if op == "escribir":
+            return f"    escribir {self.arg1!r}" if self.arg2 else f"    escribir {_texto(self.arg1)}"
+        if op == "copiar":
+            return f"    {self.destino} = {_texto(self.arg1)}"
+        if op == "!":
+            return f"    {self.destino} = !{_texto(self.arg1)}"
+        if op == "convertir":
+            return f"    {self.destino} = convertir({_texto(self.arg1)}, {self.arg2})"
+        if op == "phi":
+            argumentos = ", ".join(f"B{getattr(bloque, 'indice', bloque)}: {_texto(arg)}"
+                                   for bloque, arg in self.arg1.items())
+            return f"    {self.destino} = phi({argumentos})"
+        return f"    {self.destino} = {_texto(self.arg1)} {op} {_texto(self.arg2)}"
+
+
+def _texto(operando):
+    return operando if isinstance(operando, str) else formatear(operando)
+
+
+def es_temporal(nombre):
+    return isinstance(nombre, str) and nombre.startswith(PREFIJO_TEMPORAL)
+
+
+def variable_original(nombre):
+    """Nombre declarado de una versión SSA ('x.3' -> 'x')"""
+    return nombre.split(".", 1)[0]
+
+
+def tipo_resultado(op, tipo1, tipo2=None, arg2=None):
+    """Tipo del resultado de una instrucción según el de sus operandos, o None si no se sabe"""
+    if op in OPERADORES_RELACIONALES or op == "!":
+        return "bool"
+    if op == "convertir":
+        return arg2
+    if op == "copiar":
+        return tipo1
+    if tipo1 is None or tipo2 is None:
+        return None
+    if op == "&":
+        return "int"
+    if op in ("/", "%"):
+        # dividir y modulo solo conservan enteros cuando ambos operandos son int (no bool)
+        return "int" if tipo1 == tipo2 == "int" else "float"
+    if op == "^":
+        if tipo1 == tipo2 == "int":
+            return "int" if isinstance(arg2, int) and arg2 >= 0 else None
+        return "float"
+    return "float" if "float" in (tipo1, tipo2) else "int"
+
+
+def inferir_tipos(programa):
+    """Tipo de cada nombre del programa (variables, versiones SSA y temporales).
+
+    Las variables declaradas siempre guardan su tipo porque las asignaciones convierten;
+    el de los temporales se deduce de las instrucciones que los definen. Queda None
+    cuando un nombre recibe valores de tipos distintos o no puede deducirse.
+    """
+    pendiente = object()
+    tipos = {}
+    for instruccion in programa.instrucciones:
+        if instruccion.destino is not None:
+            tipos[instruccion.destino] = programa.declaraciones.get(variable_original(instruccion.destino),
+                                                                    pendiente)
+    # Los nombres que solo se leen (valores de entrada en SSA) tienen el tipo declarado
+    for instruccion in programa.instrucciones:
+        for nombre in instruccion.usos():
+            if nombre not in tipos:
+                tipos[nombre] = programa.declaraciones.get(variable_original(nombre))
+
+    def tipo(operando):
+        return tipos.get(operando) if isinstance(operando, str) else tipo_constante(operando)
+
+    cambio = True
+    while cambio:
+        cambio = False
+        for instruccion in programa.instrucciones:
+            destino = instruccion.destino
+            if destino is None or variable_original(destino) in programa.declaraciones:
+                continue
+            op = instruccion.op
+            if op == "leer":
+                nuevo = instruccion.arg1
+            else:
+                operandos = [tipo(instruccion.arg1)]
+                if op in OPERADORES_BINARIOS:
+                    operandos.append(tipo(instruccion.arg2))
+                if pendiente in operandos and op not in OPERADORES_RELACIONALES and op != "!" \
+                        and op != "convertir":
+                    continue
+                nuevo = tipo_resultado(op, *operandos, arg2=instruccion.arg2)
+            anterior = tipos[destino]
+            combinado = nuevo if anterior is pendiente or anterior == nuevo else None
+            if combinado != anterior:
+                tipos[destino] = combinado
+                cambio = True
+    return {nombre: (None if valor is pendiente else valor) for nombre, valor in tipos.items()}
+
+
+def anotar_tipos(programa):
+    """Pone en cada instrucción el tipo estático de su resultado; devuelve el tipo de cada nombre"""
+    tipos = inferir_tipos(programa)
+
+    def tipo(operando):
+        return tipos.get(operando) if isinstance(operando, str) else tipo_constante(operando)
+
+    for instruccion in programa.instrucciones:
+        if instruccion.destino is None or instruccion.op == "leer":
+            instruccion.tipo = tipos.get(instruccion.destino)
+        else:
+            instruccion.tipo = tipo_resultado(instruccion.op, tipo(instruccion.arg1), tipo(instruccion.arg2),
+                                              instruccion.arg2)
+    return tipos
+
+
+class ProgramaIntermedio:
+    def __init__(self, instrucciones, declaraciones):
+        self.instrucciones = instrucciones
+        self.declaraciones = declaraciones
+
+    def __str__(self):
+        return "\n".join(repr(instruccion) for instruccion in self.instrucciones)
+
+
+class GeneradorIntermedio:
+    """Genera código de tres direcciones a partir del AST"""
+
+    def __init__(self, ast):
+        self.ast = ast
+        self.declaraciones = recolectar_declaraciones(ast)
+        self.instrucciones = []
+        self.errores = []
+        self.temporales = 0
+        self.etiquetas = 0
+
+    def generar(self):
+        self.generar_sentencia(self.ast)
+        if self.errores:
+            raise ErrorCompilacion(self.errores)
+        return ProgramaIntermedio(self.instrucciones, self.declaraciones)
+
+    def emitir(self, op, destino=None, arg1=None, arg2=None, nodo=None):
+        line = nodo.line if nodo is not None else None
+        column = nodo.column if nodo is not None else None
+        self.instrucciones.append(Instruccion(op, destino, arg1, arg2, line, column))
+
+    def error(self, mensaje, nodo):
+        mensaje = f"Error de traducción en línea {nodo.line}, columna {nodo.column}: {mensaje}"
+        if mensaje not in self.errores:
+            self.errores.append(mensaje)
+
+    def nuevo_temporal(self):
+        self.temporales += 1
+        return f"{PREFIJO_TEMPORAL}{self.temporales}"
+
+    def nueva_etiqueta(self):
+        self.etiquetas += 1
+        return f"L{self.etiquetas}"
+
+    def tipo_variable(self, nodo_id):
+        tipo = self.declaraciones.get(nodo_id.name)
+        if tipo is None:
+            self.error(f"Variable '{nodo_id.name}' no declarada", nodo_id)
+            return "int"
+        return tipo
+
+    def generar_sentencia(self, nodo):
+        tipo = nodo.node_type
+        if tipo in (NodeType.LISTA, NodeType.MAIN):
+            for hijo in nodo.children:
+                self.generar_sentencia(hijo)
+        elif tipo == NodeType.TIPO:
+            return
+        elif tipo == NodeType.ASIGNACION:
+            if len(nodo.children) < 2:
+                return
+            destino = nodo.children[0]
+            tipo_var = self.tipo_variable(destino)
+            valor = nodo.children[1]
+            if tipo_estatico(valor, self.declaraciones) == tipo_var:
+                # El resultado se calcula directamente sobre la variable, sin temporal intermedio
+                resultado = self.expresion(valor, destino.name)
+                if resultado != destino.name:
+                    self.emitir("copiar", destino.name, resultado, nodo=nodo)
+            else:
+                self.emitir("convertir", destino.name, self.expresion(valor), tipo_var, nodo=nodo)
+        elif tipo == NodeType.INPUT:
+            if nodo.children:
+                destino = nodo.children[0]
+                self.emitir("leer", destino.name, self.tipo_variable(destino), nodo=nodo)
+        elif tipo == NodeType.OUTPUT:
+            if not nodo.children:
+                return
+            valor = nodo.children[0]
+            if valor.node_type == NodeType.CADENA:
+                self.emitir("escribir", arg1=texto_cadena(valor), arg2=True, nodo=nodo)
+            else:
+                self.emitir("escribir", arg1=self.expresion(valor), nodo=nodo)
+        elif tipo == NodeType.IF:
+            etiqueta_else = self.nueva_etiqueta()
+            self.emitir("si_falso", arg1=self.expresion(nodo.children[0]), arg2=etiqueta_else, nodo=nodo)
+            self.generar_sentencia(nodo.children[1])
+            if len(nodo.children) > 2:
+                etiqueta_fin = self.nueva_etiqueta()
+                self.emitir("saltar", arg1=etiqueta_fin)
+                self.emitir("etiqueta", arg1=etiqueta_else)
+                self.generar_sentencia(nodo.children[2])
+                self.emitir("etiqueta", arg1=etiqueta_fin)
+            else:
+                self.emitir("etiqueta", arg1=etiqueta_else)
+        elif tipo == NodeType.WHILE:
+            etiqueta_inicio = self.nueva_etiqueta()
+            etiqueta_fin = self.nueva_etiqueta()
+            self.emitir("etiqueta", arg1=etiqueta_inicio)
+            self.emitir("si_falso", arg1=self.expresion(nodo.children[0]), arg2=etiqueta_fin, nodo=nodo)
+            self.generar_sentencia(nodo.children[1])
+            self.emitir("saltar", arg1=etiqueta_inicio)
+            self.emitir("etiqueta", arg1=etiqueta_fin)
+        elif tipo == NodeType.DO:
+            etiqueta_inicio = self.nueva_etiqueta()
+            self.emitir("etiqueta", arg1=etiqueta_inicio)
+            self.generar_sentencia(nodo.children[0])
+            if len(nodo.children) > 1:
+                condicion = self.expresion(nodo.children[1])
+                self.emitir("si_verdadero", arg1=condicion, arg2=etiqueta_inicio, nodo=nodo.children[1])
+        else:
+            self.error(f"Sentencia '{nodo.name}' no soportada", nodo)
+
+    def expresion(self, nodo, destino=None):
+        """Genera el código de la expresión y devuelve el operando con su valor"""
+        if nodo is None:
+            return 0
+        tipo = nodo.node_type
+        hijos = nodo.children
+        if tipo == NodeType.FACTOR:
+            return valor_literal(nodo)
+        if tipo == NodeType.IDENTIFICADOR:
+            self.tipo_variable(nodo)
+            return nodo.name
+        if tipo == NodeType.CADENA:
+            self.error("Las cadenas solo pueden usarse con 'cout'", nodo)
+            return 0
+        if tipo in (NodeType.INCREMENTO, NodeType.DECREMENTO):
+            operando = self.expresion(hijos[0] if hijos else None)
+            resultado = destino or self.nuevo_temporal()
+            self.emitir("+" if tipo == NodeType.INCREMENTO else "-", resultado, operando, 1, nodo)
+            return resultado
+        if tipo == NodeType.LOGICO and len(hijos) == 1 and nodo.name == "!":
+            operando = self.expresion(hijos[0])
+            resultado = destino or self.nuevo_temporal()
+            self.emitir("!", resultado, operando, nodo=nodo)
+            return resultado
+        if len(hijos) != 2 or nodo.name not in OPERADORES_BINARIOS:
+            self.error(f"Operador '{nodo.name}' incompleto o no soportado", nodo)
+            return 0
+        izquierda = self.expresion(hijos[0])
+        derecha = self.expresion(hijos[1])
+        resultado = destino or self.nuevo_temporal()
+        self.emitir(nodo.name, resultado, izquierda, derecha, nodo)
+        return resultado
+
+
+def generar_intermedio(ast):
+    return GeneradorIntermedio(ast).generar()
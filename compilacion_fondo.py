@@ -0,0 +1,150 @@
+# compilacion_fondo.py
+
+import multiprocessing
+import pickle
+import queue
+import sys
+import time
+
+from arbol_sintaxis import aplanar_arbol
+from ejecucion import ErrorCompilacion
+from tabla_virtual import filas_lexico
+from unidad_compilacion import UnidadCompilacion, empaquetar, desempaquetar
+
+# Fases en el orden en que se ejecutan con "all", y cómo se anuncian en la barra de estado
+FASES = ("lexico", "sintactico", "semantico", "intermedio")
+NOMBRES_FASES = {
+    "lexico": "Análisis léxico",
+    "sintactico": "Análisis sintáctico",
+    "semantico": "Análisis semántico",
+    "intermedio": "Código intermedio",
+}
+# Cada cuántos milisegundos el IDE mira si el trabajo avanzó
+PERIODO_PROGRESO = 50
+
+
+def fase_lexica(unidad):
+    tokens, errores = unidad.lexico()
+    return {"tokens": filas_lexico(tokens), "simbolos": unidad.simbolos(), "errores": errores}
+
+
+def fase_sintactica(unidad):
+    """El AST va aplanado (ver aplanar_arbol): como objetos, uno profundo no se serializa"""
+    ast, errores = unidad.sintaxis()
+    return {"ast": aplanar_arbol(ast), "errores": errores}
+
+
+def fase_semantica(unidad):
+    """Texto de la pestaña semántica: tipo de cada expresión y promociones implícitas"""
+    try:
+        analisis = unidad.tipos()
+    except ErrorCompilacion as e:
+        return "No se pudo inferir tipos:\n\n" + "\n".join(e.errores) + "\n"
+    lineas = [f"{'Expresión':<20}{'Tipo':<10}{'Línea':<10}{'Columna':<10}", "-" * 50]
+    for nodo, tipo in sorted(analisis.expresiones, key=lambda par: (par[0].line or 0, par[0].column or 0)):
+        lineas.append(f"{nodo.name:<20}{tipo or 'dinámico':<10}{nodo.line:<10}{nodo.column:<10}")
+    lineas.append("\nPromociones implícitas:\n")
+    lineas.extend(analisis.promociones or ["Ninguna."])
+    return "\n".join(lineas) + "\n"
+
+
+def fase_intermedia(unidad):
+    try:
+        optimizado, estadisticas = unidad.intermedio()
+    except ErrorCompilacion as e:
+        return "No se generó código intermedio:\n\n" + "\n".join(e.errores) + "\n"
+    return f"{optimizado}\n\n" + "".join(f"; {nombre}: {cantidad}\n" for nombre, cantidad in estadisticas.items())
+
+
+FUNCIONES_FASES = {
+    "lexico": fase_lexica,
+    "sintactico": fase_sintactica,
+    "semantico": fase_semantica,
+    "intermedio": fase_intermedia,
+}
+
+
+def compilar(unidad, fase, avisar=None):
+    """Ejecuta la fase pedida ("all" para todas) sobre la unidad y devuelve {fase: resultado}.
+
+    avisar(fase) se llama antes de empezar cada una.
+    """
+    resultados = {}
+    for nombre in FASES if fase == "all" else (fase,):
+        if avisar:
+            avisar(nombre)
+        resultados[nombre] = FUNCIONES_FASES[nombre](unidad)
+    return resultados
+
+
+def _trabajar(unidad, fase, cola):
+    # Corre en el proceso hijo: todo lo que el IDE necesita saber llega por la cola
+    previos = set(unidad.artefactos)
+    try:
+        resultados = compilar(unidad, fase, lambda nombre: cola.put(("fase", nombre)))
+        # Se serializa aquí y no en el hilo de la cola, que descartaría el error sin avisar
+        datos = pickle.dumps(resultados, pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        cola.put(("error", f"{type(e).__name__}: {e}"))
+    else:
+        # Se devuelve también lo que el IDE aún no tenía, para no calcularlo otra vez
+        nuevos = empaquetar({nombre: valor for nombre, valor in unidad.artefactos.items() if nombre not in previos})
+        cola.put(("listo", (datos, nuevos)))
+
+
+class TrabajoCompilacion:
+    """Una compilación en otro proceso, que se puede consultar sin bloquear y cancelar.
+
+    Se usa un proceso propio y no un ProcessPoolExecutor porque cancelar tiene que
+    detener también una fase que ya empezó.
+    """
+
+    def __init__(self, unidad, fase):
+        self.cola = multiprocessing.Queue()
+        self.proceso = multiprocessing.Process(target=_trabajar, args=(unidad, fase, self.cola), daemon=True)
+        self.proceso.start()
+        self.terminado = False
+
+    def mensajes(self):
+        """Mensajes llegados desde la última consulta: ("fase", nombre), ("error", texto) o
+        ("listo", (resultados, artefactos nuevos de la unidad)).
+
+        Si el proceso murió sin avisar se informa como error.
+        """
+        recibidos = []
+        while not self.terminado:
+            try:
+                mensaje = self.cola.get_nowait()
+            except queue.Empty:
+                if not self.proceso.is_alive() and self.cola.empty():
+                    recibidos.append(("error", f"El proceso de compilación terminó con código {self.proceso.exitcode}"))
+                    self.terminado = True
+                break
+            if mensaje[0] == "listo":
+                datos, nuevos = mensaje[1]
+                mensaje = ("listo", (pickle.loads(datos), desempaquetar(nuevos)))
+            recibidos.append(mensaje)
+            if mensaje[0] != "fase":
+                self.terminado = True
+        if self.terminado:
+            self.proceso.join(timeout=1)
+        return recibidos
+
+    def cancelar(self):
+        if not self.terminado:
+            self.terminado = True
+            self.proceso.terminate()
+            self.proceso.join(timeout=1)
+
+
+if __name__ == '__main__':
+    # python compilacion_fondo.py programa [fase]: lo que tarda cada fase fuera del IDE
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        fuente_programa = f.read()
+    fase_pedida = sys.argv[2] if len(sys.argv) > 2 else "all"
+    # Una sola unidad: cada fase mide solo lo que no calcularon las anteriores
+    unidad_programa = UnidadCompilacion(fuente_programa)
+    for nombre_fase in FASES if fase_pedida == "all" else (fase_pedida,):
+        inicio = time.perf_counter()
+        compilar(unidad_programa, nombre_fase)
+        print(f"{NOMBRES_FASES[nombre_fase]:<22}{(time.perf_counter() - inicio) * 1000:>10.1f} ms")
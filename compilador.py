@@ -1,14 +1,31 @@
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import tkinter as tk
-from tkinter import ttk, scrolledtext, filedialog, messagebox, Menu
+from tkinter import ttk, scrolledtext, filedialog, messagebox, simpledialog, Menu
 import re
 
 # Importamos las clases para el analizador léxico
 from lexico import TokenType, Token, LexicalAnalyzer
 
-from sintactico import Parser
 from arbol_sintaxis import ASTNode
-
+from ejecucion import ErrorCompilacion, ErrorEjecucion
+from entrada_salida import SalidaBuffer, TAMANO_BLOQUE_IDE
+from perfilador import perfilar as perfilar_programa, NIVELES_CALOR
+from resaltado import RETARDO_RESALTADO, PERIODO_REVISION, analizar_para_resaltar, etiqueta_token, \
+    lineas_cambiadas, recortar_regiones, regiones_por_prioridad, restar_region
+from tabla_virtual import TablaVirtual
+from compilacion_fondo import NOMBRES_FASES, PERIODO_PROGRESO, TrabajoCompilacion
+from unidad_compilacion import UnidadCompilacion, clave_texto
+from archivos import bloques_de_texto, guardar_atomico, leer_texto
+from esquema import IndiceEsquema, bloques_para
+import transpilador
+
+# Fondo de las líneas en el mapa de calor, de la más fría a la más caliente
+COLORES_CALOR = ["#FFF8E1", "#FFE0B2", "#FFB74D", "#FF8A65", "#E57373"]
+# Hijos que se insertan en el árbol sintáctico cada vez que se abre un nodo
+HIJOS_POR_PAGINA = 500
+# COMPILADOR_DEPURAR_AST=1 vuelve a imprimir el AST completo en la consola
+DEPURAR_AST = os.environ.get("COMPILADOR_DEPURAR_AST", "") == "1"
 
 
 class CompiladorIDE:
@@ -58,6 +75,42 @@ class CompiladorIDE:
         # Colores específicos para estado
         self.estilo.configure('Status.TLabel', background='#e6e6e6', foreground='#333333', font=('Segoe UI', 9))
 
+        # Resaltado en segundo plano: cada cambio del texto sube la versión y solo se
+        # aplica el resultado de un análisis hecho sobre la versión vigente
+        self.version_texto = 0
+        self.version_resaltada = None
+        self.resaltado_pendiente = None     # after() que lanzará el próximo análisis
+        self.trabajo_resaltado = None       # (versión, futuro) del análisis en curso
+        self.ejecutor_resaltado = None
+        # Del último análisis se etiqueta primero lo visible y el resto por regiones en
+        # los momentos ociosos; mapa_resaltado es None si el editor no lo refleja completo
+        self.mapa_resaltado = None
+        self.regiones_pendientes = []
+        self.turno_resaltado = None         # after_idle() que etiqueta la próxima región
+        self.prioridad_pendiente = None     # after_idle() que adelanta lo que quedó visible
+        # Compilación en otro proceso: el trabajo en curso y la fase que se pidió
+        self.trabajo_compilacion = None
+        self.fase_en_curso = None
+        self.unidad_compilada = None
+        # Tokens, AST, etc. del texto en la versión version_unidad; el resaltado y las
+        # fases la comparten para no calcular dos veces lo mismo
+        self.unidad = None
+        self.version_unidad = None
+        # (archivo, clave del texto) de lo último guardado o abierto: si no cambió no se
+        # vuelve a escribir. Las escrituras van de a una en un hilo aparte
+        self.ultimo_guardado = None
+        self.ejecutor_guardado = ThreadPoolExecutor(max_workers=1)
+        self.carga_en_curso = 0             # sube con cada apertura: una carga vieja se detiene
+        # (archivo, clave, codificación) del archivo que se está insertando por bloques;
+        # hasta que termine, guardar, compilar y ejecutar esperan en acciones_tras_carga
+        self.archivo_cargando = None
+        self.acciones_tras_carga = []
+        self.codificacion_archivo = "utf-8"  # la del archivo abierto, para guardarlo igual
+        # Bloques if/while/do del último análisis, corridos con cada edición hasta el próximo
+        self.esquema = IndiceEsquema()
+        self.trabajo_esquema = None         # futuro que calcula los bloques en segundo plano
+        self.bloques_esquema = {}           # {ítem del árbol de esquema: Bloque}
+
         self.configurar_interfaz()
 
     def configurar_interfaz(self):
@@ -83,6 +136,8 @@ class CompiladorIDE:
         menuCompilador.add_command(label="Análisis Semántico", command=lambda: self.fase_compilacion("semantico"))
         menuCompilador.add_command(label="Código Intermedio", command=lambda: self.fase_compilacion("intermedio"))
         menuCompilador.add_command(label="Ejecutar", command=self.ejecutar_codigo)
+        menuCompilador.add_command(label="Ejecutar con perfil", command=lambda: self.ejecutar_codigo(perfilar=True))
+        menuCompilador.add_command(label="Quitar mapa de calor", command=self.quitar_mapa_calor)
 
         # Menú Ayuda
         menuAyuda = tk.Menu(self.barraMenu, tearoff=0)
@@ -109,6 +164,11 @@ class CompiladorIDE:
         self.file_info = ttk.Label(status_frame, text="No guardado")
         self.file_info.pack(side=tk.LEFT, padx=5)
 
+        ttk.Separator(status_frame, orient='vertical').pack(side=tk.LEFT, fill='y', padx=5)
+
+        self.status_compilacion = ttk.Label(status_frame, text="")
+        self.status_compilacion.pack(side=tk.LEFT, padx=5)
+
         # Frame principal con tres paneles
         self.framePrincipal = ttk.PanedWindow(self.root, orient=tk.HORIZONTAL)
         self.framePrincipal.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
@@ -139,6 +199,9 @@ class CompiladorIDE:
         ttk.Button(barraHerramientas, text="Guardar", command=self.archivo_guardar).pack(side="left", padx=2)
         ttk.Button(barraHerramientas, text="Guardar como", command=self.archivo_guardar_como).pack(side="left", padx=2)
         ttk.Button(barraHerramientas, text="Compilar", command=lambda: self.fase_compilacion("all")).pack(side="left", padx=2)
+        self.botonCancelar = ttk.Button(barraHerramientas, text="Cancelar", command=self.cancelar_compilacion,
+                                        state='disabled')
+        self.botonCancelar.pack(side="left", padx=2)
 
         # Frame para el editor y números de línea
         frameEditor = ttk.Frame(self.frameIzquierdo)
@@ -148,30 +211,48 @@ class CompiladorIDE:
         self.numerosLinea = tk.Text(frameEditor, width=4, padx=3, takefocus=0, border=0,
                                   background='lightgray', state='disabled')
         self.numerosLinea.pack(side=tk.LEFT, fill=tk.Y)
+        self.lineas_numeradas = 0           # cuántos números tiene ya el margen
+        # En el margen, los números de las líneas donde empieza un bloque plegable se pueden
+        # pulsar para plegarlo; las líneas plegadas se ocultan en el margen y en el editor
+        self.numerosLinea.tag_configure("plegable", foreground="#1565C0", underline=True)
+        self.numerosLinea.tag_configure("cabecera_plegada", background="#BBDEFB")
+        self.numerosLinea.tag_configure("plegado", elide=True)
+        self.numerosLinea.bind('<Button-1>', self.on_click_margen)
 
         # Crear un frame contenedor para el editor y su scrollbar
         frameContenedorEditor = ttk.Frame(frameEditor)
         frameContenedorEditor.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
 
         # Configurar el scrollbar del editor para sincronizar con los números de línea
-        scrollbar = ttk.Scrollbar(frameContenedorEditor)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.scrollbarEditor = ttk.Scrollbar(frameContenedorEditor)
+        self.scrollbarEditor.pack(side=tk.RIGHT, fill=tk.Y)
 
         # Editor con scrollbar
-        self.editor = scrolledtext.ScrolledText(frameContenedorEditor, wrap=tk.WORD, undo=True, yscrollcommand=scrollbar.set)
+        self.editor = scrolledtext.ScrolledText(frameContenedorEditor, wrap=tk.WORD, undo=True,
+                                                yscrollcommand=self.on_editor_yscroll)
         self.editor.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
         
         # Conectar el scrollbar con el editor y números de línea
-        scrollbar.config(command=self.on_scroll_both)
+        self.scrollbarEditor.config(command=self.on_scroll_both)
         
         # Configurar eventos para actualizar números de línea y resaltado de sintaxis
         self.editor.bind('<Key>', self.on_key_press)
         self.editor.bind('<KeyRelease>', self.on_key_release)
+        self.editor.bind('<<Modified>>', self.on_text_modified)
         self.editor.bind('<Button-1>', self.update_status_bar)
         self.editor.bind('<MouseWheel>', self.sincronizar_scroll)  # Para Windows
         self.editor.bind('<Button-4>', self.sincronizar_scroll)  # Para Linux (scroll up)
         self.editor.bind('<Button-5>', self.sincronizar_scroll)  # Para Linux (scroll down)
 
+        self.editor.tag_configure("plegado", elide=True)
+        for tipo, color in self.token_colors.items():
+            self.editor.tag_configure(etiqueta_token(tipo), foreground=color)
+
+        # Mapa de calor del perfilador: fondo de cada línea según el tiempo que consumió
+        self.mapa_calor_visible = False
+        for nivel, color in enumerate(COLORES_CALOR):
+            self.editor.tag_configure(f"calor{nivel}", background=color)
+
         # Panel de análisis (pestañas)
         self.pestanasAnalisis = ttk.Notebook(self.frameAnalisis)
         self.pestanasAnalisis.pack(fill=tk.BOTH, expand=True)
@@ -188,6 +269,11 @@ class CompiladorIDE:
         self.tabSintactico.column("Tipo", width=100, anchor="center")
         self.tabSintactico.column("Línea", width=60, anchor="center")
         self.tabSintactico.column("Columna", width=80, anchor="center")
+        # AST aplanado de la última compilación (ver aplanar_arbol); los hijos de un nodo
+        # se insertan al abrirlo: {marcador: (posición del primero pendiente, cuántos faltan)}
+        self.arbol_sintactico = []
+        self.hijos_pendientes = {}
+        self.tabSintactico.bind('<<TreeviewOpen>>', self.on_treeview_open)
 
 
 
@@ -196,10 +282,12 @@ class CompiladorIDE:
         self.tabSintactico.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scroll_sintactico.pack(side=tk.RIGHT, fill=tk.Y)
 
-        self.tabLexico = scrolledtext.ScrolledText(self.pestanasAnalisis, wrap=tk.WORD)
+        self.tabLexico = TablaVirtual(self.pestanasAnalisis, ("Tipo", "Valor", "Línea", "Columna"),
+                                      anchos=(140, 160, 60, 70))
         self.tabSemantico = scrolledtext.ScrolledText(self.pestanasAnalisis, wrap=tk.WORD)
         self.tabIntermedio = scrolledtext.ScrolledText(self.pestanasAnalisis, wrap=tk.WORD)
-        self.tabTablaSimbolos = scrolledtext.ScrolledText(self.pestanasAnalisis, wrap=tk.WORD)
+        self.tabTablaSimbolos = TablaVirtual(self.pestanasAnalisis, ("Identificador", "Tipo", "Línea", "Columna"),
+                                             anchos=(160, 120, 60, 70))
 
         self.pestanasAnalisis.add(self.tabLexico, text="Análisis Léxico")
         self.pestanasAnalisis.add(self.tabSintactico, text="Análisis Sintáctico")
@@ -207,6 +295,14 @@ class CompiladorIDE:
         self.pestanasAnalisis.add(self.tabIntermedio, text="Código Intermedio")
         self.pestanasAnalisis.add(self.tabTablaSimbolos, text="Tabla de Símbolos")
 
+        # Esquema: los bloques del programa; al elegir uno el editor va a su línea
+        self.tabEsquema = ttk.Treeview(self.pestanasAnalisis, columns=("Línea",), show='tree headings')
+        self.tabEsquema.heading("#0", text="Bloque")
+        self.tabEsquema.heading("Línea", text="Línea")
+        self.tabEsquema.column("Línea", width=60, anchor="center")
+        self.tabEsquema.bind('<<TreeviewSelect>>', self.on_esquema_select)
+        self.pestanasAnalisis.add(self.tabEsquema, text="Esquema")
+
         # Panel de errores y salida (pestañas)
         self.pestanasErroresSalida = ttk.Notebook(self.frameErroresSalida)
         self.pestanasErroresSalida.pack(fill=tk.BOTH, expand=True)
@@ -225,12 +321,69 @@ class CompiladorIDE:
 
     def on_key_press(self, event=None):
         self.actualizar_numeros_linea()
+        if self.mapa_calor_visible:
+            # Al editar, las líneas medidas dejan de corresponder con el texto
+            self.quitar_mapa_calor()
         return True
     
     def on_key_release(self, event=None):
         self.update_status_bar()
-        self.highlight_syntax()
         return True
+
+    def on_text_modified(self, event=None):
+        # <<Modified>> solo vuelve a generarse si se baja la marca de modificado
+        if not self.editor.edit_modified():
+            return
+        self.editor.edit_modified(False)
+        self.version_texto += 1
+        lineas_antes = self.lineas_numeradas
+        self.actualizar_numeros_linea()
+        self.marcar_editadas(self.lineas_numeradas - lineas_antes)
+        # Las regiones pendientes se calcularon para el texto anterior; si quedaban, el
+        # editor no tiene todas las etiquetas del último análisis y no sirve para comparar
+        if self.regiones_pendientes:
+            self.regiones_pendientes = []
+            self.mapa_resaltado = None
+        self.programar_resaltado()
+
+    def marcar_editadas(self, delta):
+        """Extiende hasta las líneas de la última edición la región editada desde el último
+        resaltado. Son dos marcas, así el widget las corre con el texto."""
+        cursor = int(self.editor.index(tk.INSERT).split('.')[0])
+        inicio, fin = f"{max(1, cursor - max(delta, 0))}.0", f"{cursor}.end"
+        if "editado_inicio" not in self.editor.mark_names():
+            self.editor.mark_set("editado_inicio", inicio)
+            self.editor.mark_gravity("editado_inicio", tk.LEFT)
+            self.editor.mark_set("editado_fin", fin)
+            return
+        if self.editor.compare(inicio, '<', "editado_inicio"):
+            self.editor.mark_set("editado_inicio", inicio)
+        if self.editor.compare(fin, '>', "editado_fin"):
+            self.editor.mark_set("editado_fin", fin)
+
+    def lineas_editadas(self):
+        """Líneas [primera, ultima) editadas desde el último resaltado, o None; las olvida"""
+        if "editado_inicio" not in self.editor.mark_names():
+            return None
+        primera = int(self.editor.index("editado_inicio").split('.')[0])
+        ultima = int(self.editor.index("editado_fin").split('.')[0]) + 1
+        self.editor.mark_unset("editado_inicio", "editado_fin")
+        return primera, ultima
+
+    def unidad_actual(self):
+        """La UnidadCompilacion del texto tal como está ahora"""
+        if self.unidad is None or self.version_unidad != self.version_texto:
+            texto = self.editor.get('1.0', 'end-1c')
+            if self.unidad is None or self.unidad.texto != texto:
+                self.unidad = UnidadCompilacion(texto)
+            self.version_unidad = self.version_texto
+        return self.unidad
+
+    def programar_resaltado(self):
+        """Resalta cuando pasan RETARDO_RESALTADO ms sin cambios, no en cada tecla"""
+        if self.resaltado_pendiente is not None:
+            self.root.after_cancel(self.resaltado_pendiente)
+        self.resaltado_pendiente = self.root.after(RETARDO_RESALTADO, self.highlight_syntax)
     
     def imprimir_arbol_tabla(self, nodo, nivel=0, filas=None):
         if filas is None:
@@ -254,10 +407,7 @@ class CompiladorIDE:
         self.status_position.config(text=f"Línea: {line}, Columna: {int(column) + 1}")
     
         # Actualizar contador de líneas
-        lines = self.editor.get('1.0', tk.END).count('\n')
-        if lines < 1:
-            lines = 1
-        self.line_count_label.config(text=f"Total líneas: {lines}")
+        self.line_count_label.config(text=f"Total líneas: {self.total_lineas()}")
     
         # Actualizar información del archivo
         if self.nombreArchivo:
@@ -295,20 +445,30 @@ class CompiladorIDE:
         
         return "break"  # Prevent default behavior
 
+    def total_lineas(self):
+        # El índice del final ya trae el número de líneas, sin copiar el texto
+        return int(self.editor.index('end-1c').split('.')[0])
+
     def actualizar_numeros_linea(self, event=None):
-        # Obtener el número total de líneas
-        contenido = self.editor.get('1.0', 'end-1c')
-        lineas = contenido.count('\n') + 1
-        
-        # Generar texto con números de línea
-        texto_numeros = '\n'.join(str(i) for i in range(1, lineas + 1))
-        
-        # Actualizar el widget de números de línea
-        self.numerosLinea.config(state='normal')
-        self.numerosLinea.delete('1.0', tk.END)
-        self.numerosLinea.insert('1.0', texto_numeros)
-        self.numerosLinea.config(state='disabled')
-        
+        """Agrega o quita solo los números de las líneas que cambiaron desde la última vez"""
+        lineas = self.total_lineas()
+        if lineas != self.lineas_numeradas:
+            self.numerosLinea.config(state='normal')
+            if lineas > self.lineas_numeradas:
+                nuevos = ''.join(f"\n{i}" for i in range(self.lineas_numeradas + 1, lineas + 1))
+                self.numerosLinea.insert('end-1c', nuevos[1:] if self.lineas_numeradas == 0 else nuevos)
+            else:
+                self.numerosLinea.delete(f"{lineas}.end", 'end-1c')
+            self.numerosLinea.config(state='disabled')
+            # La edición terminó en el cursor: si agregó líneas, empezó esas líneas más arriba
+            delta = lineas - self.lineas_numeradas
+            cursor = int(self.editor.index(tk.INSERT).split('.')[0])
+            editada = cursor - max(delta, 0)
+            self.esquema.desplazar(editada, delta)
+            self.lineas_numeradas = lineas
+            # Lo de más arriba no se movió: solo se rehacen las marcas desde la línea editada
+            self.marcar_plegado(editada)
+
         # Sincronizar el scroll
         self.on_scroll('moveto', self.editor.yview()[0])
     
@@ -325,8 +485,12 @@ class CompiladorIDE:
         self.numerosLinea.yview(*args)
 
     def archivo_nuevo(self):
+        self.carga_en_curso += 1
+        self.archivo_cargando = None
+        self.acciones_tras_carga = []
         self.editor.delete('1.0', tk.END)
         self.nombreArchivo = None
+        self.codificacion_archivo = "utf-8"
         self.actualizar_numeros_linea()
         self.update_status_bar()
 
@@ -336,35 +500,84 @@ class CompiladorIDE:
             filetypes=[("Archivos de texto", "*.txt"), ("Todos los archivos", "*.*")]
         )
         if archivo:
-            self.nombreArchivo = archivo
-            self.editor.delete('1.0', tk.END)
             try:
-                with open(archivo, 'r', encoding='utf-8') as f:
-                    self.editor.insert('1.0', f.read())
-            except UnicodeDecodeError:
-                # Intentar con otra codificación si utf-8 falla
-                with open(archivo, 'r', encoding='latin-1') as f:
-                    self.editor.insert('1.0', f.read())
-            self.actualizar_numeros_linea()
-            self.highlight_syntax()
-            self.update_status_bar()
+                # Se lee una sola vez; la codificación se decide sobre esos mismos bytes
+                texto, codificacion = leer_texto(archivo)
+            except OSError as e:
+                messagebox.showerror("Error", f"No se pudo abrir el archivo: {str(e)}")
+                return
+            # Mientras el editor tenga solo una parte, no hay archivo al que guardarla
+            self.nombreArchivo = None
+            self.archivo_cargando = (archivo, clave_texto(texto), codificacion)
+            self.acciones_tras_carga = []
+            self.editor.delete('1.0', tk.END)
+            self.carga_en_curso += 1
+            self.cargar_bloques(self.carga_en_curso, bloques_de_texto(texto), 0, len(texto))
             self.root.title(f"Compilador IDE - {os.path.basename(archivo)}")
 
+    def cargar_bloques(self, carga, bloques, cargado, total):
+        """Inserta un bloque del archivo abierto por turno, mostrando el avance"""
+        if carga != self.carga_en_curso:
+            return
+        bloque = next(bloques, None)
+        if bloque is not None:
+            self.editor.insert('end-1c', bloque)
+            cargado += len(bloque)
+            self.status_compilacion.config(text=f"Abriendo... {cargado * 100 // max(total, 1)}%")
+            self.root.after_idle(self.cargar_bloques, carga, bloques, cargado, total)
+            return
+        # Abrir un archivo no se deshace
+        self.editor.edit_reset()
+        self.editor.mark_set(tk.INSERT, '1.0')
+        self.status_compilacion.config(text="")
+        archivo, clave, self.codificacion_archivo = self.archivo_cargando
+        self.nombreArchivo = archivo
+        self.ultimo_guardado = (archivo, clave)
+        self.archivo_cargando = None
+        self.actualizar_numeros_linea()
+        self.update_status_bar()
+        acciones, self.acciones_tras_carga = self.acciones_tras_carga, []
+        for accion in acciones:
+            accion()
+
+    def esperar_carga(self, accion):
+        """Si todavía se está abriendo un archivo, deja la acción para cuando termine"""
+        if self.archivo_cargando is None:
+            return False
+        self.acciones_tras_carga.append(accion)
+        self.status_compilacion.config(text="Se hará al terminar de abrir el archivo...")
+        return True
+
     def archivo_guardar(self):
+        """Guarda en segundo plano si el texto cambió desde lo último guardado o abierto"""
+        if self.esperar_carga(self.archivo_guardar):
+            return False
         if not self.nombreArchivo:
             return self.archivo_guardar_como()
 
-        try:
-            content = self.editor.get('1.0', 'end-1c')
-            with open(self.nombreArchivo, 'w', encoding='utf-8') as f:
-                f.write(content)
-            self.root.title(f"Compilador IDE - {os.path.basename(self.nombreArchivo)}")
-            return True
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudo guardar el archivo: {str(e)}")
-            return False 
+        unidad = self.unidad_actual()
+        guardado = (self.nombreArchivo, unidad.clave)
+        if guardado != self.ultimo_guardado:
+            futuro = self.ejecutor_guardado.submit(guardar_atomico, self.nombreArchivo, unidad.texto,
+                                                   self.codificacion_archivo)
+            self.root.after(PERIODO_PROGRESO, self.revisar_guardado, futuro, guardado)
+            self.ultimo_guardado = guardado
+        self.root.title(f"Compilador IDE - {os.path.basename(self.nombreArchivo)}")
+        return True
+
+    def revisar_guardado(self, futuro, guardado):
+        if not futuro.done():
+            self.root.after(PERIODO_PROGRESO, self.revisar_guardado, futuro, guardado)
+            return
+        if futuro.exception() is not None:
+            if self.ultimo_guardado == guardado:
+                # Que el próximo guardado lo intente otra vez
+                self.ultimo_guardado = None
+            messagebox.showerror("Error", f"No se pudo guardar el archivo: {str(futuro.exception())}")
 
     def archivo_guardar_como(self):
+        if self.esperar_carga(self.archivo_guardar_como):
+            return False
         archivo = filedialog.asksaveasfilename(
             defaultextension=".txt",
             filetypes=[("Archivos de texto", "*.txt"), ("Todos los archivos", "*.*")]
@@ -377,168 +590,340 @@ class CompiladorIDE:
 
 
     def highlight_syntax(self):
-        for tag in self.editor.tag_names():
-            if tag != "sel":
-                self.editor.tag_remove(tag, "1.0", tk.END)
-
-        code = self.editor.get(1.0, tk.END)
-        tokens, _ = self.analizador_lexico.analyze(code)
-
-        for token in tokens:
-            if not token.value.strip():
-                continue
-
-            try:
-                start_line = token.line
-                start_col = token.column - 1
-                start_pos = f"{start_line}.{start_col}"
-
-                lines = token.value.split('\n')
-                if len(lines) == 1:
-                    end_line = start_line
-                    end_col = start_col + len(token.value)
-                else:
-                    end_line = start_line + len(lines) - 1
-                    end_col = len(lines[-1])
-
-                end_pos = f"{end_line}.{end_col}"
-
-                tag_name = f"tag_{token.type.name}"
-                if tag_name not in self.editor.tag_names():
-                    self.editor.tag_configure(tag_name, foreground=self.token_colors[token.type])
-
-                self.editor.tag_add(tag_name, start_pos, end_pos)
-
-            except Exception:
-                continue  # Ignora errores de tokens mal posicionados
-
+        """Lanza el análisis léxico del texto actual en otro proceso; revisar_resaltado aplica el resultado"""
+        self.resaltado_pendiente = None
+        version = self.version_texto
+        if version == self.version_resaltada:
+            return
+        if self.trabajo_resaltado is not None:
+            version_trabajo, futuro = self.trabajo_resaltado
+            if version_trabajo == version:
+                return
+            # El análisis de un texto viejo ya no sirve: si todavía no empezó, no se ejecuta
+            futuro.cancel()
+        if self.ejecutor_resaltado is None:
+            self.ejecutor_resaltado = ProcessPoolExecutor(max_workers=1)
+        unidad = self.unidad_actual()
+        futuro = self.ejecutor_resaltado.submit(analizar_para_resaltar, unidad.texto)
+        self.trabajo_resaltado = (version, futuro)
+        self.root.after(PERIODO_REVISION, self.revisar_resaltado, futuro)
+
+    def revisar_resaltado(self, futuro):
+        if self.trabajo_resaltado is None or self.trabajo_resaltado[1] is not futuro:
+            return      # lo reemplazó un análisis más nuevo
+        if not futuro.done():
+            self.root.after(PERIODO_REVISION, self.revisar_resaltado, futuro)
+            return
+        version, _ = self.trabajo_resaltado
+        self.trabajo_resaltado = None
+        if futuro.cancelled():
+            return
+        if futuro.exception() is not None:
+            # Si el proceso murió se crea otro en el próximo cambio
+            self.ejecutor_resaltado.shutdown(wait=False)
+            self.ejecutor_resaltado = None
+            return
+        if version == self.version_texto:
+            mapa, lexico = futuro.result()
+            # Los tokens quedan para las fases: compilar este texto ya no lo vuelve a analizar
+            self.unidad_actual().incorporar({"lexico": lexico})
+            self.aplicar_resaltado(mapa)
+            self.version_resaltada = version
+            # El mismo proceso ya tiene los tokens de este texto: solo falta el parser
+            futuro_esquema = self.ejecutor_resaltado.submit(bloques_para, self.unidad_actual().texto)
+            self.trabajo_esquema = futuro_esquema
+            self.root.after(PERIODO_REVISION, self.revisar_esquema, futuro_esquema, version)
+
+    def revisar_esquema(self, futuro, version):
+        if futuro is not self.trabajo_esquema:
+            return
+        if not futuro.done():
+            self.root.after(PERIODO_REVISION, self.revisar_esquema, futuro, version)
+            return
+        self.trabajo_esquema = None
+        if futuro.cancelled() or futuro.exception() is not None or version != self.version_texto:
+            return
+        self.unidad_actual().incorporar({"bloques": futuro.result()})
+        self.actualizar_esquema(futuro.result())
+
+    def aplicar_resaltado(self, mapa):
+        """Etiqueta ya las líneas visibles; el resto queda para los momentos ociosos.
+
+        Si el editor tiene las etiquetas del análisis anterior, solo se tocan las líneas
+        cuyos tramos cambiaron respecto de él y las que se editaron: reescribir un token
+        con el mismo texto deja caracteres sin etiqueta aunque los tramos no cambien.
+        """
+        anterior, self.mapa_resaltado = self.mapa_resaltado, mapa
+        editadas = self.lineas_editadas()
+        total = int(self.editor.index('end-1c').split('.')[0])
+        primera, ultima = self.lineas_visibles()
+        regiones = regiones_por_prioridad(total, primera, ultima)
+        if anterior is not None:
+            cambiadas = lineas_cambiadas(anterior, mapa)
+            if editadas:
+                cambiadas = (min(cambiadas[0], editadas[0]), max(cambiadas[1], editadas[1])) if cambiadas else editadas
+            regiones = recortar_regiones(regiones, *cambiadas) if cambiadas else []
+        # Lo plegado no se ve: se etiqueta cuando se despliegue
+        for primera_plegada, ultima_plegada in self.lineas_plegadas():
+            regiones = restar_region(regiones, primera_plegada, ultima_plegada)
+        self.regiones_pendientes = regiones
+        if self.regiones_pendientes:
+            self.resaltar_region(*self.regiones_pendientes.pop(0))
+        self.programar_turno_resaltado()
+
+    def lineas_visibles(self):
+        primera = int(self.editor.index('@0,0').split('.')[0])
+        ultima = int(self.editor.index(f'@0,{self.editor.winfo_height()}').split('.')[0])
+        return primera, ultima
+
+    def resaltar_region(self, primera, ultima):
+        """Vuelve a etiquetar las líneas [primera, ultima) con el último análisis"""
+        inicio, fin = f"{primera}.0", f"{ultima}.0"
+        for tipo in self.token_colors:
+            self.editor.tag_remove(etiqueta_token(tipo), inicio, fin)
+        for etiqueta, indices in self.mapa_resaltado.en_lineas(primera, ultima).items():
+            self.editor.tag_add(etiqueta, *indices)
+
+    def programar_turno_resaltado(self):
+        if self.regiones_pendientes and self.turno_resaltado is None:
+            self.turno_resaltado = self.root.after_idle(self.turno_resaltado_ocioso)
+
+    def turno_resaltado_ocioso(self):
+        # Una región por turno: entre una y otra Tk atiende las teclas y el dibujo
+        self.turno_resaltado = None
+        if self.regiones_pendientes:
+            self.resaltar_region(*self.regiones_pendientes.pop(0))
+            self.programar_turno_resaltado()
+
+    def on_editor_yscroll(self, *args):
+        self.scrollbarEditor.set(*args)
+        if self.regiones_pendientes and self.prioridad_pendiente is None:
+            self.prioridad_pendiente = self.root.after_idle(self.priorizar_visible)
+
+    def priorizar_visible(self):
+        """Al desplazarse, lo que quedó a la vista y faltaba etiquetar se hace antes que lo demás"""
+        self.prioridad_pendiente = None
+        primera, ultima = self.lineas_visibles()
+        restantes = restar_region(self.regiones_pendientes, primera, ultima + 1)
+        if restantes != self.regiones_pendientes:
+            self.regiones_pendientes = restantes
+            self.resaltar_region(primera, ultima + 1)
+
+    def lineas_plegadas(self, desde=1):
+        """Regiones [primera, ultima) de líneas ocultas por el plegado que terminan después
+        de la línea desde"""
+        regiones = []
+        rango = self.editor.tag_prevrange("plegado", f"{desde}.0")
+        if not rango or self.editor.compare(rango[1], '<=', f"{desde}.0"):
+            rango = self.editor.tag_nextrange("plegado", f"{desde}.0")
+        while rango:
+            inicio, fin = (int(str(indice).split('.')[0]) for indice in rango)
+            regiones.append((inicio, fin))
+            rango = self.editor.tag_nextrange("plegado", rango[1])
+        return regiones
+
+    def actualizar_esquema(self, bloques):
+        """Cambia el índice por el del último análisis y rehace el árbol de esquema"""
+        self.esquema = IndiceEsquema(bloques)
+        self.marcar_plegado()
+        self.tabEsquema.delete(*self.tabEsquema.get_children())
+        self.bloques_esquema = {}
+
+        def insertar(bloque, padre):
+            item_id = self.tabEsquema.insert(padre, tk.END, text=bloque.nombre, values=(bloque.linea,))
+            self.bloques_esquema[item_id] = bloque
+            for hijo in bloque.hijos:
+                insertar(hijo, item_id)
+
+        for raiz in self.esquema.raices:
+            insertar(raiz, "")
+
+    def marcar_plegado(self, desde=1):
+        """Marca en el margen los bloques plegables y oculta las mismas líneas que el editor.
+
+        Solo se rehacen las marcas de la línea desde en adelante y las de los bloques que
+        empiezan antes y pueden contenerla, que son los únicos de arriba que cambian.
+        """
+        for etiqueta in ("plegable", "cabecera_plegada", "plegado"):
+            self.numerosLinea.tag_remove(etiqueta, f"{desde}.0", tk.END)
+        contenedores = list(self.esquema.contenedores(desde))
+        for bloque in contenedores:
+            self.numerosLinea.tag_remove("plegable", f"{bloque.linea}.0", f"{bloque.linea}.end")
+        bloques = contenedores + self.esquema.bloques[self.esquema.desde(desde):]
+        cabeceras = [indice for bloque in bloques if bloque.plegable()
+                     for indice in (f"{bloque.linea}.0", f"{bloque.linea}.end")]
+        if cabeceras:
+            self.numerosLinea.tag_add("plegable", *cabeceras)
+        for primera, ultima in self.lineas_plegadas(desde):
+            self.numerosLinea.tag_add("plegado", f"{primera}.0", f"{ultima}.0")
+            self.numerosLinea.tag_add("cabecera_plegada", f"{primera - 1}.0", f"{primera - 1}.end")
+
+    def on_click_margen(self, event):
+        linea = int(self.numerosLinea.index(f"@{event.x},{event.y}").split('.')[0])
+        bloque = self.esquema.en_linea(linea)
+        if bloque is not None:
+            self.alternar_plegado(bloque)
+        return "break"
+
+    def alternar_plegado(self, bloque):
+        """Oculta o muestra las líneas entre la primera y la última del bloque"""
+        inicio, fin = f"{bloque.linea + 1}.0", f"{bloque.linea_fin}.0"
+        if "plegado" in self.editor.tag_names(inicio):
+            self.editor.tag_remove("plegado", inicio, fin)
+            if self.mapa_resaltado is not None:
+                # Mientras estuvo plegado no se le actualizó el resaltado
+                self.resaltar_region(bloque.linea + 1, bloque.linea_fin)
+        else:
+            self.editor.tag_add("plegado", inicio, fin)
+            if self.editor.compare(inicio, '<=', tk.INSERT) and self.editor.compare(tk.INSERT, '<', fin):
+                self.editor.mark_set(tk.INSERT, f"{bloque.linea}.end")
+        self.marcar_plegado()
+        self.on_scroll('moveto', self.editor.yview()[0])
 
+    def on_esquema_select(self, event=None):
+        bloque = self.bloques_esquema.get(self.tabEsquema.focus())
+        if bloque is None:
+            return
+        indice = f"{bloque.linea}.{bloque.columna - 1}"
+        # Si quedó dentro de un bloque plegado, se despliega para poder verlo
+        if "plegado" in self.editor.tag_names(indice):
+            for primera, ultima in self.lineas_plegadas():
+                if primera <= bloque.linea < ultima:
+                    self.editor.tag_remove("plegado", f"{primera}.0", f"{ultima}.0")
+                    if self.mapa_resaltado is not None:
+                        self.resaltar_region(primera, ultima)
+            self.marcar_plegado()
+        self.editor.mark_set(tk.INSERT, indice)
+        self.editor.see(indice)
+        self.update_status_bar()
 
-                
     def fase_compilacion(self, fase):
+        """Lanza la compilación en otro proceso; revisar_compilacion muestra el avance"""
+        if self.esperar_carga(lambda: self.fase_compilacion(fase)):
+            return
         if not self.archivo_guardar():
             return
 
         # Limpiar pestaña de errores
         self.tabErrores.delete('1.0', tk.END)
 
-        # Obtener el código
-        code = self.editor.get('1.0', 'end-1c')
-        # === ANÁLISIS LÉXICO ===
-        if fase == "lexico" or fase == "all":
-            tokens, errors = self.analizador_lexico.analyze(code)
-
-            self.tabLexico.delete('1.0', tk.END)
-            self.tabLexico.insert('1.0', f"{'Tipo':<20}{'Valor':<20}{'Línea':<10}{'Columna':<10}\n")
-            self.tabLexico.insert(tk.END, "-" * 60 + "\n")
-
-            for token in tokens:
-                if token.type not in [TokenType.ERROR, TokenType.COMMENT]:
-                    self.tabLexico.insert(
-                        tk.END,
-                        f"{token.type.name:<20}{token.value:<20}{token.line:<10}{token.column:<10}\n"
-                    )
-
-            # Mostrar errores solo si se está en análisis léxico o 'all'
-            if fase == "lexico" or fase == "all":
-                self.tabErrores.delete('1.0', tk.END)  # Limpiar antes de mostrar errores nuevos
-                if errors:
-                    self.tabErrores.insert('1.0', "Errores detectados:\n\n", "error")
-                    for i, error in enumerate(errors, 1):
-                        self.tabErrores.insert(tk.END, f"{i}. {error}\n\n", "error")
-                    self.pestanasErroresSalida.select(0)
-                else:
-                    self.tabErrores.insert('1.0', "No se encontraron errores en el análisis léxico.\n", "info")
+        # Una compilación nueva deja sin sentido la anterior
+        self.cancelar_compilacion()
+        self.fase_en_curso = fase
+        self.unidad_compilada = self.unidad_actual()
+        self.trabajo_compilacion = TrabajoCompilacion(self.unidad_compilada, fase)
+        self.botonCancelar.config(state='normal')
+        self.status_compilacion.config(text="Compilando...")
+        self.root.after(PERIODO_PROGRESO, self.revisar_compilacion, self.trabajo_compilacion)
+
+    def revisar_compilacion(self, trabajo):
+        if trabajo is not self.trabajo_compilacion:
+            return      # se canceló o lo reemplazó otra compilación
+        for tipo, contenido in trabajo.mensajes():
+            if tipo == "fase":
+                self.status_compilacion.config(text=f"{NOMBRES_FASES[contenido]}...")
+            elif tipo == "listo":
+                resultados, artefactos = contenido
+                self.unidad_compilada.incorporar(artefactos)
+                self.terminar_compilacion("Compilación terminada")
+                self.mostrar_compilacion(resultados)
+            else:
+                self.terminar_compilacion("Compilación fallida")
+                self.tabErrores.insert('1.0', f"{contenido}\n", "error")
+                self.pestanasErroresSalida.select(0)
+        if trabajo is self.trabajo_compilacion:
+            self.root.after(PERIODO_PROGRESO, self.revisar_compilacion, trabajo)
+
+    def cancelar_compilacion(self):
+        if self.trabajo_compilacion is not None:
+            self.trabajo_compilacion.cancelar()
+            self.terminar_compilacion("Compilación cancelada")
+
+    def terminar_compilacion(self, estado):
+        self.trabajo_compilacion = None
+        self.botonCancelar.config(state='disabled')
+        self.status_compilacion.config(text=estado)
+
+    def mostrar_compilacion(self, resultados):
+        """Pasa a las pestañas, de una vez, lo que devolvió el proceso de compilación"""
+        fase = self.fase_en_curso
 
-            # === Tabla de Símbolos ===
-            self.tabTablaSimbolos.delete('1.0', tk.END)
-            self.tabTablaSimbolos.insert('1.0', "Tabla de Símbolos:\n\n")
-            self.tabTablaSimbolos.insert(tk.END, f"{'Identificador':<20}{'Tipo':<15}{'Línea':<10}{'Columna':<10}\n")
-            self.tabTablaSimbolos.insert(tk.END, "-" * 55 + "\n")
-
-            unique_identifiers = {}
-            for token in tokens:
-                if token.type == TokenType.IDENTIFIER and token.value not in unique_identifiers:
-                    unique_identifiers[token.value] = token
-
-            for value, token in unique_identifiers.items():
-                self.tabTablaSimbolos.insert(
-                    tk.END, f"{token.value:<20}{'IDENTIFICADOR':<15}{token.line:<10}{token.column:<10}\n"
+        # === ANÁLISIS LÉXICO ===
+        if "lexico" in resultados:
+            lexico = resultados["lexico"]
+            self.tabLexico.cargar(lexico["tokens"])
+
+            self.tabErrores.delete('1.0', tk.END)  # Limpiar antes de mostrar errores nuevos
+            if lexico["errores"]:
+                self.tabErrores.insert('1.0', "Errores detectados:\n\n", "error")
+                self.tabErrores.insert(
+                    tk.END, "".join(f"{i}. {error}\n\n" for i, error in enumerate(lexico["errores"], 1)), "error"
                 )
+                self.pestanasErroresSalida.select(0)
+            else:
+                self.tabErrores.insert('1.0', "No se encontraron errores en el análisis léxico.\n", "info")
 
-            for token in tokens:
-                if token.type == TokenType.RESERVED_WORD and token.value not in unique_identifiers:
-                    self.tabTablaSimbolos.insert(
-                        tk.END, f"{token.value:<20}{'RESERVADA':<15}{token.line:<10}{token.column:<10}\n"
-                    )
+            # === Tabla de Símbolos ===
+            self.tabTablaSimbolos.cargar(lexico["simbolos"])
 
             self.pestanasAnalisis.select(0)
 
-
         # === ANÁLISIS SINTÁCTICO ===
-        if fase == "sintactico" or fase == "all":
-            for item in self.tabSintactico.get_children():
-                self.tabSintactico.delete(item)
-
-
-            tokens, _ = self.analizador_lexico.analyze(code)  # Ignora errores léxicos aquí
-            parser = Parser(tokens)
-            ast, sintax_errors = parser.parse()
+        if "sintactico" in resultados:
+            self.tabSintactico.delete(*self.tabSintactico.get_children())
+            self.hijos_pendientes = {}
+            # El AST llega aplanado: filas en preorden, ver aplanar_arbol
+            ast, sintax_errors = resultados["sintactico"]["ast"], resultados["sintactico"]["errores"]
+            self.arbol_sintactico = ast
             # 🔍 DEBUG: Ver hijos de nodos INCREMENT/DECREMENT
-            for nodo in ast.children:
-                if nodo.node_type in ["INCREMENT", "DECREMENT"]:
-                    print(f"[DEBUG] {nodo.name} tiene {len(nodo.children)} hijo(s)")
-                    for hijo in nodo.children:
-                        print("     ↳", hijo.name)
+            for posicion in self.hijos_de(0) if ast and DEPURAR_AST else []:
+                nombre, tipo_nodo, _, _, cantidad, _ = ast[posicion]
+                if tipo_nodo in ["INCREMENT", "DECREMENT"]:
+                    print(f"[DEBUG] {nombre} tiene {cantidad} hijo(s)")
+                    for hijo in self.hijos_de(posicion):
+                        print("     ↳", ast[hijo][0])
 
-
-            #if any("Error léxico" in e for e in errors):
-             #   messagebox.showwarning("Advertencia", "Existen errores léxicos. Se continúa con el análisis sintáctico.")
-
-            if sintax_errors:
-                pass
-            else:
-                messagebox.showinfo("Sintaxis", "Análisis sintáctico exitoso.")
+            if not sintax_errors:
+                # En la barra de estado y no en un diálogo que detenga al usuario
+                self.status_compilacion.config(text="Análisis sintáctico exitoso.")
 
             if ast:
-                self.insertar_en_treeview(self.tabSintactico, ast)
-                self.mostrar_ast_como_tabla(ast)
-
-
-            
-
+                raiz = self.insertar_en_treeview(self.tabSintactico, 0)
+                if raiz:
+                    # Solo la raíz se abre; el resto se inserta cuando el usuario abre cada nodo
+                    self.expandir_nodo(self.tabSintactico, raiz)
+                if DEPURAR_AST:
+                    self.mostrar_ast_como_tabla(ast)
 
         # === ANÁLISIS SEMÁNTICO ===
-        if fase == "semantico" or fase == "all":
+        if "semantico" in resultados:
             self.tabSemantico.delete('1.0', tk.END)
-            self.tabSemantico.insert('1.0', "Análisis semántico no implementado todavía.\n")
+            self.tabSemantico.insert('1.0', resultados["semantico"])
             if fase == "semantico":
                 self.pestanasAnalisis.select(2)
 
         # === CÓDIGO INTERMEDIO ===
-        if fase == "intermedio" or fase == "all":
+        if "intermedio" in resultados:
             self.tabIntermedio.delete('1.0', tk.END)
-            self.tabIntermedio.insert('1.0', "Generación de código intermedio no implementada todavía.\n")
+            self.tabIntermedio.insert('1.0', resultados["intermedio"])
             if fase == "intermedio":
                 self.pestanasAnalisis.select(3)
 
-
-
-    def insertar_en_treeview(self, treeview, nodo, parent=""):
-        if nodo is None or "ERROR" in getattr(nodo, 'name', ''):
+    def hijos_de(self, posicion, desde=None, cantidad=None):
+        """Posiciones en el AST aplanado de los hijos de la fila dada (o de cantidad de
+        ellos a partir de la posición desde)"""
+        filas = self.arbol_sintactico
+        hijo = posicion + 1 if desde is None else desde
+        for _ in range(filas[posicion][4] if cantidad is None else cantidad):
+            yield hijo
+            hijo = filas[hijo][5]
+
+    def insertar_en_treeview(self, treeview, posicion, parent=""):
+        # posicion es la fila del nodo en el AST aplanado
+        nombre, tipo_texto, linea, columna, cantidad_hijos, _ = self.arbol_sintactico[posicion]
+        if "ERROR" in nombre:
             return
 
-        nombre = getattr(nodo, 'name', 'n/a')
-        tipo = getattr(nodo, 'node_type', '')
-        linea = getattr(nodo, 'line', 0)
-        columna = getattr(nodo, 'column', 0)
-
-    #  Corregimos: quitar "NodeType." para que sea más limpio
-        if hasattr(tipo, "name"):
-         tipo_texto = tipo.name
-        else:
-         tipo_texto = str(tipo)
-
         if "(" in nombre and ")" in nombre:
          nodo_texto = nombre
         elif tipo_texto:
@@ -548,35 +933,60 @@ class CompiladorIDE:
 
         item_id = treeview.insert(parent, tk.END, text=nodo_texto, values=(tipo_texto, linea, columna))
 
-    # Abrir automáticamente el nodo insertado
+    # Los hijos quedan detrás de un marcador hasta que se abra el nodo:
+    # (posición del primero pendiente, cuántos faltan)
+        if cantidad_hijos:
+            marcador = treeview.insert(item_id, tk.END, text="…")
+            self.hijos_pendientes[marcador] = (posicion + 1, cantidad_hijos)
+        return item_id
+
+    def on_treeview_open(self, event=None):
+        treeview = event.widget
+        self.expandir_nodo(treeview, treeview.focus())
+
+    def expandir_nodo(self, treeview, item_id):
+        """Cambia el marcador de item_id por sus hijos, de a HIJOS_POR_PAGINA"""
+        for marcador in treeview.get_children(item_id):
+            if marcador not in self.hijos_pendientes:
+                continue
+            desde, pendientes = self.hijos_pendientes.pop(marcador)
+            treeview.delete(marcador)
+            siguiente = desde
+            for hijo in self.hijos_de(None, desde, min(pendientes, HIJOS_POR_PAGINA)):
+                self.insertar_en_treeview(treeview, hijo, parent=item_id)
+                siguiente = self.arbol_sintactico[hijo][5]
+            restantes = pendientes - min(pendientes, HIJOS_POR_PAGINA)
+            if restantes > 0:
+                # Al abrir este nodo se agregan los siguientes hijos al mismo padre
+                mas = treeview.insert(item_id, tk.END, text=f"… {restantes} nodos más", tags=("mas",))
+                marcador = treeview.insert(mas, tk.END, text="…")
+                self.hijos_pendientes[marcador] = (siguiente, restantes)
         treeview.item(item_id, open=True)
-
-    # Recursivamente insertar hijos
-        for hijo in getattr(nodo, 'children', []):
-            self.insertar_en_treeview(treeview, hijo, parent=item_id)
-
-
-
-
-
-
-    def mostrar_ast_como_tabla(self, nodo):
-       def recorrer(nodo, nivel=0, filas=None):
-        if filas is None:
-            filas = []
-        if nodo:
+        if treeview.tag_has("mas", item_id):
+            # Abrir el nodo "más" pasa la página siguiente a su padre y lo quita
+            padre = treeview.parent(item_id)
+            for hijo in treeview.get_children(item_id):
+                treeview.move(hijo, padre, tk.END)
+            treeview.delete(item_id)
+
+    def mostrar_ast_como_tabla(self, arbol):
+       def recorrer(arbol):
+        # El nivel de cada fila es cuántos subárboles abiertos la contienen
+        filas, abiertos = [], []
+        for posicion, (nombre, tipo, linea, columna, _, fin) in enumerate(arbol):
+            while abiertos and abiertos[-1] <= posicion:
+                abiertos.pop()
             filas.append({
-                "Nombre": nodo.name,
-                "Tipo": nodo.node_type.name,
-                "Línea": nodo.line,
-                "Columna": nodo.column,
-                "Nivel": nivel
+                "Nombre": nombre,
+                "Tipo": tipo,
+                "Línea": linea,
+                "Columna": columna,
+                "Nivel": len(abiertos)
             })
-            for hijo in nodo.children:
-                recorrer(hijo, nivel + 1, filas)
+            abiertos.append(fin)
         return filas
 
-       filas = recorrer(nodo)
+       filas = recorrer(arbol)
        for fila in filas:
         print(f"{'  ' * fila['Nivel']}- {fila['Nombre']} [{fila['Tipo']}] (Línea {fila['Línea']}, Columna {fila['Columna']})") 
 
@@ -608,11 +1018,76 @@ class CompiladorIDE:
         return filas
 
 
-    def ejecutar_codigo(self):
+    def ejecutar_codigo(self, perfilar=False):
+        if self.esperar_carga(lambda: self.ejecutar_codigo(perfilar)):
+            return
         self.tabSalida.delete('1.0', tk.END)
-        self.tabSalida.insert('1.0', "La ejecución del código no está implementada todavía.\n")
+        self.tabErrores.delete('1.0', tk.END)
+        self.quitar_mapa_calor()
+        code = self.editor.get('1.0', 'end-1c')
+
+        def mostrar(texto):
+            # La salida llega por bloques: una sola inserción por bloque y no una por valor
+            self.tabSalida.insert(tk.END, texto)
+            self.tabSalida.see(tk.END)
+            self.tabSalida.update_idletasks()
+
+        salida = SalidaBuffer(mostrar, TAMANO_BLOQUE_IDE)
+
+        def leer():
+            # Lo escrito antes de 'cin' debe verse antes de pedir el valor
+            salida.vaciar()
+            valor = simpledialog.askstring("Entrada", "Valor para 'cin':", parent=self.root)
+            if valor is None:
+                raise ErrorEjecucion("Entrada cancelada por el usuario")
+            return valor
+
+        try:
+            with salida:
+                if perfilar:
+                    perfil = perfilar_programa(code, leer, salida)
+                else:
+                    transpilador.ejecutar(code, leer, salida)
+        except ErrorCompilacion as e:
+            self.tabErrores.insert('1.0', "Errores detectados:\n\n", "error")
+            for i, error in enumerate(e.errores, 1):
+                self.tabErrores.insert(tk.END, f"{i}. {error}\n\n", "error")
+            self.pestanasErroresSalida.select(0)
+            return
+        except ErrorEjecucion as e:
+            self.tabErrores.insert('1.0', f"{e}\n", "error")
+            self.pestanasErroresSalida.select(0)
+            return
+        if perfilar:
+            self.mostrar_perfil(perfil, code)
+            if perfil.error is not None:
+                self.tabErrores.insert('1.0', f"{perfil.error}\n", "error")
+                self.pestanasErroresSalida.select(0)
+                return
         self.pestanasErroresSalida.select(1)
-        
+
+    def mostrar_perfil(self, perfil, code):
+        """Pinta el mapa de calor en el editor y guarda el informe junto al archivo"""
+        for linea, nivel in perfil.calor().items():
+            self.editor.tag_add(f"calor{nivel}", f"{linea}.0", f"{linea}.0 lineend")
+        for nivel in range(NIVELES_CALOR):
+            self.editor.tag_lower(f"calor{nivel}")
+        self.mapa_calor_visible = True
+
+        self.tabSalida.insert(tk.END, "\n" + perfil.informe(code))
+        if self.nombreArchivo:
+            ruta = os.path.splitext(self.nombreArchivo)[0] + ".perfil.txt"
+            try:
+                perfil.guardar(ruta, code)
+                self.tabSalida.insert(tk.END, f"\nInforme guardado en {ruta}\n")
+            except OSError as e:
+                self.tabSalida.insert(tk.END, f"\nNo se pudo guardar el informe: {e}\n")
+
+    def quitar_mapa_calor(self):
+        for nivel in range(NIVELES_CALOR):
+            self.editor.tag_remove(f"calor{nivel}", "1.0", tk.END)
+        self.mapa_calor_visible = False
+
     def mostrar_acerca_de(self):
         messagebox.showinfo(
             "Acerca de",
@@ -0,0 +1,220 @@
+# ejecucion.py
+
+import math
+
+from lexico import LexicalAnalyzer
+from sintactico import Parser
+from arbol_sintaxis import NodeType
+
+
+class ErrorCompilacion(Exception):
+    """Errores léxicos o sintácticos que impiden ejecutar el programa"""
+
+    def __init__(self, errores):
+        super().__init__("\n".join(errores))
+        self.errores = errores
+
+
+class ErrorEjecucion(Exception):
+    """Error producido mientras se ejecuta el programa"""
+
+    def __init__(self, mensaje, line=None, column=None):
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.line = line
+        self.column = column
+
+    def __str__(self):
+        if self.line is not None:
+            return f"Error de ejecución en línea {self.line}, columna {self.column}: {self.mensaje}"
+        return f"Error de ejecución: {self.mensaje}"
+
+
+class LimiteExcedido(ErrorEjecucion):
+    """El programa superó uno de los límites de ejecución; motivo indica cuál"""
+
+    def __init__(self, motivo, mensaje, line=None, column=None):
+        super().__init__(mensaje, line, column)
+        self.motivo = motivo    # "instrucciones", "tiempo", "memoria" o "salida"
+
+
+# Conversión al tipo declarado de cada variable
+TIPOS_VALOR = {"int": int, "float": float, "bool": bool}
+VALORES_INICIALES = {"int": 0, "float": 0.0, "bool": False}
+
+
+def analizar_programa(codigo):
+    """Realiza el análisis léxico y sintáctico y devuelve el AST"""
+    tokens, _ = LexicalAnalyzer().analyze(codigo)
+    ast, errores = Parser(tokens).parse()
+    if errores or ast is None:
+        raise ErrorCompilacion(errores or ["Error sintáctico: programa vacío"])
+    return ast
+
+
+def recolectar_declaraciones(ast):
+    """Devuelve un diccionario {identificador: tipo} con las variables declaradas"""
+    declaraciones = {}
+
+    def recorrer(nodo):
+        if nodo.node_type == NodeType.TIPO:
+            for hijo in nodo.children:
+                declaraciones[hijo.name] = nodo.name
+        for hijo in nodo.children:
+            if hijo.node_type in (NodeType.TIPO, NodeType.LISTA):
+                recorrer(hijo)
+
+    recorrer(ast)
+    return declaraciones
+
+
+def valor_literal(nodo):
+    """Valor de un nodo FACTOR (entero, decimal o booleano)"""
+    texto = nodo.name
+    if texto == "true":
+        return True
+    if texto == "false":
+        return False
+    if "." in texto or "e" in texto.lower():
+        return float(texto)
+    return int(texto)
+
+
+def clave_constante(valor):
+    """Clave que separa constantes iguales para == pero no intercambiables: 1, 1.0 y True,
+    y también 0.0 y -0.0. Todos los NaN comparten la misma clave"""
+    if type(valor) is float:
+        return (float, repr(valor))
+    return (type(valor), valor)
+
+
+def mismo_valor(a, b):
+    return clave_constante(a) == clave_constante(b)
+
+
+def tipo_constante(valor):
+    return {int: "int", float: "float", bool: "bool"}.get(type(valor))
+
+
+def tipo_estatico(nodo, declaraciones):
+    """Tipo de una expresión cuando puede deducirse sin ejecutarla, o None"""
+    tipo = nodo.node_type
+    if tipo == NodeType.FACTOR:
+        return tipo_constante(valor_literal(nodo))
+    if tipo == NodeType.IDENTIFICADOR:
+        return declaraciones.get(nodo.name)
+    if tipo in (NodeType.RELACIONAL, NodeType.LOGICO):
+        return "bool"
+    if tipo in (NodeType.SUMA, NodeType.RESTA, NodeType.MULTIPLICACION) and len(nodo.children) == 2:
+        tipos = {tipo_estatico(hijo, declaraciones) for hijo in nodo.children}
+        if None in tipos:
+            return None
+        if nodo.name in ("/", "%"):
+            # dividir y modulo solo dan un entero cuando ambos operandos son int (no bool)
+            return "int" if tipos == {"int"} else "float"
+        return "float" if "float" in tipos else "int"
+    return None
+
+
+def texto_cadena(nodo):
+    """Contenido de una cadena sin comillas y con las secuencias de escape resueltas"""
+    contenido = nodo.name[1:-1]
+    return contenido.encode("latin-1", "backslashreplace").decode("unicode_escape")
+
+
+def lector(valores):
+    """Crea la función de lectura de 'cin' a partir de una secuencia de textos"""
+    iterador = iter(valores)
+
+    def leer():
+        try:
+            return next(iterador)
+        except StopIteration:
+            raise ErrorEjecucion("No hay más datos de entrada para 'cin'")
+    return leer
+
+
+def convertir(valor, tipo):
+    return TIPOS_VALOR[tipo](valor)
+
+
+def leer_valor(texto, tipo):
+    """Convierte el texto leído por 'cin' al tipo de la variable destino"""
+    texto = texto.strip()
+    try:
+        if tipo == "bool":
+            if texto in ("true", "1"):
+                return True
+            if texto in ("false", "0"):
+                return False
+            raise ValueError(texto)
+        if tipo == "int":
+            return int(float(texto)) if ("." in texto or "e" in texto.lower()) else int(texto)
+        return float(texto)
+    except ValueError:
+        raise ErrorEjecucion(f"Entrada '{texto}' no válida para una variable '{tipo}'")
+
+
+def dividir(a, b):
+    # División entera truncada (como en C) cuando ambos operandos son enteros
+    if type(a) is int and type(b) is int:
+        return dividir_enteros(a, b)
+    return dividir_reales(a, b)
+
+
+def modulo(a, b):
+    # El resto conserva el signo del dividendo, igual que en C
+    if type(a) is int and type(b) is int:
+        return modulo_enteros(a, b)
+    return modulo_reales(a, b)
+
+
+# Versiones especializadas para cuando el tipo de los operandos se conoce al compilar
+def dividir_enteros(a, b):
+    if b == 0:
+        raise ZeroDivisionError("división entre cero")
+    cociente = abs(a) // abs(b)
+    return cociente if (a >= 0) == (b >= 0) else -cociente
+
+
+def dividir_reales(a, b):
+    if b == 0:
+        raise ZeroDivisionError("división entre cero")
+    return a / b
+
+
+def modulo_enteros(a, b):
+    if b == 0:
+        raise ZeroDivisionError("módulo entre cero")
+    resto = abs(a) % abs(b)
+    return -resto if a < 0 else resto
+
+
+def modulo_reales(a, b):
+    if b == 0:
+        raise ZeroDivisionError("módulo entre cero")
+    return math.fmod(a, b)
+
+
+def resto_mascara(a, mascara):
+    # a % (mascara + 1) para enteros cuando mascara + 1 es potencia de dos, con el signo de a
+    return a & mascara if a >= 0 else -(-a & mascara)
+
+
+def potencia(a, b):
+    if type(a) is int and type(b) is int and b >= 0:
+        return a ** b
+    try:
+        resultado = float(a) ** float(b)
+    except ZeroDivisionError:
+        raise ZeroDivisionError("potencia de cero con exponente negativo")
+    if type(resultado) is complex:
+        raise ValueError("potencia con resultado no real")
+    return resultado
+
+
+def formatear(valor):
+    """Texto que muestra 'cout' para un valor"""
+    if type(valor) is bool:
+        return "true" if valor else "false"
+    return str(valor)
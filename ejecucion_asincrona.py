@@ -0,0 +1,133 @@
+# ejecucion_asincrona.py
+
+import asyncio
+import sys
+import time
+from collections import deque
+
+from ejecucion import ErrorCompilacion, ErrorEjecucion, LimiteExcedido
+from limites import Limites, ResultadoEjecucion, SalidaLimitada
+import maquina_registros
+
+
+class EntradaAsincrona:
+    """Tokens de 'cin' que llegan de un flujo asíncrono.
+
+    origen puede ser un texto, un objeto con una corrutina readline() (por ejemplo un
+    asyncio.StreamReader) o un iterable asíncrono de trozos de texto o bytes. Los tokens
+    se separan por espacios igual que con la entrada estándar.
+    """
+
+    def __init__(self, origen):
+        self.tokens = deque()
+        self.origen = None
+        self.agotado = False
+        if isinstance(origen, (str, bytes)):
+            self.agregar(origen)
+            self.agotado = True
+        elif origen is None:
+            self.agotado = True
+        elif hasattr(origen, "readline"):
+            self.origen = origen.readline
+        else:
+            iterador = origen.__aiter__()
+            self.origen = iterador.__anext__
+
+    def agregar(self, trozo):
+        if type(trozo) is bytes:
+            trozo = trozo.decode("utf-8", "replace")
+        self.tokens.extend(trozo.split())
+
+    async def siguiente(self):
+        while not self.tokens:
+            if self.agotado:
+                raise ErrorEjecucion("No hay más datos de entrada para 'cin'")
+            try:
+                trozo = await self.origen()
+            except StopAsyncIteration:
+                trozo = None
+            if not trozo:
+                self.agotado = True
+            else:
+                self.agregar(trozo)
+        return self.tokens.popleft()
+
+
+async def ejecutar_asincrono(fuente, entrada=None, limites=None, escribir=None, optimizar=True,
+                             instrucciones_por_turno=None):
+    """Ejecuta un programa dentro del bucle de eventos y devuelve su ResultadoEjecucion.
+
+    El intérprete se detiene en cada 'cin' mientras espera el siguiente token de entrada
+    y cede el turno cada instrucciones_por_turno instrucciones, así muchos programas
+    comparten un solo hilo. La espera de la entrada cuenta para el límite de tiempo.
+    escribir (opcional) recibe cada valor de 'cout' además de quedar en el resultado.
+    """
+    limites = limites or Limites.desde_entorno()
+    try:
+        compilado = maquina_registros.compilar(fuente, optimizar, verificar=True)
+    except ErrorCompilacion as e:
+        return ResultadoEjecucion("error_compilacion", [], e)
+    lector = entrada if isinstance(entrada, EntradaAsincrona) else EntradaAsincrona(entrada)
+    salida = SalidaLimitada(limites.salida, escribir)
+    maquina = maquina_registros.MaquinaRegistros(compilado, limites)
+    if instrucciones_por_turno:
+        maquina.intervalo_revision = instrucciones_por_turno
+    inicio = time.perf_counter()
+    pasos = maquina.pasos(None, salida, ceder=True)
+    motivo, error = "completado", None
+    try:
+        enviar, lanzar = None, None
+        while True:
+            pedido = pasos.throw(lanzar) if lanzar is not None else pasos.send(enviar)
+            enviar, lanzar = None, None
+            if pedido == maquina_registros.PEDIR_ENTRADA:
+                try:
+                    enviar = await esperar_entrada(lector, maquina)
+                except ErrorEjecucion as e:
+                    # Se lanza dentro del intérprete para que el error lleve la posición del 'cin'
+                    lanzar = e
+            else:
+                await asyncio.sleep(0)
+    except StopIteration:
+        pass
+    except LimiteExcedido as e:
+        motivo, error = "limite_" + e.motivo, e
+    except ErrorEjecucion as e:
+        motivo, error = "error_ejecucion", e
+    finally:
+        pasos.close()
+    return ResultadoEjecucion(motivo, salida.valores, error, maquina.instrucciones_ejecutadas,
+                              time.perf_counter() - inicio)
+
+
+async def esperar_entrada(lector, maquina):
+    if maquina.vencimiento is None:
+        return await lector.siguiente()
+    restante = maquina.vencimiento - time.perf_counter()
+    try:
+        return await asyncio.wait_for(lector.siguiente(), max(restante, 0))
+    except asyncio.TimeoutError:
+        raise LimiteExcedido("tiempo", f"se superó el límite de {maquina.limites.tiempo:g} segundos "
+                                       f"esperando la entrada")
+
+
+async def ejecutar_varios(fuentes, entradas=None, limites=None):
+    """Ejecuta varios programas a la vez en el bucle de eventos; resultados en el mismo orden"""
+    entradas = entradas if entradas is not None else [None] * len(fuentes)
+    return await asyncio.gather(*(ejecutar_asincrono(fuente, entrada, limites)
+                                  for fuente, entrada in zip(fuentes, entradas)))
+
+
+if __name__ == '__main__':
+    # python ejecucion_asincrona.py programa [copias] < entrada: ejecuta las copias a la vez
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        fuente_programa = f.read()
+    copias = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    texto_entrada = sys.stdin.read()
+    inicio_lote = time.perf_counter()
+    resultados = asyncio.run(ejecutar_varios([fuente_programa] * copias, [texto_entrada] * copias))
+    sys.stdout.write(resultados[0].texto())
+    if resultados[0].error is not None:
+        print(resultados[0].error, file=sys.stderr)
+    print(f"{copias} ejecuciones en {time.perf_counter() - inicio_lote:.3f} s: "
+          f"{sum(resultado.completado for resultado in resultados)} completadas", file=sys.stderr)
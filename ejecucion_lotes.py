@@ -0,0 +1,371 @@
+# ejecucion_lotes.py
+
+import sys
+
+try:
+    import numpy as np
+except ImportError:     # NumPy es opcional: sin él cada fila se ejecuta por separado
+    np = None
+
+from arbol_sintaxis import NodeType
+from analisis_tipos import analizar_tipos
+from ejecucion import (ErrorCompilacion, ErrorEjecucion, analizar_programa, recolectar_declaraciones,
+                       valor_literal, texto_cadena, lector, formatear)
+from optimizador_ast import optimizar
+import transpilador
+
+# Los enteros de cada carril viven en int64; un valor que llega a este límite (o una operación
+# que podría pasarlo) hace que la fila se repita con la ejecución normal, que no tiene límite
+LIMITE_ENTERO = 2 ** 62
+# Enteros que se convierten a float sin perder precisión
+LIMITE_EXACTO_REAL = 2 ** 53
+
+TIPOS_NUMPY = {"int": "int64", "float": "float64", "bool": "bool"}
+RELACIONALES = {"<": "less", ">": "greater", "<=": "less_equal", ">=": "greater_equal",
+                "==": "equal", "!=": "not_equal"}
+
+
+def numpy_disponible():
+    return np is not None
+
+
+class ResultadoFila:
+    """Lo que escribió 'cout' para una fila de entradas y el error que la detuvo, si hubo"""
+
+    def __init__(self, salidas, error=None, vectorizada=False):
+        self.salidas = salidas
+        self.error = error
+        self.vectorizada = vectorizada
+
+    def __repr__(self):
+        texto = " ".join(formatear(valor) for valor in self.salidas)
+        return texto if self.error is None else f"{texto} [{self.error}]"
+
+
+class NoVectorizable(Exception):
+    """El programa usa algo que la ejecución por carriles no reproduce"""
+
+
+class EjecutorVectorial:
+    """Ejecuta el AST sobre todas las filas a la vez: cada variable es un arreglo con un carril por fila.
+
+    Las condiciones se convierten en máscaras: un if ejecuta cada rama solo en los carriles
+    donde corresponde y un ciclo sigue mientras quede algún carril activo. Cuando un carril
+    se sale de lo que los arreglos reproducen exactamente (división entre cero, desbordes de
+    int64, entradas que 'cin' rechazaría) se desvía y su fila se ejecuta aparte.
+    """
+
+    def __init__(self, ast, entradas):
+        self.ast = ast
+        self.declaraciones = recolectar_declaraciones(ast)
+        self.entradas = entradas
+        self.filas = len(entradas)
+        self.vivos = np.ones(self.filas, dtype=bool)
+        self.cursor = np.zeros(self.filas, dtype=np.int64)
+        self.variables = {nombre: np.zeros(self.filas, dtype=TIPOS_NUMPY[tipo])
+                          for nombre, tipo in self.declaraciones.items()}
+        self.salidas = []       # (índices de los carriles, valores) de cada 'cout' ejecutado
+
+    def ejecutar(self):
+        analizar_tipos(self.ast)
+        self.comprobar(self.ast)
+        with np.errstate(all="ignore"):
+            self.bloque(self.ast, self.vivos.copy())
+
+        resultados = [[] for _ in range(self.filas)]
+        for indices, valores in self.salidas:
+            if isinstance(valores, str):
+                for indice in indices.tolist():
+                    resultados[indice].append(valores)
+            else:
+                for indice, valor in zip(indices.tolist(), valores.tolist()):
+                    resultados[indice].append(valor)
+        return resultados, self.vivos
+
+    def comprobar(self, nodo):
+        """Rechaza de antemano los programas cuyo tipo de alguna expresión depende de los valores"""
+        tipo = nodo.node_type
+        if tipo in EXPRESIONES_TIPADAS and nodo.tipo is None:
+            raise NoVectorizable(f"el tipo de '{nodo.name}' depende de los valores")
+        if tipo == NodeType.FACTOR and nodo.tipo == "int" and abs(valor_literal(nodo)) >= LIMITE_ENTERO:
+            raise NoVectorizable("constante entera fuera de int64")
+        for hijo in nodo.children:
+            if hijo.node_type not in (NodeType.TIPO, NodeType.CADENA):
+                self.comprobar(hijo)
+
+    def desviar(self, carriles):
+        self.vivos &= ~carriles
+
+    # === Sentencias ===
+
+    def bloque(self, nodo, mascara):
+        for hijo in nodo.children:
+            self.sentencia(hijo, mascara & self.vivos)
+
+    def sentencia(self, nodo, mascara):
+        tipo = nodo.node_type
+        if tipo == NodeType.LISTA:
+            self.bloque(nodo, mascara)
+        elif tipo == NodeType.ASIGNACION:
+            if len(nodo.children) < 2:
+                return
+            destino = nodo.children[0]
+            valor = self.convertir(self.expresion(nodo.children[1], mascara), nodo.children[1].tipo,
+                                   self.declaraciones[destino.name], mascara)
+            actual = self.variables[destino.name]
+            actual[mascara] = valor[mascara]
+        elif tipo == NodeType.INPUT:
+            if nodo.children:
+                destino = nodo.children[0]
+                actual = self.variables[destino.name]
+                actual[mascara] = self.leer(self.declaraciones[destino.name], mascara)[mascara]
+        elif tipo == NodeType.OUTPUT:
+            if not nodo.children:
+                return
+            valor = nodo.children[0]
+            if valor.node_type == NodeType.CADENA:
+                self.salidas.append((np.flatnonzero(mascara), texto_cadena(valor)))
+            else:
+                resultado = self.expresion(valor, mascara)
+                mascara = mascara & self.vivos
+                self.salidas.append((np.flatnonzero(mascara), resultado[mascara]))
+        elif tipo == NodeType.IF:
+            condicion = self.verdad(self.expresion(nodo.children[0], mascara), nodo.children[0].tipo)
+            self.bloque(nodo.children[1], mascara & condicion)
+            if len(nodo.children) > 2:
+                self.bloque(nodo.children[2], mascara & ~condicion)
+        elif tipo == NodeType.WHILE:
+            activos = mascara.copy()
+            while True:
+                condicion = nodo.children[0]
+                activos &= self.verdad(self.expresion(condicion, activos), condicion.tipo) & self.vivos
+                if not activos.any():
+                    break
+                self.bloque(nodo.children[1], activos)
+        elif tipo == NodeType.DO:
+            condicion = nodo.children[1] if len(nodo.children) > 1 else None
+            activos = mascara.copy()
+            while activos.any():
+                self.bloque(nodo.children[0], activos)
+                activos &= self.vivos
+                if condicion is None:
+                    break
+                activos &= self.verdad(self.expresion(condicion, activos), condicion.tipo)
+        elif tipo != NodeType.TIPO:
+            raise NoVectorizable(f"sentencia '{nodo.name}'")
+
+    def leer(self, tipo, mascara):
+        """Valor que 'cin' da a cada carril según su fila y cuántos datos ya leyó"""
+        columnas = self.entradas.shape[1]
+        agotados = mascara & (self.cursor >= columnas)
+        self.desviar(agotados)
+        posiciones = np.minimum(self.cursor, max(columnas - 1, 0))
+        self.cursor[mascara] += 1
+        if columnas == 0:
+            return np.zeros(self.filas, dtype=TIPOS_NUMPY[tipo])
+        crudos = self.entradas[np.arange(self.filas), posiciones]
+        clase = crudos.dtype.kind
+        if tipo == "bool":
+            # 'cin' solo acepta 0 y 1 (o true y false) para un bool
+            if clase == "b":
+                return crudos
+            if clase in "iu":
+                self.desviar(mascara & (crudos != 0) & (crudos != 1))
+                return crudos != 0
+            self.desviar(mascara)
+            return np.zeros(self.filas, dtype=bool)
+        if clase == "b":
+            self.desviar(mascara)
+            return np.zeros(self.filas, dtype=TIPOS_NUMPY[tipo])
+        if tipo == "float":
+            return crudos.astype(np.float64)
+        if clase == "f":
+            # Un real leído en un int se trunca; inf y nan no son enteros válidos
+            self.desviar(mascara & ~(np.abs(crudos) < LIMITE_ENTERO))
+            return np.trunc(np.where(np.isfinite(crudos), crudos, 0)).astype(np.int64)
+        valores = crudos.astype(np.int64)
+        self.desviar(mascara & ((crudos >= LIMITE_ENTERO) | (valores <= -LIMITE_ENTERO)))
+        return valores
+
+    # === Expresiones ===
+
+    def verdad(self, valores, tipo):
+        return valores if tipo == "bool" else valores != 0
+
+    def convertir(self, valores, origen, tipo, mascara):
+        """Conversión al tipo de la variable en cada asignación, como la de la ejecución normal"""
+        if origen == tipo:
+            return valores
+        if tipo == "bool":
+            return valores != 0
+        if tipo == "float":
+            return self.a_real(valores, origen, mascara)
+        if origen == "float":
+            self.desviar(mascara & ~(np.abs(valores) < LIMITE_ENTERO))
+            return np.trunc(np.where(np.isfinite(valores), valores, 0)).astype(np.int64)
+        return valores.astype(np.int64)
+
+    def a_real(self, valores, tipo, mascara):
+        if tipo == "float":
+            return valores
+        if tipo == "int":
+            self.desviar(mascara & (np.abs(valores) > LIMITE_EXACTO_REAL))
+        return valores.astype(np.float64)
+
+    def acotar(self, valores, mascara):
+        self.desviar(mascara & (np.abs(valores) >= LIMITE_ENTERO))
+        return valores
+
+    def expresion(self, nodo, mascara):
+        tipo_nodo = nodo.node_type
+        hijos = nodo.children
+        if tipo_nodo == NodeType.FACTOR:
+            return np.full(self.filas, valor_literal(nodo), dtype=TIPOS_NUMPY[nodo.tipo])
+        if tipo_nodo == NodeType.IDENTIFICADOR:
+            return self.variables[nodo.name]
+        if tipo_nodo in (NodeType.INCREMENTO, NodeType.DECREMENTO):
+            operando = hijos[0]
+            valores = self.expresion(operando, mascara)
+            if nodo.tipo == "float":
+                valores = self.a_real(valores, operando.tipo, mascara)
+            else:
+                valores = valores.astype(np.int64, copy=False)
+            resultado = valores + 1 if tipo_nodo == NodeType.INCREMENTO else valores - 1
+            return resultado if nodo.tipo == "float" else self.acotar(resultado, mascara)
+        if tipo_nodo == NodeType.LOGICO:
+            izquierda = self.verdad(self.expresion(hijos[0], mascara), hijos[0].tipo)
+            if nodo.name == "!":
+                return ~izquierda
+            # Igual que en la ejecución normal, el operando derecho solo se evalúa donde hace falta
+            pendientes = mascara & (izquierda if nodo.name == "&&" else ~izquierda)
+            derecha = self.verdad(self.expresion(hijos[1], pendientes), hijos[1].tipo)
+            return izquierda & derecha if nodo.name == "&&" else izquierda | derecha
+        if tipo_nodo == NodeType.RELACIONAL:
+            tipos = (hijos[0].tipo, hijos[1].tipo)
+            a = self.expresion(hijos[0], mascara)
+            b = self.expresion(hijos[1], mascara)
+            if "float" in tipos:
+                a, b = self.a_real(a, tipos[0], mascara), self.a_real(b, tipos[1], mascara)
+            elif "int" in tipos:
+                a, b = a.astype(np.int64, copy=False), b.astype(np.int64, copy=False)
+            return getattr(np, RELACIONALES[nodo.name])(a, b)
+        return self.aritmetica(nodo, mascara)
+
+    def aritmetica(self, nodo, mascara):
+        izquierdo, derecho = nodo.children
+        operador = nodo.name
+        a = self.expresion(izquierdo, mascara)
+        b = self.expresion(derecho, mascara)
+        if nodo.tipo == "float":
+            a, b = self.a_real(a, izquierdo.tipo, mascara), self.a_real(b, derecho.tipo, mascara)
+        else:
+            a, b = a.astype(np.int64, copy=False), b.astype(np.int64, copy=False)
+
+        if operador == "+":
+            resultado = a + b
+        elif operador == "-":
+            resultado = a - b
+        elif operador == "*":
+            if nodo.tipo != "float":
+                # El producto en int64 puede dar la vuelta: se estima antes con reales
+                self.desviar(mascara & (np.abs(a.astype(np.float64) * b) >= LIMITE_ENTERO))
+            resultado = a * b
+        elif operador in ("/", "%"):
+            self.desviar(mascara & (b == 0))
+            b = np.where(b == 0, 1, b)
+            if nodo.tipo == "float":
+                resultado = a / b if operador == "/" else np.fmod(a, b)
+            elif operador == "/":
+                # División truncada hacia cero, como en C
+                cociente = np.abs(a) // np.abs(b)
+                resultado = np.where((a >= 0) == (b >= 0), cociente, -cociente)
+            else:
+                resto = np.abs(a) % np.abs(b)
+                resultado = np.where(a < 0, -resto, resto)
+        elif operador == "^":
+            if nodo.tipo == "float":
+                resultado = np.power(a, b)
+                # Casos en que la potencia de la ejecución normal lanza un error
+                fallidos = (a == 0) & (b < 0)
+                fallidos |= (a < 0) & (b != np.trunc(b)) & np.isfinite(b)
+                fallidos |= np.isinf(resultado) & np.isfinite(a) & np.isfinite(b)
+                self.desviar(mascara & fallidos)
+            else:
+                self.desviar(mascara & (np.abs(a.astype(np.float64)) ** b.astype(np.float64) >= LIMITE_ENTERO))
+                resultado = np.power(a, np.where(b < 0, 0, b))
+        else:
+            raise NoVectorizable(f"operador '{operador}'")
+        return resultado if nodo.tipo == "float" else self.acotar(resultado, mascara)
+
+
+# Nodos cuyo tipo estático debe conocerse para ejecutarlos por carriles
+EXPRESIONES_TIPADAS = (NodeType.SUMA, NodeType.RESTA, NodeType.MULTIPLICACION, NodeType.POTENCIA,
+                       NodeType.RELACIONAL, NodeType.LOGICO, NodeType.INCREMENTO, NodeType.DECREMENTO,
+                       NodeType.FACTOR, NodeType.IDENTIFICADOR)
+
+
+def ejecutar_fila(programa, fila):
+    """Ejecución normal de una fila con el programa transpilado"""
+    salidas = []
+    try:
+        programa.ejecutar(lector(formatear(valor) for valor in fila), salidas.append)
+    except ErrorEjecucion as e:
+        return ResultadoFila(salidas, e)
+    return ResultadoFila(salidas)
+
+
+def ejecutar_lote(codigo, entradas):
+    """Ejecuta el programa una vez por cada fila de entradas (los datos que lee 'cin').
+
+    Con NumPy y un arreglo numérico rectangular las filas se ejecutan juntas por carriles;
+    las filas que no pueden seguirse así, o todas si el programa no es vectorizable, se
+    ejecutan una por una. Devuelve un ResultadoFila por fila y las estadísticas del lote.
+    """
+    programa = transpilador.compilar(codigo)
+    filas = entradas.tolist() if hasattr(entradas, "tolist") else [list(fila) for fila in entradas]
+    vectorizadas = [None] * len(filas)
+
+    arreglo = None
+    if np is not None and filas:
+        try:
+            arreglo = np.asarray(entradas)
+        except ValueError:
+            arreglo = None
+        if arreglo is not None and (arreglo.ndim != 2 or arreglo.dtype.kind not in "biuf"):
+            arreglo = None
+    if arreglo is not None:
+        try:
+            ast, _ = optimizar(analizar_programa(codigo))
+            salidas, vivos = EjecutorVectorial(ast, arreglo).ejecutar()
+        except NoVectorizable:
+            pass
+        else:
+            for indice in np.flatnonzero(vivos).tolist():
+                vectorizadas[indice] = ResultadoFila(salidas[indice], vectorizada=True)
+
+    resultados = [resultado if resultado is not None else ejecutar_fila(programa, fila)
+                  for resultado, fila in zip(vectorizadas, filas)]
+    total = sum(resultado.vectorizada for resultado in resultados)
+    return resultados, {"filas": len(resultados), "vectorizadas": total, "escalares": len(resultados) - total}
+
+
+def numero(texto):
+    try:
+        return int(texto)
+    except ValueError:
+        return float(texto)
+
+
+if __name__ == '__main__':
+    # Cada línea de la entrada estándar es una fila con los datos de 'cin' separados por espacios
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        fuente_programa = f.read()
+    try:
+        filas = [[numero(dato) for dato in linea.split()] for linea in sys.stdin if linea.strip()]
+        resultados, estadisticas = ejecutar_lote(fuente_programa, filas)
+    except (ErrorCompilacion, ValueError) as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    for resultado in resultados:
+        print(resultado)
+    print(", ".join(f"{nombre}: {cantidad}" for nombre, cantidad in estadisticas.items()), file=sys.stderr)
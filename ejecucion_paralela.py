@@ -0,0 +1,220 @@
+# ejecucion_paralela.py
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from lexico import LexicalAnalyzer
+from sintactico import Parser
+from ejecucion import ErrorCompilacion
+from limites import Limites, ResultadoEjecucion, ejecutar_compilado
+from maquina_registros import EnsambladorRegistros
+import maquina_virtual
+
+# Procesos del grupo; por omisión uno por núcleo
+PROCESOS = int(os.environ.get("COMPILADOR_PROCESOS", "0")) or os.cpu_count() or 1
+# Trabajos enviados por proceso sin esperar resultados: mantiene ocupados a todos sin
+# cargar en memoria un manifiesto entero de trabajos pendientes
+TRABAJOS_POR_PROCESO = 4
+# Tiempo de ejecución por trabajo cuando COMPILADOR_LIMITE_TIEMPO no lo fija: un programa
+# que no termina no debe ocupar un proceso para siempre
+TIEMPO_POR_DEFECTO = 10.0
+# Extensión de los programas en un directorio y de su entrada opcional al lado
+EXTENSION_PROGRAMA = ".txt"
+EXTENSION_ENTRADA = ".entrada"
+
+
+class Trabajo:
+    """Un programa a ejecutar: su ruta y el texto de 'cin' o la ruta de donde leerlo"""
+
+    def __init__(self, identificador, programa, entrada=None, archivo_entrada=None):
+        self.identificador = identificador
+        self.programa = programa
+        self.entrada = entrada
+        self.archivo_entrada = archivo_entrada
+
+
+def trabajos_de_directorio(directorio):
+    """Un trabajo por cada programa del directorio, con su archivo .entrada si existe"""
+    for nombre in sorted(os.listdir(directorio)):
+        base, extension = os.path.splitext(nombre)
+        if extension != EXTENSION_PROGRAMA:
+            continue
+        archivo_entrada = os.path.join(directorio, base + EXTENSION_ENTRADA)
+        yield Trabajo(nombre, os.path.join(directorio, nombre),
+                      archivo_entrada=archivo_entrada if os.path.exists(archivo_entrada) else None)
+
+
+def trabajos_de_manifiesto(ruta):
+    """Trabajos de un manifiesto con uno por línea.
+
+    Cada línea es 'programa [archivo_entrada]' o un objeto JSON con "programa" y,
+    opcionalmente, "id", "entrada" (texto) o "archivo_entrada". Las rutas relativas lo son
+    al directorio del manifiesto; las líneas vacías y las que empiezan con # se ignoran.
+    """
+    base = os.path.dirname(os.path.abspath(ruta))
+    with open(ruta, "r", encoding="utf-8") as f:
+        for numero, linea in enumerate(f, 1):
+            linea = linea.strip()
+            if not linea or linea.startswith("#"):
+                continue
+            if linea.startswith("{"):
+                datos = json.loads(linea)
+                programa, archivo_entrada = datos["programa"], datos.get("archivo_entrada")
+                identificador, entrada = datos.get("id", programa), datos.get("entrada")
+            else:
+                partes = linea.split()
+                programa, archivo_entrada = partes[0], partes[1] if len(partes) > 1 else None
+                identificador, entrada = programa, None
+            yield Trabajo(identificador, os.path.join(base, programa), entrada,
+                          os.path.join(base, archivo_entrada) if archivo_entrada else None)
+
+
+def cargar_trabajos(ruta):
+    return trabajos_de_directorio(ruta) if os.path.isdir(ruta) else trabajos_de_manifiesto(ruta)
+
+
+def limites_por_defecto():
+    limites = Limites.desde_entorno()
+    if limites.tiempo is None:
+        limites.tiempo = TIEMPO_POR_DEFECTO
+    return limites
+
+
+def ejecutar_trabajo(trabajo, limites, optimizar=True):
+    """Analiza, compila y ejecuta un programa; devuelve su resultado como diccionario.
+
+    Se ejecuta en los procesos del grupo, así que nunca lanza: cualquier falla queda en
+    el resultado. Los tiempos de cada fase están en segundos.
+    """
+    tiempos = {}
+    diagnosticos = []
+    inicio = anterior = time.perf_counter()
+
+    def medir(fase):
+        nonlocal anterior
+        ahora = time.perf_counter()
+        tiempos[fase] = ahora - anterior
+        anterior = ahora
+
+    try:
+        with open(trabajo.programa, "r", encoding="utf-8") as f:
+            fuente = f.read()
+        entrada = trabajo.entrada
+        if trabajo.archivo_entrada is not None:
+            with open(trabajo.archivo_entrada, "r", encoding="utf-8") as f:
+                entrada = f.read()
+        medir("lectura")
+        tokens, errores_lexicos = LexicalAnalyzer().analyze(fuente)
+        diagnosticos += errores_lexicos
+        medir("lexico")
+        ast, errores_sintacticos = Parser(tokens).parse()
+        diagnosticos += errores_sintacticos
+        medir("sintactico")
+        if errores_sintacticos or ast is None:
+            error = ErrorCompilacion(errores_sintacticos or ["Error sintáctico: programa vacío"])
+            resultado = ResultadoEjecucion("error_compilacion", [], error)
+        else:
+            compilado = EnsambladorRegistros(maquina_virtual.intermedio_de_ast(ast, optimizar),
+                                             verificar=True).ensamblar()
+            medir("compilacion")
+            resultado = ejecutar_compilado(compilado, entrada or "", limites)
+            medir("ejecucion")
+        datos = resultado.a_diccionario()
+    except ErrorCompilacion as e:
+        # Los errores semánticos (una variable sin declarar) aparecen al generar el código
+        diagnosticos += e.errores
+        datos = ResultadoEjecucion("error_compilacion", [], e).a_diccionario()
+    except Exception as e:
+        # Archivos ilegibles o fallas del propio compilador: el lote sigue con los demás
+        datos = ResultadoEjecucion("error_interno", [], e).a_diccionario()
+        datos["error"] = f"{type(e).__name__}: {e}"
+    tiempos["total"] = time.perf_counter() - inicio
+    datos.pop("tiempo")
+    datos.update({"id": trabajo.identificador, "programa": trabajo.programa,
+                  "diagnosticos": diagnosticos, "tiempos": tiempos})
+    return datos
+
+
+def resultado_perdido(trabajo, error):
+    """Resultado de un trabajo cuyo proceso murió sin devolverlo (sin memoria, un fallo
+    de segmentación), con el mismo formato que el de ejecutar_trabajo"""
+    datos = ResultadoEjecucion("error_interno", [], error).a_diccionario()
+    datos["error"] = f"{type(error).__name__}: {error}"
+    datos.pop("tiempo")
+    datos.update({"id": trabajo.identificador, "programa": trabajo.programa,
+                  "diagnosticos": [], "tiempos": {}})
+    return datos
+
+
+def ejecutar_aislado(trabajo, limites, optimizar=True):
+    """Ejecuta un trabajo en un grupo propio de un proceso: así, si el proceso muere, se
+    sabe que fue por este trabajo y no por otro que corría al lado"""
+    with ProcessPoolExecutor(max_workers=1) as grupo:
+        try:
+            return grupo.submit(ejecutar_trabajo, trabajo, limites, optimizar).result()
+        except BrokenProcessPool as e:
+            return resultado_perdido(trabajo, e)
+
+
+def ejecutar_en_paralelo(trabajos, limites=None, procesos=None, optimizar=True):
+    """Ejecuta los trabajos en un grupo de procesos y entrega cada resultado al terminar.
+
+    Los resultados salen en el orden en que terminan, no en el de los trabajos; cada uno
+    lleva el "id" de su trabajo. Si un proceso muere se pierden todos los trabajos que el
+    grupo tenía en curso: cada uno se repite aislado (ejecutar_aislado), así solo el que
+    lo mata queda como error_interno, y el lote sigue en un grupo nuevo.
+    """
+    limites = limites or limites_por_defecto()
+    procesos = procesos or PROCESOS
+    trabajos = iter(trabajos)
+    sin_enviar = None       # trabajo que no se pudo enviar a un grupo que ya estaba roto
+    agotados = False
+    while not agotados:
+        perdidos = []
+        with ProcessPoolExecutor(max_workers=procesos) as grupo:
+            pendientes = {}     # futuro -> trabajo
+            roto = False
+            while pendientes or not (agotados or roto):
+                while not (agotados or roto) and len(pendientes) < procesos * TRABAJOS_POR_PROCESO:
+                    trabajo, sin_enviar = sin_enviar or next(trabajos, None), None
+                    if trabajo is None:
+                        agotados = True
+                        continue
+                    try:
+                        pendientes[grupo.submit(ejecutar_trabajo, trabajo, limites, optimizar)] = trabajo
+                    except BrokenProcessPool:
+                        roto, sin_enviar = True, trabajo
+                if not pendientes:
+                    break
+                terminados, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    trabajo = pendientes.pop(futuro)
+                    try:
+                        resultado = futuro.result()
+                    except BrokenProcessPool:
+                        roto = True
+                        perdidos.append(trabajo)
+                    else:
+                        yield resultado
+        for trabajo in perdidos:
+            yield ejecutar_aislado(trabajo, limites, optimizar)
+
+
+if __name__ == '__main__':
+    # python ejecucion_paralela.py directorio|manifiesto [procesos] > resultados.ndjson
+    procesos_lote = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    conteo = {}
+    inicio_lote = time.perf_counter()
+    for resultado_trabajo in ejecutar_en_paralelo(cargar_trabajos(sys.argv[1]), procesos=procesos_lote):
+        sys.stdout.write(json.dumps(resultado_trabajo, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+        conteo[resultado_trabajo["motivo"]] = conteo.get(resultado_trabajo["motivo"], 0) + 1
+    duracion = time.perf_counter() - inicio_lote
+    total_trabajos = sum(conteo.values())
+    print(f"{total_trabajos} programas en {duracion:.2f} s ({total_trabajos / duracion if duracion else 0:.1f} "
+          f"por segundo): " + ", ".join(f"{motivo} {cantidad}" for motivo, cantidad in sorted(conteo.items())),
+          file=sys.stderr)
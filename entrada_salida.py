@@ -0,0 +1,108 @@
+# entrada_salida.py
+
+import mmap
+import os
+import sys
+
+from ejecucion import ErrorEjecucion, formatear, lector
+
+# Valores que junta la salida antes de entregarlos de una vez al destino
+TAMANO_BLOQUE = int(os.environ.get("COMPILADOR_BLOQUE_SALIDA", "8192"))
+# En el IDE los bloques son más chicos para que la salida vaya apareciendo
+TAMANO_BLOQUE_IDE = 1000
+
+
+class EntradaBuffer:
+    """Datos de 'cin' leídos de una sola vez y ya separados en tokens.
+
+    Se usa como la función de lectura de las máquinas: cada llamada devuelve el siguiente
+    token como texto.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.posicion = 0
+
+    @classmethod
+    def desde_texto(cls, texto):
+        return cls(texto.split())
+
+    @classmethod
+    def desde_bytes(cls, datos):
+        return cls(datos.split())
+
+    @classmethod
+    def desde_archivo(cls, ruta):
+        with open(ruta, "rb") as f:
+            return cls.desde_bytes(leer_todo(f))
+
+    def __call__(self):
+        posicion = self.posicion
+        if posicion >= len(self.tokens):
+            raise ErrorEjecucion("No hay más datos de entrada para 'cin'")
+        self.posicion = posicion + 1
+        token = self.tokens[posicion]
+        return token.decode("utf-8", "replace") if type(token) is bytes else token
+
+    def restantes(self):
+        return len(self.tokens) - self.posicion
+
+
+def leer_todo(archivo):
+    """Contenido completo de un archivo abierto en binario; los archivos regulares se mapean en memoria"""
+    try:
+        with mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            return mapa.read()
+    except (OSError, ValueError):
+        # Tuberías, terminales y archivos vacíos no se pueden mapear
+        return archivo.read()
+
+
+def entrada_estandar():
+    """Función de lectura para 'cin' desde la entrada estándar.
+
+    Si la entrada viene de un archivo o una tubería se lee entera de una vez; en una
+    terminal se sigue leyendo línea por línea para no esperar al fin de la entrada.
+    """
+    if sys.stdin.isatty():
+        return lector(dato for linea in sys.stdin for dato in linea.split())
+    return EntradaBuffer.desde_bytes(leer_todo(sys.stdin.buffer))
+
+
+class SalidaBuffer:
+    """Junta los valores de 'cout' y los entrega al destino en bloques de texto.
+
+    destino recibe un texto con una línea por valor; se llama cuando se juntan
+    tamano_bloque valores y al vaciar. Como administrador de contexto vacía al salir,
+    también cuando la ejecución termina con un error.
+    """
+
+    def __init__(self, destino, tamano_bloque=None):
+        self.destino = destino
+        self.tamano_bloque = tamano_bloque or TAMANO_BLOQUE
+        self.pendientes = []
+        self.bloques = 0
+
+    def __call__(self, valor):
+        pendientes = self.pendientes
+        pendientes.append(valor)
+        if len(pendientes) >= self.tamano_bloque:
+            self.vaciar()
+
+    def vaciar(self):
+        if self.pendientes:
+            texto = "\n".join(map(formatear, self.pendientes)) + "\n"
+            self.pendientes = []
+            self.bloques += 1
+            self.destino(texto)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.vaciar()
+        return False
+
+
+def salida_estandar():
+    return SalidaBuffer(sys.stdout.write)
@@ -0,0 +1,92 @@
+# esquema.py
+
+import bisect
+
+from unidad_compilacion import unidad_para
+
+
+class Bloque:
+    """Un if/while/do del texto: líneas donde empieza y termina y bloque que lo contiene"""
+
+    def __init__(self, nombre, linea, columna, linea_fin):
+        self.nombre = nombre
+        self.linea = linea
+        self.columna = columna
+        self.linea_fin = linea_fin
+        self.padre = None
+        self.hijos = []
+
+    def plegable(self):
+        # Queda visible la primera línea y la del cierre; hace falta algo en medio
+        return self.linea_fin - self.linea > 1
+
+
+class IndiceEsquema:
+    """Bloques de un texto ordenados por línea, para el esquema y el plegado.
+
+    Se arma con los bloques que registra Parser; entre un análisis y el siguiente se
+    mantiene al día corriendo las líneas con cada edición.
+    """
+
+    def __init__(self, bloques=()):
+        self.bloques = [Bloque(*datos) for datos in bloques]
+        self.bloques.sort(key=lambda bloque: (bloque.linea, bloque.columna))
+        self.raices = []
+        abiertos = []
+        for bloque in self.bloques:
+            while abiertos and abiertos[-1].linea_fin < bloque.linea:
+                abiertos.pop()
+            if abiertos:
+                bloque.padre = abiertos[-1]
+                abiertos[-1].hijos.append(bloque)
+            else:
+                self.raices.append(bloque)
+            abiertos.append(bloque)
+        self.lineas = [bloque.linea for bloque in self.bloques]
+
+    def en_linea(self, linea):
+        """El bloque plegable más externo que empieza en la línea, o None"""
+        posicion = bisect.bisect_left(self.lineas, linea)
+        while posicion < len(self.bloques) and self.bloques[posicion].linea == linea:
+            if self.bloques[posicion].plegable():
+                return self.bloques[posicion]
+            posicion += 1
+        return None
+
+    def desde(self, linea):
+        """Posición en bloques del primero que empieza en la línea dada o después"""
+        return bisect.bisect_left(self.lineas, linea)
+
+    def contenedores(self, linea):
+        """El último bloque que empieza antes de la línea y sus antepasados, de adentro
+        hacia afuera: entre ellos están todos los que empiezan antes y la contienen"""
+        posicion = bisect.bisect_left(self.lineas, linea)
+        bloque = self.bloques[posicion - 1] if posicion else None
+        while bloque is not None:
+            yield bloque
+            bloque = bloque.padre
+
+    def desplazar(self, linea, delta):
+        """Corre los bloques porque se agregaron (delta > 0) o quitaron líneas después de la
+        línea dada; lo que estaba en las líneas quitadas queda en esa línea.
+
+        Solo se tocan los bloques que empiezan en esa línea o después y los que la
+        contienen, que son antepasados del último que empieza antes: lo de arriba no cambia.
+        """
+        if not delta:
+            return
+
+        def mover(numero):
+            return numero if numero <= linea else max(linea, numero + delta)
+
+        for contenedor in self.contenedores(linea):
+            contenedor.linea_fin = mover(contenedor.linea_fin)
+        posicion = bisect.bisect_left(self.lineas, linea)
+        for bloque in self.bloques[posicion:]:
+            bloque.linea = mover(bloque.linea)
+            bloque.linea_fin = mover(bloque.linea_fin)
+        self.lineas[posicion:] = [bloque.linea for bloque in self.bloques[posicion:]]
+
+def bloques_para(texto):
+    """Trabajo en segundo plano: bloques del texto, reusando los tokens del resaltado"""
+    return unidad_para(texto).bloques()
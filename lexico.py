@@ -1,6 +1,8 @@
 import re
 from enum import Enum
 
+ESPACIOS = re.compile(r'\s+')
+
 # Token types definition
 class TokenType(Enum):
 
@@ -125,7 +127,7 @@ class LexicalAnalyzer:
 
         while position < code_len:
             # Ignorar espacios en blanco
-            match = re.match(r'\s+', code[position:])
+            match = ESPACIOS.match(code, position)
             if match:
                 for char in match.group(0):
                     if char == '\n':
@@ -133,7 +135,7 @@ class LexicalAnalyzer:
                         col_num = 1
                     else:
                         col_num += 1
-                position += match.end()
+                position = match.end()
                 continue
 
             token_found = False
@@ -188,7 +190,8 @@ class LexicalAnalyzer:
 
 
             for pattern, token_type in self.patterns:
-                match = pattern.match(code[position:])
+                # Buscar en la posición sin copiar el resto del código: con copias el análisis es cuadrático
+                match = pattern.match(code, position)
                 if match:
                     lexeme = match.group(0)
                     token_line = line_num
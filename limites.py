@@ -0,0 +1,149 @@
+# limites.py
+
+import json
+import os
+import sys
+import time
+
+from ejecucion import ErrorCompilacion, ErrorEjecucion, LimiteExcedido, formatear
+from entrada_salida import EntradaBuffer, entrada_estandar
+import maquina_registros
+
+# Motivos con los que puede terminar una ejecución limitada
+MOTIVOS = ("completado", "error_compilacion", "error_ejecucion", "error_interno",
+           "limite_instrucciones", "limite_tiempo", "limite_memoria", "limite_salida")
+
+
+def limite_entorno(nombre, conversion):
+    valor = os.environ.get(nombre, "").strip()
+    return conversion(valor) if valor else None
+
+
+class Limites:
+    """Límites para ejecutar programas no confiables; None en un campo significa sin límite.
+
+    instrucciones: instrucciones de la máquina de registros
+    tiempo: segundos de reloj de pared desde que empieza la ejecución
+    memoria: bytes que ocupan en conjunto los valores de las variables
+    salida: caracteres escritos por 'cout', contando el salto de línea de cada valor
+    """
+
+    def __init__(self, instrucciones=None, tiempo=None, memoria=None, salida=None):
+        self.instrucciones = instrucciones
+        self.tiempo = tiempo
+        self.memoria = memoria
+        self.salida = salida
+
+    @classmethod
+    def desde_entorno(cls):
+        return cls(limite_entorno("COMPILADOR_LIMITE_INSTRUCCIONES", int),
+                   limite_entorno("COMPILADOR_LIMITE_TIEMPO", float),
+                   limite_entorno("COMPILADOR_LIMITE_MEMORIA", int),
+                   limite_entorno("COMPILADOR_LIMITE_SALIDA", int))
+
+
+class SalidaLimitada:
+    """Guarda los valores de 'cout' y corta la ejecución al superar el límite de caracteres.
+
+    Si se da un destino, además le pasa cada valor aceptado.
+    """
+
+    def __init__(self, limite=None, destino=None):
+        self.limite = limite
+        self.destino = destino
+        self.valores = []
+        self.caracteres = 0
+
+    def __call__(self, valor):
+        if self.limite is not None:
+            caracteres = self.caracteres + len(formatear(valor)) + 1
+            if caracteres > self.limite:
+                raise LimiteExcedido("salida", f"la salida superó el límite de {self.limite} caracteres")
+            self.caracteres = caracteres
+        self.valores.append(valor)
+        if self.destino is not None:
+            self.destino(valor)
+
+
+class ResultadoEjecucion:
+    """Resultado estructurado de una ejecución limitada.
+
+    salidas tiene lo que el programa escribió antes de terminar, también cuando lo detuvo
+    un error o un límite; motivo es uno de MOTIVOS.
+    """
+
+    def __init__(self, motivo, salidas, error=None, instrucciones=0, tiempo=0.0):
+        self.motivo = motivo
+        self.salidas = salidas
+        self.error = error
+        self.instrucciones = instrucciones
+        self.tiempo = tiempo
+
+    @property
+    def completado(self):
+        return self.motivo == "completado"
+
+    def texto(self):
+        return "".join(formatear(valor) + "\n" for valor in self.salidas)
+
+    def a_diccionario(self):
+        return {
+            "motivo": self.motivo,
+            "salida": [formatear(valor) for valor in self.salidas],
+            "error": None if self.error is None else str(self.error),
+            "linea": getattr(self.error, "line", None),
+            "columna": getattr(self.error, "column", None),
+            "instrucciones": self.instrucciones,
+            "tiempo": self.tiempo,
+        }
+
+
+def ejecutar_limitado(codigo, entrada, limites=None, optimizar=True):
+    """Ejecuta el programa en la máquina de registros respetando los límites.
+
+    entrada es la función de lectura de 'cin' o directamente el texto de entrada. Nunca
+    lanza los errores del programa: todo termina en un ResultadoEjecucion. Los límites se
+    revisan antes de cada salto hacia atrás (el tiempo y la memoria, cada
+    INTERVALO_REVISION instrucciones), así que una sola instrucción muy lenta no se
+    interrumpe.
+    """
+    inicio = time.perf_counter()
+    try:
+        compilado = maquina_registros.compilar(codigo, optimizar, verificar=True)
+    except ErrorCompilacion as e:
+        return ResultadoEjecucion("error_compilacion", [], e, 0, time.perf_counter() - inicio)
+    return ejecutar_compilado(compilado, entrada, limites)
+
+
+def ejecutar_compilado(compilado, entrada, limites=None):
+    """Como ejecutar_limitado para código de registros ya compilado con verificar=True"""
+    limites = limites or Limites.desde_entorno()
+    leer = EntradaBuffer.desde_texto(entrada) if isinstance(entrada, str) else entrada
+    salida = SalidaLimitada(limites.salida)
+    maquina = maquina_registros.MaquinaRegistros(compilado, limites)
+    inicio = time.perf_counter()
+    try:
+        maquina.ejecutar(leer, salida)
+        motivo, error = "completado", None
+    except LimiteExcedido as e:
+        motivo, error = "limite_" + e.motivo, e
+    except ErrorEjecucion as e:
+        motivo, error = "error_ejecucion", e
+    return ResultadoEjecucion(motivo, salida.valores, error, maquina.instrucciones_ejecutadas,
+                              time.perf_counter() - inicio)
+
+
+if __name__ == '__main__':
+    # python limites.py programa [resultado.json]; los límites se toman de COMPILADOR_LIMITE_*
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        fuente_programa = f.read()
+    resultado = ejecutar_limitado(fuente_programa, entrada_estandar())
+    sys.stdout.write(resultado.texto())
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], "w", encoding="utf-8") as f:
+            json.dump(resultado.a_diccionario(), f, indent=2, ensure_ascii=False)
+    if resultado.error is not None:
+        print(resultado.error, file=sys.stderr)
+    print(f"Terminó: {resultado.motivo} ({resultado.instrucciones} instrucciones, "
+          f"{resultado.tiempo * 1000:.3f} ms)", file=sys.stderr)
+    sys.exit(0 if resultado.completado else 1)
@@ -0,0 +1,463 @@
+# maquina_registros.py
+
+import heapq
+import os
+import sys
+import time
+
+from ejecucion import (ErrorCompilacion, ErrorEjecucion, LimiteExcedido, VALORES_INICIALES, TIPOS_VALOR,
+                       leer_valor, potencia, clave_constante)
+from codigo_intermedio import OPERADORES_RELACIONALES, variable_original, anotar_tipos
+from optimizador_ir import GrafoFlujo, calcular_vivas
+from entrada_salida import entrada_estandar, salida_estandar
+import maquina_virtual
+
+# Máquina que se usa cuando no se elige una explícitamente: "pila" o "registros"
+MAQUINA_POR_DEFECTO = os.environ.get("COMPILADOR_MAQUINA", "pila")
+
+# Códigos de operación de la máquina de registros. Cada instrucción es una tupla
+# (opcode, función o tipo, destino, a, b) donde destino, a y b son casillas del marco;
+# en los saltos el destino es el índice de la instrucción siguiente
+OPERAR, COPIAR, NEGAR, CONVERTIR, LEER, ESCRIBIR, SALTAR, SALTAR_SI_FALSO, SALTAR_SI_VERDADERO, \
+    COMPARAR_SALTAR_SI_FALSO, COMPARAR_SALTAR_SI_VERDADERO, FIN = range(12)
+
+# Operaciones con operandos numéricos de tipo conocido: el intérprete las hace en línea
+# en lugar de llamar a la función del operador
+SUMAR, RESTAR, MULTIPLICAR, SALTAR_SI_NO_MENOR = range(12, 16)
+
+# Revisión de los límites de ejecución; solo se emite antes de los saltos hacia atrás
+# cuando se compila para ejecutar con límites
+VERIFICAR = 16
+
+# Instrucciones entre dos revisiones del tiempo y la memoria
+INTERVALO_REVISION = 4096
+
+# Lo que entrega MaquinaRegistros.pasos al detenerse: espera el siguiente token de 'cin'
+# o cede el turno tras una revisión de los límites
+PEDIR_ENTRADA = "entrada"
+CEDER = "ceder"
+
+# En el código verificado, bits que puede tener como máximo el resultado de una
+# multiplicación o potencia de enteros: son las operaciones que hacen crecer un entero
+# tan rápido que una sola instrucción podría agotar la memoria o el tiempo
+BITS_ENTERO_MAXIMO = int(os.environ.get("COMPILADOR_BITS_ENTERO", "1048576"))
+
+NOMBRES_OPCODES = ["OPERAR", "COPIAR", "NEGAR", "CONVERTIR", "LEER", "ESCRIBIR", "SALTAR", "SALTAR_SI_FALSO",
+                   "SALTAR_SI_VERDADERO", "COMPARAR_SALTAR_SI_FALSO", "COMPARAR_SALTAR_SI_VERDADERO", "FIN",
+                   "SUMAR", "RESTAR", "MULTIPLICAR", "SALTAR_SI_NO_MENOR", "VERIFICAR"]
+
+SALTOS = {SALTAR, SALTAR_SI_FALSO, SALTAR_SI_VERDADERO, COMPARAR_SALTAR_SI_FALSO, COMPARAR_SALTAR_SI_VERDADERO,
+          SALTAR_SI_NO_MENOR}
+OPERACIONES_EN_LINEA = {"+": SUMAR, "-": RESTAR, "*": MULTIPLICAR}
+NUMERICOS = {"int", "float"}
+
+SALTOS_CONDICIONALES = {"si_falso": (SALTAR_SI_FALSO, COMPARAR_SALTAR_SI_FALSO),
+                        "si_verdadero": (SALTAR_SI_VERDADERO, COMPARAR_SALTAR_SI_VERDADERO)}
+
+
+def multiplicar_acotado(a, b):
+    if type(a) is int and type(b) is int and a.bit_length() + b.bit_length() > BITS_ENTERO_MAXIMO:
+        raise LimiteExcedido("memoria", f"el resultado de la multiplicación supera los {BITS_ENTERO_MAXIMO} bits")
+    return a * b
+
+
+def potencia_acotada(a, b):
+    if type(a) is int and type(b) is int and b > 0 and (abs(a).bit_length() - 1) * b > BITS_ENTERO_MAXIMO:
+        raise LimiteExcedido("memoria", f"el resultado de la potencia supera los {BITS_ENTERO_MAXIMO} bits")
+    return potencia(a, b)
+
+
+# Operaciones que el código verificado hace con su versión acotada salvo entre reales
+OPERACIONES_ACOTADAS = {"*": multiplicar_acotado, "^": potencia_acotada}
+
+
+class CodigoRegistros:
+    """Código de la máquina de registros y el contenido inicial de su marco"""
+
+    def __init__(self, codigo, posiciones, marco_inicial, nombres):
+        self.codigo = codigo
+        self.posiciones = posiciones          # (línea, columna) de cada instrucción
+        self.marco_inicial = marco_inicial    # valores iniciales y constantes
+        self.nombres = nombres                # nombres que comparten cada casilla
+
+    def __str__(self):
+        lineas = []
+        for indice, (opcode, extra, destino, a, b) in enumerate(self.codigo):
+            if opcode in SALTOS or opcode == VERIFICAR:
+                partes = [] if destino is None else [f"-> {destino}"]
+            else:
+                partes = [] if destino is None else [f"r{destino}"]
+            partes += [f"r{casilla}" for casilla in (a, b) if casilla is not None]
+            if extra is not None:
+                partes.append(maquina_virtual.SIMBOLOS_BINARIOS.get(extra, getattr(extra, "__name__", extra)))
+            lineas.append(f"{indice:>5} {NOMBRES_OPCODES[opcode]:<30} {' '.join(map(str, partes))}")
+        lineas.append("")
+        for casilla, nombres in enumerate(self.nombres):
+            lineas.append(f"   r{casilla} = {' / '.join(nombres)}")
+        return "\n".join(lineas)
+
+
+def intervalos_de_vida(programa):
+    """Intervalo [primera, última] posición en la que cada nombre está vivo.
+
+    Las posiciones son las de las instrucciones en orden; un nombre vivo a la entrada o a la
+    salida de un bloque cubre también su inicio o su final, lo que hace que los valores que
+    cruzan un ciclo ocupen el ciclo completo.
+    """
+    grafo = GrafoFlujo(list(programa.instrucciones))
+    vivas_salida = calcular_vivas(grafo)
+    intervalos = {}
+
+    def extender(nombre, posicion):
+        actual = intervalos.get(nombre)
+        if actual is None:
+            intervalos[nombre] = [posicion, posicion]
+        elif posicion < actual[0]:
+            actual[0] = posicion
+        elif posicion > actual[1]:
+            actual[1] = posicion
+
+    posicion = 0
+    for bloque in grafo.bloques:
+        inicio = posicion
+        fin = posicion + max(len(bloque.instrucciones), 1) - 1
+        vivas = set(vivas_salida[bloque.indice])
+        for nombre in vivas:
+            extender(nombre, fin)
+        for desplazamiento in range(len(bloque.instrucciones) - 1, -1, -1):
+            instruccion = bloque.instrucciones[desplazamiento]
+            if instruccion.destino is not None:
+                extender(instruccion.destino, inicio + desplazamiento)
+                vivas.discard(instruccion.destino)
+            for nombre in instruccion.usos():
+                extender(nombre, inicio + desplazamiento)
+                vivas.add(nombre)
+        for nombre in vivas:
+            extender(nombre, inicio)
+        posicion = fin + 1
+    return grafo.instrucciones(), intervalos
+
+
+def asignar_casillas(intervalos):
+    """Asignación por barrido lineal: dos nombres comparten casilla si sus intervalos no se cruzan.
+
+    Como no hay límite de casillas nunca hace falta desalojar; devuelve {nombre: casilla}
+    y el número de casillas usadas.
+    """
+    activos = []        # (fin, casilla)
+    libres = []
+    casillas = {}
+    total = 0
+    for nombre, (inicio, fin) in sorted(intervalos.items(), key=lambda par: (par[1][0], par[1][1], par[0])):
+        while activos and activos[0][0] < inicio:
+            heapq.heappush(libres, heapq.heappop(activos)[1])
+        if libres:
+            casilla = heapq.heappop(libres)
+        else:
+            casilla = total
+            total += 1
+        casillas[nombre] = casilla
+        heapq.heappush(activos, (fin, casilla))
+    return casillas, total
+
+
+class EnsambladorRegistros:
+    """Traduce el código de tres direcciones a código de la máquina de registros.
+
+    Con verificar, cada salto hacia atrás va precedido de una instrucción VERIFICAR: todo
+    ciclo pasa por una, así que basta con revisar los límites ahí.
+    """
+
+    def __init__(self, programa, verificar=False):
+        self.programa = programa
+        self.verificar = verificar
+        self.codigo = []
+        self.posiciones = []
+        self.estadisticas = {}
+
+    def ensamblar(self):
+        instrucciones, intervalos = intervalos_de_vida(self.programa)
+        casillas, total = asignar_casillas(intervalos)
+        self.casillas = casillas
+        self.marco = [None] * total
+        self.nombres = [[] for _ in range(total)]
+        for nombre, casilla in casillas.items():
+            self.nombres[casilla].append(nombre)
+            if intervalos[nombre][0] == 0:
+                # Vivo desde el inicio: se lee antes de escribirse, empieza con su valor inicial
+                tipo = self.programa.declaraciones.get(variable_original(nombre))
+                self.marco[casilla] = VALORES_INICIALES.get(tipo, 0)
+        self.indices_constantes = {}
+        self.estadisticas = {"nombres": len(casillas), "casillas": total, "especializadas": 0,
+                             "conversiones_eliminadas": 0, "verificaciones": 0}
+        tipos = anotar_tipos(self.programa)
+
+        usos = {}
+        for instruccion in instrucciones:
+            for nombre in instruccion.usos():
+                usos[nombre] = usos.get(nombre, 0) + 1
+
+        etiquetas = {}
+        pendientes = []
+        indice = 0
+        while indice < len(instrucciones):
+            instruccion = instrucciones[indice]
+            siguiente = instrucciones[indice + 1] if indice + 1 < len(instrucciones) else None
+            op = instruccion.op
+            posicion = (instruccion.line, instruccion.column)
+            if op == "etiqueta":
+                etiquetas[instruccion.arg1] = len(self.codigo)
+            elif op == "saltar":
+                pendientes.append(len(self.codigo))
+                if self.verificar and instruccion.arg1 in etiquetas:
+                    # Salto hacia atrás incondicional: la verificación misma hace el salto
+                    self.emitir((VERIFICAR, None, instruccion.arg1, None, None),
+                                self.posicion_verificacion(instruccion.arg1, etiquetas, posicion))
+                    self.estadisticas["verificaciones"] += 1
+                else:
+                    self.emitir((SALTAR, None, instruccion.arg1, None, None), posicion)
+            elif op in SALTOS_CONDICIONALES:
+                self.verificar_salto(instruccion.arg2, etiquetas, posicion)
+                pendientes.append(len(self.codigo))
+                simple, _ = SALTOS_CONDICIONALES[op]
+                self.emitir((simple, None, instruccion.arg2, self.operando(instruccion.arg1), None), posicion)
+            elif op in OPERADORES_RELACIONALES and siguiente is not None and siguiente.op in SALTOS_CONDICIONALES \
+                    and siguiente.arg1 == instruccion.destino and usos.get(instruccion.destino) == 1:
+                # La comparación solo alimenta al salto: se hacen en una sola instrucción
+                _, fusionado = SALTOS_CONDICIONALES[siguiente.op]
+                tipo1, tipo2 = maquina_virtual.tipos_operandos(instruccion, tipos)
+                extra = maquina_virtual.funcion_especializada(op, tipo1, tipo2)
+                if op == "<" and siguiente.op == "si_falso" and {tipo1, tipo2} <= NUMERICOS:
+                    fusionado, extra = SALTAR_SI_NO_MENOR, None
+                    self.estadisticas["especializadas"] += 1
+                self.verificar_salto(siguiente.arg2, etiquetas, posicion)
+                pendientes.append(len(self.codigo))
+                self.emitir((fusionado, extra, siguiente.arg2, self.operando(instruccion.arg1),
+                             self.operando(instruccion.arg2)), posicion)
+                indice += 1
+            elif op == "copiar":
+                destino, origen = self.casillas[instruccion.destino], self.operando(instruccion.arg1)
+                if destino != origen:
+                    self.emitir((COPIAR, None, destino, origen, None), posicion)
+            elif op == "!":
+                self.emitir((NEGAR, None, self.casillas[instruccion.destino], self.operando(instruccion.arg1),
+                             None), posicion)
+            elif op == "convertir":
+                destino, origen = self.casillas[instruccion.destino], self.operando(instruccion.arg1)
+                if maquina_virtual.tipos_operandos(instruccion, tipos)[0] == instruccion.arg2:
+                    # El valor ya tiene el tipo destino: la conversión es una copia
+                    self.estadisticas["conversiones_eliminadas"] += 1
+                    if destino != origen:
+                        self.emitir((COPIAR, None, destino, origen, None), posicion)
+                else:
+                    self.emitir((CONVERTIR, TIPOS_VALOR[instruccion.arg2], destino, origen, None), posicion)
+            elif op == "leer":
+                self.emitir((LEER, instruccion.arg1, self.casillas[instruccion.destino], None, None), posicion)
+            elif op == "escribir":
+                origen = self.constante(instruccion.arg1) if instruccion.arg2 else self.operando(instruccion.arg1)
+                self.emitir((ESCRIBIR, None, None, origen, None), posicion)
+            else:
+                tipo1, tipo2 = maquina_virtual.tipos_operandos(instruccion, tipos)
+                operandos = (self.casillas[instruccion.destino], self.operando(instruccion.arg1),
+                             self.operando(instruccion.arg2))
+                if self.verificar and op in OPERACIONES_ACOTADAS and "float" not in (tipo1, tipo2) \
+                        and (op == "^" or isinstance(instruccion.arg1, str) and isinstance(instruccion.arg2, str)):
+                    # Multiplicar por una constante solo suma sus bits: crece como una suma
+                    self.emitir((OPERAR, OPERACIONES_ACOTADAS[op]) + operandos, posicion)
+                elif op in OPERACIONES_EN_LINEA and {tipo1, tipo2} <= NUMERICOS:
+                    self.emitir((OPERACIONES_EN_LINEA[op], None) + operandos, posicion)
+                    self.estadisticas["especializadas"] += 1
+                else:
+                    funcion = maquina_virtual.funcion_especializada(op, tipo1, tipo2, instruccion.arg2)
+                    if funcion is not maquina_virtual.FUNCIONES_BINARIAS[op]:
+                        self.estadisticas["especializadas"] += 1
+                    self.emitir((OPERAR, funcion) + operandos, posicion)
+            indice += 1
+        self.emitir((FIN, None, None, None, None), (None, None))
+
+        for indice in pendientes:
+            opcode, extra, etiqueta, a, b = self.codigo[indice]
+            self.codigo[indice] = (opcode, extra, etiquetas[etiqueta], a, b)
+        self.estadisticas["constantes"] = len(self.indices_constantes)
+        return CodigoRegistros(self.codigo, self.posiciones, self.marco, self.nombres)
+
+    def emitir(self, instruccion, posicion):
+        self.codigo.append(instruccion)
+        self.posiciones.append(posicion)
+
+    def verificar_salto(self, etiqueta, etiquetas, posicion):
+        # La etiqueta ya está ubicada: el salto vuelve hacia atrás y puede cerrar un ciclo
+        if self.verificar and etiqueta in etiquetas:
+            self.emitir((VERIFICAR, None, None, None, None), self.posicion_verificacion(etiqueta, etiquetas, posicion))
+            self.estadisticas["verificaciones"] += 1
+
+    def posicion_verificacion(self, etiqueta, etiquetas, posicion):
+        # Los saltos sin posición propia (while true) toman la de la cabecera del ciclo
+        destino = etiquetas[etiqueta]
+        if posicion[0] is None and destino < len(self.posiciones):
+            return self.posiciones[destino]
+        return posicion
+
+    def constante(self, valor):
+        # Las constantes ocupan casillas propias al final del marco
+        clave = clave_constante(valor)
+        if clave not in self.indices_constantes:
+            self.indices_constantes[clave] = len(self.marco)
+            self.marco.append(valor)
+            self.nombres.append([repr(valor)])
+        return self.indices_constantes[clave]
+
+    def operando(self, operando):
+        return self.casillas[operando] if isinstance(operando, str) else self.constante(operando)
+
+
+class MaquinaRegistros:
+    """Intérprete del código de registros: cada instrucción lee y escribe casillas del marco.
+
+    limites (opcional) tiene los atributos instrucciones, tiempo (segundos) y memoria (bytes
+    ocupados por el marco), cada uno None si no se limita. Solo se revisan en las
+    instrucciones VERIFICAR, por lo que el código debe compilarse con verificar=True.
+    """
+
+    def __init__(self, codigo, limites=None):
+        self.codigo = codigo
+        self.limites = limites
+        self.vencimiento = None
+        self.intervalo_revision = INTERVALO_REVISION
+        self.instrucciones_ejecutadas = 0
+
+    def ejecutar(self, leer, escribir):
+        for _ in self.pasos(leer, escribir):
+            pass
+
+    def pasos(self, leer, escribir, ceder=False):
+        """Generador que ejecuta el programa deteniéndose solo cuando hace falta.
+
+        Sin función de lectura (leer None) entrega PEDIR_ENTRADA en cada 'cin' y espera
+        que se le envíe el token con send(). Con ceder entrega CEDER en cada revisión de
+        los límites, es decir cada intervalo_revision instrucciones como mucho dentro de
+        un ciclo. Así lo puede conducir un bucle de eventos sin ocupar un hilo.
+        """
+        codigo = self.codigo.codigo
+        r = list(self.codigo.marco_inicial)
+        pc = 0
+        contador = 0
+        proxima_revision = self.iniciar_limites(ceder)
+        try:
+            while True:
+                opcode, extra, destino, a, b = codigo[pc]
+                pc += 1
+                contador += 1
+                if opcode == SUMAR:
+                    r[destino] = r[a] + r[b]
+                elif opcode == SALTAR_SI_NO_MENOR:
+                    if not r[a] < r[b]:
+                        pc = destino
+                elif opcode == OPERAR:
+                    r[destino] = extra(r[a], r[b])
+                elif opcode == RESTAR:
+                    r[destino] = r[a] - r[b]
+                elif opcode == MULTIPLICAR:
+                    r[destino] = r[a] * r[b]
+                elif opcode == COMPARAR_SALTAR_SI_FALSO:
+                    if not extra(r[a], r[b]):
+                        pc = destino
+                elif opcode == COPIAR:
+                    r[destino] = r[a]
+                elif opcode == SALTAR:
+                    pc = destino
+                elif opcode == COMPARAR_SALTAR_SI_VERDADERO:
+                    if extra(r[a], r[b]):
+                        pc = destino
+                elif opcode == SALTAR_SI_FALSO:
+                    if not r[a]:
+                        pc = destino
+                elif opcode == SALTAR_SI_VERDADERO:
+                    if r[a]:
+                        pc = destino
+                elif opcode == CONVERTIR:
+                    r[destino] = extra(r[a])
+                elif opcode == NEGAR:
+                    r[destino] = not r[a]
+                elif opcode == LEER:
+                    r[destino] = leer_valor(leer() if leer is not None else (yield PEDIR_ENTRADA), extra)
+                elif opcode == ESCRIBIR:
+                    escribir(r[a])
+                elif opcode == VERIFICAR:
+                    if contador >= proxima_revision:
+                        proxima_revision = self.revisar_limites(r, contador)
+                        if ceder:
+                            yield CEDER
+                    if destino is not None:
+                        pc = destino
+                else:
+                    break
+        except ErrorEjecucion as e:
+            if e.line is None:
+                e.line, e.column = self.codigo.posiciones[pc - 1]
+            raise
+        except (ZeroDivisionError, ValueError, OverflowError, TypeError) as e:
+            line, column = self.codigo.posiciones[pc - 1]
+            raise ErrorEjecucion(str(e), line, column) from e
+        finally:
+            self.instrucciones_ejecutadas = contador
+
+    def iniciar_limites(self, ceder=False):
+        """Cantidad de instrucciones a la que se hace la primera revisión de los límites"""
+        limites = self.limites
+        if limites is None:
+            return self.intervalo_revision if ceder else float("inf")
+        if limites.tiempo is not None:
+            self.vencimiento = time.perf_counter() + limites.tiempo
+        if limites.instrucciones is not None:
+            return min(self.intervalo_revision, limites.instrucciones)
+        return self.intervalo_revision
+
+    def revisar_limites(self, r, contador):
+        """Lanza LimiteExcedido si se superó algún límite; si no, devuelve la próxima revisión"""
+        limites = self.limites
+        siguiente = contador + self.intervalo_revision
+        if limites is None:
+            return siguiente
+        if limites.instrucciones is not None and contador >= limites.instrucciones:
+            raise LimiteExcedido("instrucciones", f"se superó el límite de {limites.instrucciones} instrucciones")
+        if self.vencimiento is not None and time.perf_counter() >= self.vencimiento:
+            raise LimiteExcedido("tiempo", f"se superó el límite de {limites.tiempo:g} segundos")
+        if limites.memoria is not None and sum(map(sys.getsizeof, r)) > limites.memoria:
+            raise LimiteExcedido("memoria", f"las variables superaron el límite de {limites.memoria} bytes")
+        if limites.instrucciones is not None:
+            return min(siguiente, limites.instrucciones)
+        return siguiente
+
+
+def compilar(codigo, optimizar=True, verificar=False):
+    return EnsambladorRegistros(maquina_virtual.compilar_intermedio(codigo, optimizar), verificar).ensamblar()
+
+
+MAQUINAS = {
+    "pila": (maquina_virtual.compilar, maquina_virtual.MaquinaPila),
+    "registros": (compilar, MaquinaRegistros),
+}
+
+
+def ejecutar(codigo, leer, escribir, optimizar=True, maquina=None):
+    """Ejecuta el programa en la máquina elegida ("pila" o "registros") y la devuelve"""
+    nombre = maquina or MAQUINA_POR_DEFECTO
+    if nombre not in MAQUINAS:
+        raise ValueError(f"Máquina desconocida '{nombre}'; se esperaba una de: {', '.join(MAQUINAS)}")
+    compilador, clase = MAQUINAS[nombre]
+    instancia = clase(compilador(codigo, optimizar))
+    instancia.ejecutar(leer, escribir)
+    return instancia
+
+
+if __name__ == '__main__':
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        fuente_programa = f.read()
+    try:
+        with salida_estandar() as escribir:
+            ejecutar(fuente_programa, entrada_estandar(), escribir,
+                     maquina=sys.argv[2] if len(sys.argv) > 2 else None)
+    except (ErrorCompilacion, ErrorEjecucion) as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
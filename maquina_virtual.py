@@ -0,0 +1,535 @@
+# maquina_virtual.py
+
+import operator
+import sys
+
+from ejecucion import (ErrorCompilacion, ErrorEjecucion, VALORES_INICIALES, analizar_programa,
+                       convertir, leer_valor, dividir, modulo, potencia, resto_mascara,
+                       dividir_enteros, dividir_reales, modulo_enteros, modulo_reales, tipo_constante,
+                       clave_constante)
+from codigo_intermedio import PREFIJO_TEMPORAL, generar_intermedio, anotar_tipos
+from optimizador_ast import optimizar as optimizar_ast
+from optimizador_ir import optimizar_intermedio
+from ssa import optimizar_ssa
+from optimizador_lazos import optimizar_lazos
+from entrada_salida import entrada_estandar, salida_estandar
+
+# Códigos de operación de la máquina de pila
+CARGAR_VAR, CARGAR_CONST, GUARDAR, BINARIA, NEGAR, CONVERTIR, LEER, ESCRIBIR, \
+    SALTAR, SALTAR_SI_FALSO, SALTAR_SI_VERDADERO, FIN = range(12)
+
+# Superinstrucciones que genera el optimizador de mirilla. Trabajan directamente sobre la
+# memoria: V es una casilla y C una constante (el valor, no su índice)
+OPERAR_VV, OPERAR_VC, OPERAR_CV, INCREMENTAR, COPIAR_VAR, COPIAR_CONST, \
+    SALTAR_SI_FALSO_VAR, SALTAR_SI_VERDADERO_VAR, SALTAR_SI_FALSO_VV, SALTAR_SI_FALSO_VC, \
+    SALTAR_SI_VERDADERO_VV, SALTAR_SI_VERDADERO_VC, BINARIA_VAR, BINARIA_CONST = range(12, 26)
+
+NOMBRES_OPCODES = ["CARGAR_VAR", "CARGAR_CONST", "GUARDAR", "BINARIA", "NEGAR", "CONVERTIR", "LEER",
+                   "ESCRIBIR", "SALTAR", "SALTAR_SI_FALSO", "SALTAR_SI_VERDADERO", "FIN",
+                   "OPERAR_VV", "OPERAR_VC", "OPERAR_CV", "INCREMENTAR", "COPIAR_VAR", "COPIAR_CONST",
+                   "SALTAR_SI_FALSO_VAR", "SALTAR_SI_VERDADERO_VAR", "SALTAR_SI_FALSO_VV",
+                   "SALTAR_SI_FALSO_VC", "SALTAR_SI_VERDADERO_VV", "SALTAR_SI_VERDADERO_VC", "BINARIA_VAR",
+                   "BINARIA_CONST"]
+
+# Saltos cuyo argumento es el destino
+SALTOS_SIMPLES = {SALTAR, SALTAR_SI_FALSO, SALTAR_SI_VERDADERO}
+# Superinstrucciones de salto: el destino es el último elemento de la tupla argumento
+SALTOS_FUSIONADOS = {SALTAR_SI_FALSO_VAR, SALTAR_SI_VERDADERO_VAR, SALTAR_SI_FALSO_VV, SALTAR_SI_FALSO_VC,
+                     SALTAR_SI_VERDADERO_VV, SALTAR_SI_VERDADERO_VC}
+
+FUNCIONES_BINARIAS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": dividir,
+    "%": modulo,
+    "^": potencia,
+    "<": operator.lt,
+    ">": operator.gt,
+    "<=": operator.le,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "&&": lambda a, b: bool(a and b),
+    "||": lambda a, b: bool(a or b),
+    "&": resto_mascara,
+}
+
+# Versiones sin comprobaciones de tipo para cuando el de ambos operandos se conoce al compilar:
+# la división y el resto solo son enteros con dos int
+TIPOS_ESTATICOS = ("int", "float", "bool")
+FUNCIONES_ESPECIALIZADAS = {
+    (op, izquierdo, derecho): (enteros if izquierdo == derecho == "int" else reales)
+    for op, enteros, reales in (("/", dividir_enteros, dividir_reales), ("%", modulo_enteros, modulo_reales))
+    for izquierdo in TIPOS_ESTATICOS for derecho in TIPOS_ESTATICOS
+}
+FUNCIONES_ESPECIALIZADAS[("&&", "bool", "bool")] = operator.and_
+FUNCIONES_ESPECIALIZADAS[("||", "bool", "bool")] = operator.or_
+
+SIMBOLOS_BINARIOS = {funcion: simbolo for simbolo, funcion in FUNCIONES_BINARIAS.items()}
+SIMBOLOS_BINARIOS.update({dividir_enteros: "/int", dividir_reales: "/float", modulo_enteros: "%int",
+                          modulo_reales: "%float", operator.and_: "&&bool", operator.or_: "||bool",
+                          operator.pow: "^int"})
+
+OPCODES_SALTO = {"saltar": SALTAR, "si_falso": SALTAR_SI_FALSO, "si_verdadero": SALTAR_SI_VERDADERO}
+
+# (opcode de la comparación con casillas, opcode con constante) para cada salto condicional
+SALTOS_COMPARACION = {SALTAR_SI_FALSO: (SALTAR_SI_FALSO_VV, SALTAR_SI_FALSO_VC),
+                      SALTAR_SI_VERDADERO: (SALTAR_SI_VERDADERO_VV, SALTAR_SI_VERDADERO_VC)}
+SALTOS_VARIABLE = {SALTAR_SI_FALSO: SALTAR_SI_FALSO_VAR, SALTAR_SI_VERDADERO: SALTAR_SI_VERDADERO_VAR}
+
+
+def funcion_especializada(op, tipo1, tipo2, arg2=None):
+    """Función para el operador binario según el tipo estático de sus operandos"""
+    if op == "^" and tipo1 == tipo2 == "int" and type(arg2) is int and arg2 >= 0:
+        # Exponente constante no negativo: la potencia de enteros es exacta
+        return operator.pow
+    return FUNCIONES_ESPECIALIZADAS.get((op, tipo1, tipo2), FUNCIONES_BINARIAS[op])
+
+
+def tipos_operandos(instruccion, tipos):
+    """Tipo estático de los dos operandos de una instrucción (None si no se conoce)"""
+    return tuple(tipos.get(arg) if isinstance(arg, str) else tipo_constante(arg)
+                 for arg in (instruccion.arg1, instruccion.arg2))
+
+
+def destino_salto(opcode, argumento):
+    """Índice al que salta la instrucción, o None si no es un salto"""
+    if opcode in SALTOS_SIMPLES:
+        return argumento
+    if opcode in SALTOS_FUSIONADOS:
+        return argumento[-1]
+    return None
+
+
+def con_destino(opcode, argumento, destino):
+    if opcode in SALTOS_SIMPLES:
+        return opcode, destino
+    return opcode, argumento[:-1] + (destino,)
+
+
+class Bytecode:
+    """Código de la máquina de pila: lista de pares (opcode, argumento) y tablas auxiliares"""
+
+    def __init__(self, codigo, posiciones, constantes, nombres, valores_iniciales):
+        self.codigo = codigo
+        self.posiciones = posiciones          # (línea, columna) de cada instrucción
+        self.constantes = constantes
+        self.nombres = nombres                # nombre de cada casilla de memoria
+        self.valores_iniciales = valores_iniciales
+
+    def __str__(self):
+        lineas = []
+        for indice, (opcode, argumento) in enumerate(self.codigo):
+            lineas.append(f"{indice:>5} {NOMBRES_OPCODES[opcode]:<24} {self.detalle(opcode, argumento)}")
+        return "\n".join(lineas)
+
+    def detalle(self, opcode, argumento):
+        if opcode in (CARGAR_VAR, GUARDAR):
+            return self.nombres[argumento]
+        if opcode == CARGAR_CONST:
+            return repr(self.constantes[argumento])
+        if opcode == BINARIA:
+            return SIMBOLOS_BINARIOS[argumento]
+        if opcode < OPERAR_VV:
+            return "" if argumento is None else repr(argumento)
+        # Superinstrucciones: casillas por nombre, funciones por símbolo y el destino del salto al final
+        partes = []
+        for posicion, valor in enumerate(argumento):
+            if callable(valor):
+                partes.append(SIMBOLOS_BINARIOS[valor])
+            elif opcode in SALTOS_FUSIONADOS and posicion == len(argumento) - 1:
+                partes.append(f"-> {valor}")
+            elif self.es_casilla(opcode, posicion):
+                partes.append(self.nombres[valor])
+            else:
+                partes.append(repr(valor))
+        return " ".join(partes)
+
+    @staticmethod
+    def es_casilla(opcode, posicion):
+        if opcode in (OPERAR_VC, SALTAR_SI_FALSO_VC, SALTAR_SI_VERDADERO_VC):
+            return posicion != 1
+        if opcode in (OPERAR_CV, COPIAR_CONST):
+            return posicion != 0
+        if opcode in (INCREMENTAR, BINARIA_VAR):
+            return posicion == 0
+        return opcode != BINARIA_CONST
+
+
+class EnsambladorPila:
+    """Traduce el código de tres direcciones a bytecode para la máquina de pila"""
+
+    def __init__(self, programa):
+        self.programa = programa
+        self.codigo = []
+        self.posiciones = []
+        self.constantes = []
+        self.indices_constantes = {}
+        self.casillas = {}
+        self.nombres = []
+
+    def ensamblar(self):
+        for nombre in self.programa.declaraciones:
+            self.casilla(nombre)
+        tipos = anotar_tipos(self.programa)
+
+        etiquetas = {}
+        pendientes = []
+        for instruccion in self.programa.instrucciones:
+            op = instruccion.op
+            posicion = (instruccion.line, instruccion.column)
+            if op == "etiqueta":
+                etiquetas[instruccion.arg1] = len(self.codigo)
+            elif op == "saltar":
+                pendientes.append(len(self.codigo))
+                self.emitir(SALTAR, instruccion.arg1, posicion)
+            elif op in ("si_falso", "si_verdadero"):
+                self.cargar(instruccion.arg1, posicion)
+                pendientes.append(len(self.codigo))
+                self.emitir(OPCODES_SALTO[op], instruccion.arg2, posicion)
+            elif op == "copiar":
+                self.cargar(instruccion.arg1, posicion)
+                self.emitir(GUARDAR, self.casilla(instruccion.destino), posicion)
+            elif op == "!":
+                self.cargar(instruccion.arg1, posicion)
+                self.emitir(NEGAR, None, posicion)
+                self.emitir(GUARDAR, self.casilla(instruccion.destino), posicion)
+            elif op == "convertir":
+                self.cargar(instruccion.arg1, posicion)
+                self.emitir(CONVERTIR, instruccion.arg2, posicion)
+                self.emitir(GUARDAR, self.casilla(instruccion.destino), posicion)
+            elif op == "leer":
+                self.emitir(LEER, instruccion.arg1, posicion)
+                self.emitir(GUARDAR, self.casilla(instruccion.destino), posicion)
+            elif op == "escribir":
+                if instruccion.arg2:
+                    self.emitir(CARGAR_CONST, self.constante(instruccion.arg1), posicion)
+                else:
+                    self.cargar(instruccion.arg1, posicion)
+                self.emitir(ESCRIBIR, None, posicion)
+            else:
+                self.cargar(instruccion.arg1, posicion)
+                self.cargar(instruccion.arg2, posicion)
+                funcion = funcion_especializada(op, *tipos_operandos(instruccion, tipos), instruccion.arg2)
+                self.emitir(BINARIA, funcion, posicion)
+                self.emitir(GUARDAR, self.casilla(instruccion.destino), posicion)
+        self.emitir(FIN, None, (None, None))
+
+        # Resolver los destinos de los saltos una vez conocidas todas las etiquetas
+        for indice in pendientes:
+            opcode, etiqueta = self.codigo[indice]
+            self.codigo[indice] = (opcode, etiquetas[etiqueta])
+
+        valores_iniciales = [VALORES_INICIALES.get(self.programa.declaraciones.get(nombre), 0)
+                             for nombre in self.nombres]
+        return Bytecode(self.codigo, self.posiciones, self.constantes, self.nombres, valores_iniciales)
+
+    def emitir(self, opcode, argumento, posicion):
+        self.codigo.append((opcode, argumento))
+        self.posiciones.append(posicion)
+
+    def casilla(self, nombre):
+        if nombre not in self.casillas:
+            self.casillas[nombre] = len(self.nombres)
+            self.nombres.append(nombre)
+        return self.casillas[nombre]
+
+    def constante(self, valor):
+        clave = clave_constante(valor)
+        if clave not in self.indices_constantes:
+            self.indices_constantes[clave] = len(self.constantes)
+            self.constantes.append(valor)
+        return self.indices_constantes[clave]
+
+    def cargar(self, operando, posicion):
+        if isinstance(operando, str):
+            self.emitir(CARGAR_VAR, self.casilla(operando), posicion)
+        else:
+            self.emitir(CARGAR_CONST, self.constante(operando), posicion)
+
+
+class OptimizadorMirilla:
+    """Optimizador de mirilla del bytecode de pila.
+
+    Encadena saltos, quita pares guardar/cargar redundantes y fusiona secuencias frecuentes
+    en superinstrucciones. Ninguna secuencia fusionada contiene el destino de un salto
+    salvo en su primera instrucción.
+    """
+
+    def __init__(self, bytecode):
+        self.bytecode = bytecode
+        self.codigo = list(bytecode.codigo)
+        self.posiciones = list(bytecode.posiciones)
+        self.cargas = [0] * len(bytecode.nombres)
+        self.estadisticas = {"saltos_encadenados": 0, "saltos_eliminados": 0, "pares_redundantes": 0,
+                             "superinstrucciones": 0}
+
+    def optimizar(self):
+        self.encadenar_saltos()
+        for opcode, argumento in self.codigo:
+            if opcode == CARGAR_VAR:
+                self.cargas[argumento] += 1
+        self.reescribir(self.quitar_redundantes)
+        self.reescribir(self.fusionar)
+        bytecode = self.bytecode
+        return Bytecode(self.codigo, self.posiciones, bytecode.constantes, bytecode.nombres,
+                        bytecode.valores_iniciales), self.estadisticas
+
+    def encadenar_saltos(self):
+        """Un salto a otro salto incondicional va directamente al destino final"""
+        for indice, (opcode, argumento) in enumerate(self.codigo):
+            destino = destino_salto(opcode, argumento)
+            if destino is None:
+                continue
+            final = destino
+            vistos = set()
+            while self.codigo[final][0] == SALTAR and final not in vistos:
+                vistos.add(final)
+                final = self.codigo[final][1]
+            if final != destino:
+                self.codigo[indice] = con_destino(opcode, argumento, final)
+                self.estadisticas["saltos_encadenados"] += 1
+
+    def reescribir(self, regla):
+        """Aplica una regla de izquierda a derecha y vuelve a calcular los destinos de los saltos.
+
+        La regla recibe el índice actual y devuelve (instrucciones consumidas, instrucción
+        nueva o None para quitarlas, índice cuya posición de código fuente se conserva).
+        """
+        objetivos = {destino_salto(opcode, argumento) for opcode, argumento in self.codigo}
+        codigo, posiciones = [], []
+        mapa = [0] * len(self.codigo)
+        indice = 0
+        while indice < len(self.codigo):
+            consumidas, nueva, origen = regla(indice, objetivos)
+            for desplazamiento in range(consumidas):
+                mapa[indice + desplazamiento] = len(codigo)
+            if nueva is not None:
+                codigo.append(nueva)
+                posiciones.append(self.posiciones[origen])
+            indice += consumidas
+        for indice, (opcode, argumento) in enumerate(codigo):
+            destino = destino_salto(opcode, argumento)
+            if destino is not None:
+                codigo[indice] = con_destino(opcode, argumento, mapa[destino])
+        self.codigo, self.posiciones = codigo, posiciones
+
+    def es_temporal(self, casilla):
+        return self.bytecode.nombres[casilla].startswith(PREFIJO_TEMPORAL)
+
+    def quitar_redundantes(self, indice, objetivos):
+        opcode, argumento = self.codigo[indice]
+        siguiente = self.codigo[indice + 1] if indice + 1 < len(self.codigo) else (None, None)
+        if opcode == SALTAR and argumento == indice + 1:
+            self.estadisticas["saltos_eliminados"] += 1
+            return 1, None, None
+        if indice + 1 not in objetivos:
+            # El valor se queda en la pila en lugar de pasar por un temporal que nadie más lee
+            if opcode == GUARDAR and siguiente == (CARGAR_VAR, argumento) and self.es_temporal(argumento) \
+                    and self.cargas[argumento] == 1:
+                self.estadisticas["pares_redundantes"] += 1
+                return 2, None, None
+            if opcode == CARGAR_VAR and siguiente == (GUARDAR, argumento):
+                self.estadisticas["pares_redundantes"] += 1
+                return 2, None, None
+        return 1, self.codigo[indice], indice
+
+    def fusionar(self, indice, objetivos):
+        codigo = self.codigo
+        constantes = self.bytecode.constantes
+
+        def ventana(longitud):
+            if indice + longitud > len(codigo):
+                return None
+            if any(indice + k in objetivos for k in range(1, longitud)):
+                return None
+            return codigo[indice:indice + longitud]
+
+        def fusion(consumidas, nueva, origen):
+            self.estadisticas["superinstrucciones"] += 1
+            return consumidas, nueva, indice + origen
+
+        cuatro = ventana(4)
+        if cuatro is not None and cuatro[2][0] == BINARIA:
+            (op1, arg1), (op2, arg2), (_, funcion), (op4, arg4) = cuatro
+            if op4 == GUARDAR:
+                if op1 == CARGAR_VAR and op2 == CARGAR_VAR:
+                    return fusion(4, (OPERAR_VV, (arg1, arg2, funcion, arg4)), 2)
+                if op1 == CARGAR_VAR and op2 == CARGAR_CONST:
+                    constante = constantes[arg2]
+                    if arg1 == arg4 and funcion in (operator.add, operator.sub) \
+                            and type(constante) in (int, float):
+                        # a = a + c (el a++ del analizador) o a = a - c
+                        incremento = constante if funcion is operator.add else -constante
+                        return fusion(4, (INCREMENTAR, (arg1, incremento)), 2)
+                    return fusion(4, (OPERAR_VC, (arg1, constante, funcion, arg4)), 2)
+                if op1 == CARGAR_CONST and op2 == CARGAR_VAR:
+                    return fusion(4, (OPERAR_CV, (constantes[arg1], arg2, funcion, arg4)), 2)
+            elif op4 in SALTOS_COMPARACION and op1 == CARGAR_VAR:
+                con_casillas, con_constante = SALTOS_COMPARACION[op4]
+                if op2 == CARGAR_VAR:
+                    return fusion(4, (con_casillas, (arg1, arg2, funcion, arg4)), 2)
+                if op2 == CARGAR_CONST:
+                    return fusion(4, (con_constante, (arg1, constantes[arg2], funcion, arg4)), 2)
+
+        dos = ventana(2)
+        if dos is not None:
+            (op1, arg1), (op2, arg2) = dos
+            if op1 == CARGAR_VAR and op2 in SALTOS_VARIABLE:
+                return fusion(2, (SALTOS_VARIABLE[op2], (arg1, arg2)), 1)
+            if op2 == GUARDAR and op1 == CARGAR_VAR:
+                return fusion(2, (COPIAR_VAR, (arg1, arg2)), 0)
+            if op2 == GUARDAR and op1 == CARGAR_CONST:
+                return fusion(2, (COPIAR_CONST, (constantes[arg1], arg2)), 0)
+            # El operando izquierdo ya está en la pila (resultado de una subexpresión)
+            if op2 == BINARIA and op1 == CARGAR_VAR:
+                return fusion(2, (BINARIA_VAR, (arg1, arg2)), 1)
+            if op2 == BINARIA and op1 == CARGAR_CONST:
+                return fusion(2, (BINARIA_CONST, (constantes[arg1], arg2)), 1)
+        return 1, codigo[indice], indice
+
+
+class MaquinaPila:
+    """Intérprete del bytecode de pila"""
+
+    def __init__(self, bytecode):
+        self.bytecode = bytecode
+        self.instrucciones_ejecutadas = 0
+
+    def ejecutar(self, leer, escribir):
+        codigo = self.bytecode.codigo
+        constantes = self.bytecode.constantes
+        memoria = list(self.bytecode.valores_iniciales)
+        pila = []
+        push = pila.append
+        pop = pila.pop
+        pc = 0
+        contador = 0
+        try:
+            while True:
+                opcode, argumento = codigo[pc]
+                pc += 1
+                contador += 1
+                if opcode >= OPERAR_VV:
+                    # Superinstrucciones del optimizador de mirilla
+                    if opcode == OPERAR_VC:
+                        a, constante, funcion, destino = argumento
+                        memoria[destino] = funcion(memoria[a], constante)
+                    elif opcode == OPERAR_VV:
+                        a, b, funcion, destino = argumento
+                        memoria[destino] = funcion(memoria[a], memoria[b])
+                    elif opcode == INCREMENTAR:
+                        a, incremento = argumento
+                        memoria[a] = memoria[a] + incremento
+                    elif opcode == SALTAR_SI_FALSO_VC:
+                        a, constante, funcion, destino = argumento
+                        if not funcion(memoria[a], constante):
+                            pc = destino
+                    elif opcode == SALTAR_SI_FALSO_VV:
+                        a, b, funcion, destino = argumento
+                        if not funcion(memoria[a], memoria[b]):
+                            pc = destino
+                    elif opcode == COPIAR_VAR:
+                        memoria[argumento[1]] = memoria[argumento[0]]
+                    elif opcode == BINARIA_VAR:
+                        pila[-1] = argumento[1](pila[-1], memoria[argumento[0]])
+                    elif opcode == BINARIA_CONST:
+                        pila[-1] = argumento[1](pila[-1], argumento[0])
+                    elif opcode == OPERAR_CV:
+                        constante, b, funcion, destino = argumento
+                        memoria[destino] = funcion(constante, memoria[b])
+                    elif opcode == COPIAR_CONST:
+                        memoria[argumento[1]] = argumento[0]
+                    elif opcode == SALTAR_SI_VERDADERO_VC:
+                        a, constante, funcion, destino = argumento
+                        if funcion(memoria[a], constante):
+                            pc = destino
+                    elif opcode == SALTAR_SI_VERDADERO_VV:
+                        a, b, funcion, destino = argumento
+                        if funcion(memoria[a], memoria[b]):
+                            pc = destino
+                    elif opcode == SALTAR_SI_FALSO_VAR:
+                        if not memoria[argumento[0]]:
+                            pc = argumento[1]
+                    elif opcode == SALTAR_SI_VERDADERO_VAR:
+                        if memoria[argumento[0]]:
+                            pc = argumento[1]
+                elif opcode == CARGAR_VAR:
+                    push(memoria[argumento])
+                elif opcode == CARGAR_CONST:
+                    push(constantes[argumento])
+                elif opcode == GUARDAR:
+                    memoria[argumento] = pop()
+                elif opcode == BINARIA:
+                    derecha = pop()
+                    pila[-1] = argumento(pila[-1], derecha)
+                elif opcode == SALTAR_SI_FALSO:
+                    if not pop():
+                        pc = argumento
+                elif opcode == SALTAR:
+                    pc = argumento
+                elif opcode == SALTAR_SI_VERDADERO:
+                    if pop():
+                        pc = argumento
+                elif opcode == NEGAR:
+                    pila[-1] = not pila[-1]
+                elif opcode == CONVERTIR:
+                    pila[-1] = convertir(pila[-1], argumento)
+                elif opcode == LEER:
+                    push(leer_valor(leer(), argumento))
+                elif opcode == ESCRIBIR:
+                    escribir(pop())
+                else:
+                    break
+        except ErrorEjecucion as e:
+            if e.line is None:
+                e.line, e.column = self.bytecode.posiciones[pc - 1]
+            raise
+        except (ZeroDivisionError, ValueError, OverflowError, TypeError) as e:
+            line, column = self.bytecode.posiciones[pc - 1]
+            raise ErrorEjecucion(str(e), line, column) from e
+        finally:
+            self.instrucciones_ejecutadas = contador
+
+
+def compilar_intermedio(codigo, optimizar=True):
+    """Análisis y código intermedio, opcionalmente optimizado; lo comparten ambas máquinas"""
+    return intermedio_de_ast(analizar_programa(codigo), optimizar)
+
+
+def intermedio_de_ast(ast, optimizar=True):
+    """Código intermedio de un AST ya analizado"""
+    if optimizar:
+        ast, _ = optimizar_ast(ast)
+    programa = generar_intermedio(ast)
+    if optimizar:
+        programa, _ = optimizar_ssa(programa)
+        programa, _ = optimizar_lazos(programa)
+        programa, _ = optimizar_intermedio(programa)
+    return programa
+
+
+def compilar(codigo, optimizar=True):
+    """Código intermedio ensamblado a bytecode de pila"""
+    bytecode = EnsambladorPila(compilar_intermedio(codigo, optimizar)).ensamblar()
+    if optimizar:
+        bytecode, _ = OptimizadorMirilla(bytecode).optimizar()
+    return bytecode
+
+
+def ejecutar(codigo, leer, escribir, optimizar=True):
+    maquina = MaquinaPila(compilar(codigo, optimizar))
+    maquina.ejecutar(leer, escribir)
+    return maquina
+
+
+if __name__ == '__main__':
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        fuente_programa = f.read()
+    try:
+        with salida_estandar() as escribir:
+            ejecutar(fuente_programa, entrada_estandar(), escribir)
+    except (ErrorCompilacion, ErrorEjecucion) as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,218 @@
+# optimizador_ast.py
+
+import math
+
+from arbol_sintaxis import ASTNode, NodeType
+from ejecucion import (VALORES_INICIALES, recolectar_declaraciones, valor_literal, convertir,
+                       dividir, modulo, potencia, resto_mascara, mismo_valor)
+
+# Los enteros plegados deben caber en 64 bits para que todos los backends los acepten
+LIMITE_ENTERO = 2 ** 63
+
+
+def potencia_plegable(a, b):
+    # Una potencia de enteros que no cabría en LIMITE_ENTERO no se calcula: no se plegaría
+    # y con un exponente enorme tardaría en calcularse
+    if type(a) is int and type(b) is int and b > 0 and (abs(a).bit_length() - 1) * b >= 64:
+        raise OverflowError("potencia demasiado grande para plegarse")
+    return potencia(a, b)
+
+
+OPERACIONES = {
+    "+": lambda a, b: a + b,
+    "-": lambda a, b: a - b,
+    "*": lambda a, b: a * b,
+    "/": dividir,
+    "%": modulo,
+    "^": potencia_plegable,
+    "<": lambda a, b: a < b,
+    ">": lambda a, b: a > b,
+    "<=": lambda a, b: a <= b,
+    ">=": lambda a, b: a >= b,
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "&&": lambda a, b: bool(a and b),
+    "||": lambda a, b: bool(a or b),
+    "&": resto_mascara,     # solo aparece en el código intermedio
+}
+
+NODOS_OPERACION = (NodeType.SUMA, NodeType.RESTA, NodeType.MULTIPLICACION, NodeType.POTENCIA,
+                   NodeType.RELACIONAL, NodeType.LOGICO)
+
+
+class OptimizadorAST:
+    """Plegado y propagación de constantes sobre el AST.
+
+    Modifica el árbol recibido. Los nodos que se pliegan conservan la línea y columna
+    del operador original para que los diagnósticos sigan apuntando al código fuente.
+    """
+
+    def __init__(self, ast):
+        self.ast = ast
+        self.declaraciones = recolectar_declaraciones(ast)
+        self.avisos = []
+        self.plegados = 0
+
+    def optimizar(self):
+        # Al comenzar, cada variable declarada tiene su valor inicial conocido
+        constantes = {nombre: VALORES_INICIALES[tipo] for nombre, tipo in self.declaraciones.items()}
+        self.optimizar_bloque(self.ast, constantes)
+        return self.ast
+
+    def optimizar_bloque(self, nodo, constantes):
+        nuevos_hijos = []
+        for hijo in nodo.children:
+            resultado = self.optimizar_sentencia(hijo, constantes)
+            if resultado is not None:
+                nuevos_hijos.append(resultado)
+        nodo.children = nuevos_hijos
+
+    def optimizar_sentencia(self, nodo, constantes):
+        """Devuelve el nodo que reemplaza a la sentencia, o None si se elimina"""
+        tipo = nodo.node_type
+        if tipo in (NodeType.LISTA, NodeType.MAIN):
+            self.optimizar_bloque(nodo, constantes)
+        elif tipo == NodeType.ASIGNACION:
+            destino = nodo.children[0]
+            if len(nodo.children) > 1:
+                nodo.children[1] = self.plegar(nodo.children[1], constantes)
+                valor = self.constante(nodo.children[1])
+                tipo_var = self.declaraciones.get(destino.name)
+                if valor is not None and tipo_var is not None:
+                    try:
+                        constantes[destino.name] = convertir(valor, tipo_var)
+                        return nodo
+                    except (ZeroDivisionError, ValueError, OverflowError):
+                        # Que el error aparezca al ejecutar la asignación, no al compilar
+                        pass
+            constantes.pop(destino.name, None)
+        elif tipo == NodeType.INPUT:
+            for hijo in nodo.children:
+                constantes.pop(hijo.name, None)
+        elif tipo == NodeType.OUTPUT:
+            if nodo.children and nodo.children[0].node_type != NodeType.CADENA:
+                nodo.children[0] = self.plegar(nodo.children[0], constantes)
+        elif tipo == NodeType.IF:
+            return self.optimizar_if(nodo, constantes)
+        elif tipo == NodeType.WHILE:
+            return self.optimizar_while(nodo, constantes)
+        elif tipo == NodeType.DO:
+            return self.optimizar_do(nodo, constantes)
+        return nodo
+
+    def optimizar_if(self, nodo, constantes):
+        nodo.children[0] = self.plegar(nodo.children[0], constantes)
+        condicion = self.constante(nodo.children[0])
+        if condicion is not None:
+            if condicion:
+                self.aviso("Condición de 'if' siempre verdadera", nodo)
+                rama = nodo.children[1]
+            else:
+                self.aviso("Condición de 'if' siempre falsa", nodo)
+                rama = nodo.children[2] if len(nodo.children) > 2 else None
+            if rama is None:
+                return None
+            self.optimizar_bloque(rama, constantes)
+            return rama
+
+        constantes_else = dict(constantes)
+        self.optimizar_bloque(nodo.children[1], constantes)
+        if len(nodo.children) > 2:
+            self.optimizar_bloque(nodo.children[2], constantes_else)
+        # Después del if solo se conocen los valores que coinciden en ambas ramas
+        for nombre in list(constantes):
+            if not mismo_valor(constantes[nombre], constantes_else.get(nombre)):
+                del constantes[nombre]
+        return nodo
+
+    def optimizar_while(self, nodo, constantes):
+        self.olvidar_asignadas(nodo, constantes)
+        nodo.children[0] = self.plegar(nodo.children[0], constantes)
+        condicion = self.constante(nodo.children[0])
+        if condicion is not None and not condicion:
+            self.aviso("El ciclo 'while' nunca se ejecuta", nodo)
+            return None
+        self.optimizar_bloque(nodo.children[1], dict(constantes))
+        return nodo
+
+    def optimizar_do(self, nodo, constantes):
+        self.olvidar_asignadas(nodo, constantes)
+        self.optimizar_bloque(nodo.children[0], dict(constantes))
+        if len(nodo.children) < 2:
+            return nodo
+        nodo.children[1] = self.plegar(nodo.children[1], constantes)
+        condicion = self.constante(nodo.children[1])
+        if condicion is not None and not condicion:
+            # El cuerpo se ejecuta exactamente una vez
+            return nodo.children[0]
+        return nodo
+
+    def olvidar_asignadas(self, nodo, constantes):
+        """Elimina de las constantes las variables que se modifican dentro de un ciclo"""
+        if nodo.node_type in (NodeType.ASIGNACION, NodeType.INPUT) and nodo.children:
+            constantes.pop(nodo.children[0].name, None)
+        for hijo in nodo.children:
+            self.olvidar_asignadas(hijo, constantes)
+
+    def plegar(self, nodo, constantes):
+        """Pliega una expresión; devuelve el nodo original o un FACTOR constante"""
+        if nodo is None:
+            return None
+        tipo = nodo.node_type
+        if tipo == NodeType.IDENTIFICADOR:
+            if nodo.name in constantes:
+                return self.nodo_constante(constantes[nodo.name], nodo) or nodo
+            return nodo
+        if tipo not in NODOS_OPERACION + (NodeType.INCREMENTO, NodeType.DECREMENTO):
+            return nodo
+
+        nodo.children = [self.plegar(hijo, constantes) for hijo in nodo.children]
+        valores = [self.constante(hijo) for hijo in nodo.children]
+        if not valores or any(valor is None for valor in valores):
+            return nodo
+        try:
+            if tipo == NodeType.INCREMENTO:
+                resultado = valores[0] + 1
+            elif tipo == NodeType.DECREMENTO:
+                resultado = valores[0] - 1
+            elif len(valores) == 1 and nodo.name == "!":
+                resultado = not valores[0]
+            elif len(valores) == 2 and nodo.name in OPERACIONES:
+                resultado = OPERACIONES[nodo.name](*valores)
+            else:
+                return nodo
+        except (ZeroDivisionError, ValueError, OverflowError):
+            # El error debe producirse al ejecutar el programa
+            return nodo
+        plegado = self.nodo_constante(resultado, nodo)
+        if plegado is None:
+            return nodo
+        self.plegados += 1
+        return plegado
+
+    def constante(self, nodo):
+        if nodo is not None and nodo.node_type == NodeType.FACTOR:
+            return valor_literal(nodo)
+        return None
+
+    def nodo_constante(self, valor, origen):
+        if type(valor) is bool:
+            texto = "true" if valor else "false"
+        elif type(valor) is int:
+            if abs(valor) >= LIMITE_ENTERO:
+                return None
+            texto = str(valor)
+        else:
+            if not math.isfinite(valor):
+                return None
+            texto = repr(valor)
+        return ASTNode(texto, NodeType.FACTOR, origen.line, origen.column)
+
+    def aviso(self, mensaje, nodo):
+        self.avisos.append(f"Aviso en línea {nodo.line}, columna {nodo.column}: {mensaje}")
+
+
+def optimizar(ast):
+    """Aplica el plegado y la propagación de constantes; devuelve el árbol y los avisos"""
+    optimizador = OptimizadorAST(ast)
+    return optimizador.optimizar(), optimizador.avisos
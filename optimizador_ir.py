@@ -0,0 +1,304 @@
+# optimizador_ir.py
+
+import math
+
+from codigo_intermedio import Instruccion, ProgramaIntermedio, OPERADORES_BINARIOS, SALTOS
+from ejecucion import convertir, clave_constante
+from optimizador_ast import OPERACIONES, LIMITE_ENTERO
+
+# Operaciones sin efectos secundarios que tampoco pueden fallar al ejecutarse;
+# solo estas se eliminan cuando su resultado no se usa
+OPERACIONES_PURAS = {"copiar", "+", "-", "*", "<", ">", "<=", ">=", "==", "!=", "&&", "||", "!", "&"}
+CONMUTATIVAS = {"+", "*", "==", "!=", "&&", "||"}
+
+
+class BloqueBasico:
+    def __init__(self, indice, instrucciones):
+        self.indice = indice
+        self.instrucciones = instrucciones
+        self.sucesores = []
+        self.predecesores = []
+        self.phis = []
+
+    @property
+    def etiqueta(self):
+        if self.instrucciones and self.instrucciones[0].op == "etiqueta":
+            return self.instrucciones[0].arg1
+        return None
+
+    def __repr__(self):
+        return f"B{self.indice}({len(self.instrucciones)} instr.)"
+
+
+class GrafoFlujo:
+    """Bloques básicos y grafo de flujo de control del código de tres direcciones"""
+
+    def __init__(self, instrucciones):
+        self.bloques = construir_bloques(instrucciones)
+        self.enlazar()
+
+    def enlazar(self):
+        por_etiqueta = {bloque.etiqueta: bloque for bloque in self.bloques if bloque.etiqueta}
+        for bloque in self.bloques:
+            bloque.sucesores = []
+            bloque.predecesores = []
+        for posicion, bloque in enumerate(self.bloques):
+            ultima = bloque.instrucciones[-1] if bloque.instrucciones else None
+            if ultima is not None and ultima.op in SALTOS:
+                destino = ultima.arg1 if ultima.op == "saltar" else ultima.arg2
+                bloque.sucesores.append(por_etiqueta[destino])
+            if (ultima is None or ultima.op != "saltar") and posicion + 1 < len(self.bloques):
+                siguiente = self.bloques[posicion + 1]
+                if siguiente not in bloque.sucesores:
+                    bloque.sucesores.append(siguiente)
+        for bloque in self.bloques:
+            for sucesor in bloque.sucesores:
+                sucesor.predecesores.append(bloque)
+
+    def instrucciones(self):
+        return [instruccion for bloque in self.bloques for instruccion in bloque.instrucciones]
+
+
+def construir_bloques(instrucciones):
+    """Divide las instrucciones en bloques básicos usando líderes (etiquetas y destinos de salto)"""
+    bloques = []
+    actual = []
+    for instruccion in instrucciones:
+        if instruccion.op == "etiqueta" and actual:
+            bloques.append(BloqueBasico(len(bloques), actual))
+            actual = []
+        actual.append(instruccion)
+        if instruccion.op in SALTOS:
+            bloques.append(BloqueBasico(len(bloques), actual))
+            actual = []
+    if actual or not bloques:
+        bloques.append(BloqueBasico(len(bloques), actual))
+    return bloques
+
+
+def eliminar_inalcanzables(grafo):
+    """Quita los bloques a los que no se llega desde la entrada; devuelve las instrucciones quitadas"""
+    eliminadas = 0
+    # Un salto condicional sobre una constante se vuelve incondicional o desaparece
+    for bloque in grafo.bloques:
+        ultima = bloque.instrucciones[-1] if bloque.instrucciones else None
+        if ultima is not None and ultima.op in ("si_falso", "si_verdadero") and not isinstance(ultima.arg1, str):
+            if bool(ultima.arg1) == (ultima.op == "si_verdadero"):
+                ultima.op, ultima.arg1, ultima.arg2 = "saltar", ultima.arg2, None
+            else:
+                bloque.instrucciones.pop()
+                eliminadas += 1
+    grafo.enlazar()
+
+    alcanzados = set()
+    pendientes = [grafo.bloques[0]]
+    while pendientes:
+        bloque = pendientes.pop()
+        if bloque.indice in alcanzados:
+            continue
+        alcanzados.add(bloque.indice)
+        pendientes.extend(bloque.sucesores)
+
+    inalcanzables = sum(len(b.instrucciones) for b in grafo.bloques if b.indice not in alcanzados)
+    eliminadas += inalcanzables
+    if inalcanzables:
+        grafo.bloques = [bloque for bloque in grafo.bloques if bloque.indice in alcanzados]
+        for indice, bloque in enumerate(grafo.bloques):
+            bloque.indice = indice
+        grafo.enlazar()
+    return eliminadas
+
+
+def calcular_vivas(grafo):
+    """Análisis de variables vivas; devuelve las vivas a la salida de cada bloque"""
+    usos = []
+    definiciones = []
+    for bloque in grafo.bloques:
+        usadas, definidas = set(), set()
+        for instruccion in bloque.instrucciones:
+            for nombre in instruccion.usos():
+                if nombre not in definidas:
+                    usadas.add(nombre)
+            if instruccion.destino is not None:
+                definidas.add(instruccion.destino)
+        usos.append(usadas)
+        definiciones.append(definidas)
+
+    vivas_entrada = [set() for _ in grafo.bloques]
+    vivas_salida = [set() for _ in grafo.bloques]
+    cambio = True
+    while cambio:
+        cambio = False
+        for bloque in reversed(grafo.bloques):
+            i = bloque.indice
+            salida = set()
+            for sucesor in bloque.sucesores:
+                salida |= vivas_entrada[sucesor.indice]
+            entrada = usos[i] | (salida - definiciones[i])
+            if entrada != vivas_entrada[i] or salida != vivas_salida[i]:
+                vivas_entrada[i] = entrada
+                vivas_salida[i] = salida
+                cambio = True
+    return vivas_salida
+
+
+def eliminar_asignaciones_muertas(grafo):
+    """Elimina asignaciones puras cuyo resultado no se vuelve a leer"""
+    eliminadas = 0
+    cambio = True
+    while cambio:
+        cambio = False
+        vivas_salida = calcular_vivas(grafo)
+        for bloque in grafo.bloques:
+            vivas = set(vivas_salida[bloque.indice])
+            conservadas = []
+            for instruccion in reversed(bloque.instrucciones):
+                destino = instruccion.destino
+                if destino is not None and destino not in vivas and instruccion.op in OPERACIONES_PURAS:
+                    eliminadas += 1
+                    cambio = True
+                    continue
+                if destino is not None:
+                    vivas.discard(destino)
+                vivas.update(instruccion.usos())
+                conservadas.append(instruccion)
+            conservadas.reverse()
+            bloque.instrucciones = conservadas
+    return eliminadas
+
+
+def numerar_valores(bloque):
+    """Numeración local de valores: reutiliza subexpresiones ya calculadas en el bloque.
+
+    También reemplaza cada operando por la constante o la primera variable que conserva
+    su valor, lo que deja copias muertas para la eliminación de asignaciones.
+    Devuelve cuántas operaciones se reemplazaron por una copia (de una subexpresión
+    ya calculada o de una constante plegada).
+    """
+    numero_de = {}      # variable o constante -> número de valor
+    expresiones = {}    # (op, números de los operandos) -> número de valor
+    portador = {}       # número de valor -> variable o constante que lo contiene
+    siguiente = [0]
+    reemplazadas = 0
+
+    def nuevo_numero():
+        siguiente[0] += 1
+        return siguiente[0]
+
+    def numero(operando):
+        clave = operando if isinstance(operando, str) else ("constante", *clave_constante(operando))
+        if clave not in numero_de:
+            numero_de[clave] = nuevo_numero()
+            portador[numero_de[clave]] = operando
+        return numero_de[clave]
+
+    def vigente(valor):
+        # El portador sirve si es una constante o si la variable no se redefinió después
+        candidato = portador.get(valor)
+        if candidato is None or not isinstance(candidato, str) or numero_de.get(candidato) == valor:
+            return candidato
+        return None
+
+    def canonico(operando):
+        if isinstance(operando, str) and operando in numero_de:
+            candidato = vigente(numero_de[operando])
+            if candidato is not None:
+                return candidato
+        return operando
+
+    for instruccion in bloque.instrucciones:
+        op = instruccion.op
+        if op in ("etiqueta", "saltar"):
+            continue
+        if op in ("si_falso", "si_verdadero") or (op == "escribir" and not instruccion.arg2):
+            instruccion.arg1 = canonico(instruccion.arg1)
+            continue
+        if op == "escribir":
+            continue
+        if op == "leer":
+            numero_de[instruccion.destino] = nuevo_numero()
+            portador[numero_de[instruccion.destino]] = instruccion.destino
+            continue
+
+        instruccion.arg1 = canonico(instruccion.arg1)
+        if op in OPERADORES_BINARIOS:
+            instruccion.arg2 = canonico(instruccion.arg2)
+
+        plegado, constante = plegar(instruccion)
+        if plegado:
+            instruccion.op, instruccion.arg1, instruccion.arg2 = "copiar", constante, None
+            reemplazadas += 1
+            valor = numero(constante)
+        elif op == "copiar":
+            valor = numero(instruccion.arg1)
+        else:
+            operandos = [numero(instruccion.arg1)]
+            if op == "convertir":
+                operandos.append(instruccion.arg2)
+            elif op != "!":
+                operandos.append(numero(instruccion.arg2))
+                if op in CONMUTATIVAS:
+                    operandos.sort()
+            clave = (op, tuple(operandos))
+            valor = expresiones.get(clave)
+            anterior = vigente(valor) if valor is not None else None
+            if anterior is not None:
+                instruccion.op, instruccion.arg1, instruccion.arg2 = "copiar", anterior, None
+                reemplazadas += 1
+            elif valor is None:
+                valor = nuevo_numero()
+                expresiones[clave] = valor
+
+        numero_de[instruccion.destino] = valor
+        if vigente(valor) is None:
+            portador[valor] = instruccion.destino
+    return reemplazadas
+
+
+def plegar(instruccion):
+    """Evalúa una operación cuyos operandos son constantes; devuelve (plegada, valor)"""
+    op = instruccion.op
+    argumentos = [instruccion.arg1] if op in ("!", "convertir") else [instruccion.arg1, instruccion.arg2]
+    if op == "copiar" or any(isinstance(argumento, str) for argumento in argumentos):
+        return False, None
+    try:
+        if op == "!":
+            valor = not instruccion.arg1
+        elif op == "convertir":
+            valor = convertir(instruccion.arg1, instruccion.arg2)
+        elif op in OPERACIONES:
+            valor = OPERACIONES[op](instruccion.arg1, instruccion.arg2)
+        else:
+            return False, None
+    except (ZeroDivisionError, ValueError, OverflowError):
+        return False, None
+    if type(valor) is int and abs(valor) >= LIMITE_ENTERO:
+        return False, None
+    if type(valor) is float and not math.isfinite(valor):
+        return False, None
+    return True, valor
+
+
+def eliminar_subexpresiones_comunes(grafo):
+    return sum(numerar_valores(bloque) for bloque in grafo.bloques)
+
+
+def optimizar_intermedio(programa, inalcanzables=True, asignaciones_muertas=True, subexpresiones=True):
+    """Optimiza el código de tres direcciones.
+
+    Cada transformación puede desactivarse. Devuelve el programa optimizado y un
+    diccionario con el número de instrucciones que eliminó o reemplazó cada una.
+    """
+    copia = [Instruccion(i.op, i.destino, i.arg1, i.arg2, i.line, i.column) for i in programa.instrucciones]
+    grafo = GrafoFlujo(copia)
+    estadisticas = {"instrucciones_iniciales": len(copia)}
+    # La numeración de valores va primero porque deja constantes en los saltos condicionales
+    if subexpresiones:
+        estadisticas["subexpresiones_comunes"] = eliminar_subexpresiones_comunes(grafo)
+    if inalcanzables:
+        estadisticas["inalcanzables"] = eliminar_inalcanzables(grafo)
+    if asignaciones_muertas:
+        estadisticas["asignaciones_muertas"] = eliminar_asignaciones_muertas(grafo)
+    instrucciones = grafo.instrucciones()
+    estadisticas["instrucciones_finales"] = len(instrucciones)
+    return ProgramaIntermedio(instrucciones, programa.declaraciones), estadisticas
@@ -0,0 +1,299 @@
+# optimizador_lazos.py
+
+from collections import defaultdict
+
+from codigo_intermedio import Instruccion, ProgramaIntermedio, PREFIJO_TEMPORAL, inferir_tipos
+from ejecucion import tipo_constante
+from optimizador_ir import GrafoFlujo, OPERACIONES_PURAS, calcular_vivas, eliminar_inalcanzables
+from ssa import calcular_dominadores
+
+# División y resto de un entero solo fallan con un divisor cero; con un divisor constante
+# distinto de cero se pueden sacar del lazo aunque este no llegue a ejecutarse
+DIVISIONES = {"/", "%"}
+
+
+class Lazo:
+    """Lazo natural: la cabecera y los índices de los bloques que lo forman"""
+
+    def __init__(self, cabecera, bloques):
+        self.cabecera = cabecera
+        self.bloques = bloques
+
+
+def encontrar_lazos(grafo):
+    """Lazos naturales del grafo a partir de sus aristas de retroceso, de adentro hacia afuera.
+
+    Los lazos que comparten cabecera se unen en uno solo.
+    """
+    idom, _ = calcular_dominadores(grafo)
+    total = len(grafo.bloques)
+    hijos = [[] for _ in range(total)]
+    for indice in range(1, total):
+        if idom[indice] is not None:
+            hijos[idom[indice]].append(indice)
+
+    # Numeración del árbol de dominadores: a domina a b si el intervalo de a contiene al de b
+    entrada = [0] * total
+    salida = [0] * total
+    contador = 0
+    pila = [(0, False)]
+    while pila:
+        indice, terminado = pila.pop()
+        contador += 1
+        if terminado:
+            salida[indice] = contador
+            continue
+        entrada[indice] = contador
+        pila.append((indice, True))
+        pila.extend((hijo, False) for hijo in hijos[indice])
+
+    def domina(a, b):
+        return entrada[a] <= entrada[b] and salida[b] <= salida[a]
+
+    cuerpos = {}
+    for bloque in grafo.bloques:
+        for sucesor in bloque.sucesores:
+            if not domina(sucesor.indice, bloque.indice):
+                continue
+            cuerpo = cuerpos.setdefault(sucesor.indice, {sucesor.indice})
+            pendientes = [bloque.indice]
+            while pendientes:
+                indice = pendientes.pop()
+                if indice in cuerpo:
+                    continue
+                cuerpo.add(indice)
+                pendientes.extend(predecesor.indice for predecesor in grafo.bloques[indice].predecesores)
+    lazos = [Lazo(cabecera, cuerpo) for cabecera, cuerpo in cuerpos.items()]
+    lazos.sort(key=lambda lazo: len(lazo.bloques))
+    return lazos
+
+
+class OptimizadorLazos:
+    """Extracción de código invariante y reducción de fuerza en los lazos del código intermedio"""
+
+    def __init__(self, programa):
+        copia = [Instruccion(i.op, i.destino, i.arg1, i.arg2, i.line, i.column) for i in programa.instrucciones]
+        self.declaraciones = programa.declaraciones
+        self.tipos = inferir_tipos(ProgramaIntermedio(copia, programa.declaraciones))
+        self.grafo = GrafoFlujo(copia)
+        eliminar_inalcanzables(self.grafo)
+        self.previas = {}       # índice de la cabecera -> instrucciones de su preencabezado
+        self.cuerpos = {}       # índice de la cabecera -> bloques del lazo
+        self.temporales = 0
+        self.etiquetas = 0
+        self.estadisticas = {"lazos": 0, "invariantes_extraidas": 0, "potencias_reducidas": 0,
+                             "modulos_reducidos": 0, "multiplicaciones_reducidas": 0}
+
+    def tipo(self, operando):
+        return self.tipos.get(operando) if isinstance(operando, str) else tipo_constante(operando)
+
+    def nuevo_temporal(self):
+        self.temporales += 1
+        nombre = f"{PREFIJO_TEMPORAL}l{self.temporales}"
+        self.tipos[nombre] = "int"
+        return nombre
+
+    def nueva_etiqueta(self):
+        self.etiquetas += 1
+        return f"LP{self.etiquetas}"
+
+    def optimizar(self, invariantes=True, reduccion=True):
+        if reduccion:
+            self.reducir_operaciones()
+        lazos = encontrar_lazos(self.grafo)
+        self.estadisticas["lazos"] = len(lazos)
+        if lazos and (invariantes or reduccion):
+            vivas_entrada = self.calcular_vivas_entrada()
+            for lazo in lazos:
+                self.cuerpos[lazo.cabecera] = lazo.bloques
+                self.previas[lazo.cabecera] = []
+                if invariantes:
+                    self.extraer_invariantes(lazo, vivas_entrada)
+                if reduccion:
+                    self.reducir_multiplicaciones(lazo)
+        return ProgramaIntermedio(self.emitir(), self.declaraciones), self.estadisticas
+
+    def calcular_vivas_entrada(self):
+        vivas_entrada = []
+        for bloque, salida in zip(self.grafo.bloques, calcular_vivas(self.grafo)):
+            vivas = set(salida)
+            for instruccion in reversed(bloque.instrucciones):
+                if instruccion.destino is not None:
+                    vivas.discard(instruccion.destino)
+                vivas.update(instruccion.usos())
+            vivas_entrada.append(vivas)
+        return vivas_entrada
+
+    def listas_del_lazo(self, lazo):
+        """Listas de instrucciones del lazo, incluidos los preencabezados de sus lazos internos"""
+        listas = []
+        for indice in sorted(lazo.bloques):
+            if indice != lazo.cabecera and indice in self.previas:
+                listas.append(self.previas[indice])
+            listas.append(self.grafo.bloques[indice].instrucciones)
+        return listas
+
+    # === Reducción de fuerza ===
+
+    def reducir_operaciones(self):
+        """x ^ 2 -> x * x y x % 2^k -> x & (2^k - 1) cuando x es entero"""
+        for bloque in self.grafo.bloques:
+            for instruccion in bloque.instrucciones:
+                divisor = instruccion.arg2
+                if self.tipo(instruccion.arg1) != "int" or type(divisor) is not int:
+                    continue
+                if instruccion.op == "^" and divisor == 2:
+                    instruccion.op, instruccion.arg2 = "*", instruccion.arg1
+                    self.estadisticas["potencias_reducidas"] += 1
+                elif instruccion.op == "%" and divisor > 0 and divisor & (divisor - 1) == 0:
+                    instruccion.op, instruccion.arg2 = "&", divisor - 1
+                    self.estadisticas["modulos_reducidos"] += 1
+
+    def reducir_multiplicaciones(self, lazo):
+        """Cambia i * k por una variable que se incrementa junto con la variable de inducción i"""
+        listas = self.listas_del_lazo(lazo)
+        definiciones = defaultdict(int)
+        for lista in listas:
+            for instruccion in lista:
+                if instruccion.destino is not None:
+                    definiciones[instruccion.destino] += 1
+
+        # Variables de inducción básicas: una sola definición en el lazo, de la forma i = i ± c
+        pasos = {}
+        for lista in listas:
+            for instruccion in lista:
+                destino = instruccion.destino
+                if instruccion.op not in ("+", "-") or definiciones[destino] != 1 or self.tipo(destino) != "int":
+                    continue
+                if instruccion.arg1 == destino and type(instruccion.arg2) is int:
+                    pasos[destino] = instruccion.arg2 if instruccion.op == "+" else -instruccion.arg2
+                elif instruccion.op == "+" and instruccion.arg2 == destino and type(instruccion.arg1) is int:
+                    pasos[destino] = instruccion.arg1
+        if not pasos:
+            return
+
+        previas = self.previas[lazo.cabecera]
+        reducidas = {}      # (variable de inducción, factor) -> variable reducida
+        for lista in listas:
+            for instruccion in lista:
+                if instruccion.op != "*":
+                    continue
+                for induccion, factor in ((instruccion.arg1, instruccion.arg2), (instruccion.arg2, instruccion.arg1)):
+                    if induccion not in pasos:
+                        continue
+                    if isinstance(factor, str):
+                        if definiciones[factor] or self.tipo(factor) != "int":
+                            continue
+                    elif type(factor) is not int:
+                        continue
+                    clave = (induccion, factor)
+                    if clave not in reducidas:
+                        reducida = self.nuevo_temporal()
+                        previas.append(Instruccion("*", reducida, induccion, factor))
+                        if isinstance(factor, str):
+                            incremento = self.nuevo_temporal()
+                            previas.append(Instruccion("*", incremento, factor, pasos[induccion]))
+                        else:
+                            incremento = factor * pasos[induccion]
+                        reducidas[clave] = (reducida, incremento)
+                    instruccion.op, instruccion.arg1, instruccion.arg2 = "copiar", reducidas[clave][0], None
+                    self.estadisticas["multiplicaciones_reducidas"] += 1
+                    break
+
+        # Cada variable reducida se actualiza justo después de su variable de inducción
+        for lista in listas:
+            posicion = 0
+            while posicion < len(lista):
+                destino = lista[posicion].destino
+                posicion += 1
+                for (induccion, _), (reducida, incremento) in reducidas.items():
+                    if induccion == destino:
+                        lista.insert(posicion, Instruccion("+", reducida, reducida, incremento))
+                        posicion += 1
+
+    # === Código invariante ===
+
+    def extraer_invariantes(self, lazo, vivas_entrada):
+        """Mueve al preencabezado las operaciones cuyo valor no cambia dentro del lazo.
+
+        Solo se mueven operaciones que no pueden fallar, con una única definición en el
+        lazo y cuyo destino no se lee antes de definirse ni después de salir del lazo.
+        """
+        listas = self.listas_del_lazo(lazo)
+        definiciones = defaultdict(int)
+        for lista in listas:
+            for instruccion in lista:
+                if instruccion.destino is not None:
+                    definiciones[instruccion.destino] += 1
+
+        bloqueadas = set(vivas_entrada[lazo.cabecera])
+        for indice in lazo.bloques:
+            for sucesor in self.grafo.bloques[indice].sucesores:
+                if sucesor.indice not in lazo.bloques:
+                    bloqueadas |= vivas_entrada[sucesor.indice]
+
+        def invariante(instruccion):
+            destino = instruccion.destino
+            if destino is None or definiciones[destino] != 1 or destino in bloqueadas:
+                return False
+            if instruccion.op in DIVISIONES:
+                if isinstance(instruccion.arg2, str) or not instruccion.arg2 \
+                        or self.tipo(instruccion.arg1) != "int":
+                    return False
+            elif instruccion.op not in OPERACIONES_PURAS:
+                return False
+            return all(definiciones[nombre] == 0 for nombre in instruccion.usos())
+
+        previas = self.previas[lazo.cabecera]
+        cambio = True
+        while cambio:
+            cambio = False
+            for lista in listas:
+                conservadas = []
+                for instruccion in lista:
+                    if invariante(instruccion):
+                        previas.append(instruccion)
+                        definiciones[instruccion.destino] -= 1
+                        self.estadisticas["invariantes_extraidas"] += 1
+                        cambio = True
+                    else:
+                        conservadas.append(instruccion)
+                lista[:] = conservadas
+
+    # === Reconstrucción ===
+
+    def emitir(self):
+        """Instrucciones finales con cada preencabezado justo antes de la cabecera de su lazo"""
+        bloques = self.grafo.bloques
+        instrucciones = []
+        for posicion, bloque in enumerate(bloques):
+            previas = self.previas.get(bloque.indice)
+            if previas:
+                cuerpo = self.cuerpos[bloque.indice]
+                anterior = bloques[posicion - 1] if posicion else None
+                ultima = anterior.instrucciones[-1] if anterior is not None and anterior.instrucciones else None
+                if anterior is not None and anterior.indice in cuerpo and (ultima is None or ultima.op != "saltar"):
+                    # Un bloque del lazo que continúa a la cabecera no debe pasar por el preencabezado
+                    instrucciones.append(Instruccion("saltar", arg1=bloque.etiqueta))
+                externos = [p for p in bloque.predecesores if p.indice not in cuerpo and p.instrucciones
+                            and p.instrucciones[-1].op in ("saltar", "si_falso", "si_verdadero")]
+                etiqueta = None
+                for predecesor in externos:
+                    salto = predecesor.instrucciones[-1]
+                    campo = "arg1" if salto.op == "saltar" else "arg2"
+                    if getattr(salto, campo) == bloque.etiqueta:
+                        etiqueta = etiqueta or self.nueva_etiqueta()
+                        setattr(salto, campo, etiqueta)
+                if etiqueta is not None:
+                    instrucciones.append(Instruccion("etiqueta", arg1=etiqueta))
+                instrucciones.extend(previas)
+            instrucciones.extend(bloque.instrucciones)
+        return instrucciones
+
+
+def optimizar_lazos(programa, invariantes=True, reduccion=True):
+    """Optimiza los lazos del código intermedio.
+
+    Devuelve el programa resultante y un diccionario con lo que hizo cada transformación.
+    """
+    return OptimizadorLazos(programa).optimizar(invariantes, reduccion)
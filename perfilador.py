@@ -0,0 +1,195 @@
+# perfilador.py
+
+import json
+import sys
+import time
+from collections import defaultdict
+
+from ejecucion import ErrorCompilacion, ErrorEjecucion
+from entrada_salida import entrada_estandar, salida_estandar
+import maquina_registros
+import transpilador
+
+# Motores que pueden perfilarse: el transpilador cuenta sentencias, las máquinas instrucciones
+MOTORES = ("transpilador", "pila", "registros")
+
+# Niveles del mapa de calor, de frío a caliente
+NIVELES_CALOR = 5
+
+
+class Perfil:
+    """Sentencias, instrucciones y tiempo acumulados por línea del código fuente"""
+
+    def __init__(self, motor):
+        self.motor = motor
+        self.sentencias = defaultdict(int)
+        self.instrucciones = defaultdict(int)
+        self.tiempos = defaultdict(float)
+        self.error = None       # ErrorEjecucion que detuvo el programa, si hubo
+
+    def acumular(self, linea, segundos):
+        if linea is not None:
+            self.tiempos[linea] += segundos
+
+    @property
+    def tiempo_total(self):
+        return sum(self.tiempos.values())
+
+    def lineas(self):
+        return sorted(set(self.sentencias) | set(self.instrucciones) | set(self.tiempos))
+
+    def calor(self):
+        """Nivel de calor (0 a NIVELES_CALOR - 1) de cada línea según su tiempo respecto al máximo"""
+        maximo = max(self.tiempos.values(), default=0.0)
+        if maximo <= 0:
+            return {}
+        return {linea: min(int(tiempo / maximo * NIVELES_CALOR), NIVELES_CALOR - 1)
+                for linea, tiempo in self.tiempos.items()}
+
+    def informe(self, fuente=None):
+        """Tabla de texto con una fila por línea ejecutada y, si se da, el código de esa línea"""
+        codigo = fuente.splitlines() if fuente is not None else []
+        total = self.tiempo_total
+        lineas = [f"Perfil de ejecución (motor {self.motor}): {total * 1000:.3f} ms, "
+                  f"{sum(self.sentencias.values())} sentencias, {sum(self.instrucciones.values())} instrucciones",
+                  "",
+                  f"{'Línea':>6}{'Sentencias':>12}{'Instrucciones':>15}{'Tiempo (ms)':>14}{'%':>7}  Código",
+                  "-" * 80]
+        for linea in self.lineas():
+            tiempo = self.tiempos.get(linea, 0.0)
+            porcentaje = tiempo / total * 100 if total else 0.0
+            texto = codigo[linea - 1].strip() if 0 < linea <= len(codigo) else ""
+            lineas.append(f"{linea:>6}{self.sentencias.get(linea, 0):>12}{self.instrucciones.get(linea, 0):>15}"
+                          f"{tiempo * 1000:>14.3f}{porcentaje:>7.1f}  {texto}")
+        if self.error is not None:
+            lineas += ["", str(self.error)]
+        return "\n".join(lineas) + "\n"
+
+    def a_diccionario(self):
+        return {
+            "motor": self.motor,
+            "tiempo_total": self.tiempo_total,
+            "error": None if self.error is None else str(self.error),
+            "lineas": [{"linea": linea, "sentencias": self.sentencias.get(linea, 0),
+                        "instrucciones": self.instrucciones.get(linea, 0), "tiempo": self.tiempos.get(linea, 0.0)}
+                       for linea in self.lineas()],
+        }
+
+    def guardar(self, ruta, fuente=None):
+        """Escribe el informe; en JSON si la ruta termina en .json"""
+        with open(ruta, "w", encoding="utf-8") as f:
+            if ruta.endswith(".json"):
+                json.dump(self.a_diccionario(), f, indent=2, ensure_ascii=False)
+            else:
+                f.write(self.informe(fuente))
+
+
+class Rastreador:
+    """Función de rastreo para sys.settrace que reparte el tiempo entre las líneas del programa.
+
+    El tiempo entre dos eventos se carga a la línea que se estaba ejecutando; lo que tarda
+    el propio rastreo se descuenta volviendo a tomar la hora al final de cada evento.
+    """
+
+    def __init__(self, perfil, es_objetivo, al_avanzar):
+        self.perfil = perfil
+        self.es_objetivo = es_objetivo      # marco -> bool: si sus líneas se rastrean
+        self.al_avanzar = al_avanzar        # marco -> línea fuente que empieza, o False si sigue la misma
+        self.linea = None
+        self.inicio = time.perf_counter()
+
+    def __call__(self, marco, evento, argumento):
+        return self.rastrear_linea if self.es_objetivo(marco) else None
+
+    def rastrear_linea(self, marco, evento, argumento):
+        if evento == "line":
+            ahora = time.perf_counter()
+            linea = self.al_avanzar(marco)
+            if linea is not False:
+                self.perfil.acumular(self.linea, ahora - self.inicio)
+                self.linea = linea
+                self.inicio = time.perf_counter()
+            else:
+                self.inicio += time.perf_counter() - ahora
+        return self.rastrear_linea
+
+    def terminar(self):
+        self.perfil.acumular(self.linea, time.perf_counter() - self.inicio)
+
+
+def perfilar(codigo, leer, escribir, motor="transpilador"):
+    """Ejecuta el programa con el perfilador activo y devuelve el Perfil.
+
+    Un error de ejecución no se propaga: queda en perfil.error junto con lo medido hasta
+    ese momento. Fuera de esta función no hay rastreo, así que ejecutar sin perfilar no
+    cuesta nada extra.
+    """
+    if motor not in MOTORES:
+        raise ValueError(f"Motor desconocido '{motor}'; se esperaba uno de: {', '.join(MOTORES)}")
+    perfil = Perfil(motor)
+    if motor == "transpilador":
+        programa = transpilador.compilar(codigo)
+        archivo = programa.codigo_objeto.co_filename
+        mapa_lineas = programa.mapa_lineas
+
+        def al_avanzar(marco):
+            # Las líneas generadas sin posición (else, break) siguen siendo de la sentencia actual
+            posicion = mapa_lineas.get(marco.f_lineno)
+            if posicion is None:
+                return False
+            perfil.sentencias[posicion[0]] += 1
+            return posicion[0]
+
+        rastreador = Rastreador(perfil, lambda marco: marco.f_code.co_filename == archivo, al_avanzar)
+        ejecutar = programa.ejecutar
+    else:
+        compilador, clase = maquina_registros.MAQUINAS[motor]
+        compilado = compilador(codigo)
+        maquina = clase(compilado)
+        posiciones = compilado.posiciones
+        # La máquina de registros ejecuta su ciclo en el generador pasos
+        codigo_bucle = getattr(clase, "pasos", clase.ejecutar).__code__
+        ultimo = [None]
+
+        def al_avanzar(marco):
+            # Cada instrucción incrementa 'contador' justo después de avanzar 'pc'
+            locales = marco.f_locals
+            contador = locales.get("contador")
+            if contador == ultimo[0] or "pc" not in locales:
+                return False
+            ultimo[0] = contador
+            linea = posiciones[locales["pc"] - 1][0]
+            if linea is not None:
+                perfil.instrucciones[linea] += 1
+            return linea
+
+        rastreador = Rastreador(perfil, lambda marco: marco.f_code is codigo_bucle, al_avanzar)
+        ejecutar = maquina.ejecutar
+
+    anterior = sys.gettrace()
+    sys.settrace(rastreador)
+    try:
+        ejecutar(leer, escribir)
+    except ErrorEjecucion as e:
+        perfil.error = e
+    finally:
+        sys.settrace(anterior)
+        rastreador.terminar()
+    return perfil
+
+
+if __name__ == '__main__':
+    # python perfilador.py programa [transpilador|pila|registros] [informe.txt|informe.json]
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        fuente_programa = f.read()
+    try:
+        with salida_estandar() as escribir:
+            resultado = perfilar(fuente_programa, entrada_estandar(), escribir,
+                                 sys.argv[2] if len(sys.argv) > 2 else "transpilador")
+    except (ErrorCompilacion, ValueError) as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    if len(sys.argv) > 3:
+        resultado.guardar(sys.argv[3], fuente_programa)
+    else:
+        print(resultado.informe(fuente_programa), file=sys.stderr)
@@ -0,0 +1,165 @@
+# resaltado.py
+
+import bisect
+import os
+import sys
+import time
+
+from unidad_compilacion import unidad_para
+
+# Milisegundos sin escribir antes de volver a resaltar: junta las ráfagas de teclas
+RETARDO_RESALTADO = int(os.environ.get("COMPILADOR_RETARDO_RESALTADO", "150"))
+# Cada cuántos milisegundos se pregunta si el análisis en segundo plano terminó
+PERIODO_REVISION = 20
+# Líneas que se vuelven a etiquetar en cada turno ocioso fuera de la parte visible
+LINEAS_POR_TURNO = int(os.environ.get("COMPILADOR_LINEAS_RESALTADO", "300"))
+
+
+def etiqueta_token(tipo):
+    return f"tag_{tipo.name}"
+
+
+class MapaResaltado:
+    """Tramos a resaltar de un texto, ordenados por línea para consultarlos por regiones.
+
+    Cada tramo es (línea_inicio, columna_inicio, línea_fin, columna_fin, etiqueta, texto)
+    con columnas desde 0, como en los índices del widget Text. El texto del token está
+    para que lineas_cambiadas note un token reescrito en el mismo lugar.
+    """
+
+    def __init__(self, tramos, total_lineas):
+        self.tramos = tramos
+        self.total_lineas = total_lineas
+        self.inicios = [tramo[0] for tramo in tramos]
+        # Los tramos de varias líneas (comentarios) pueden entrar en una región desde antes
+        self.multilinea = [tramo for tramo in tramos if tramo[2] > tramo[0]]
+
+    def en_lineas(self, primera, ultima):
+        """Índices a etiquetar en las líneas [primera, ultima): {etiqueta: [inicio, fin, ...]}.
+
+        Los tramos que salen de la región se recortan a sus bordes para no tocar el resto.
+        """
+        indices = {}
+        desde = bisect.bisect_left(self.inicios, primera)
+        hasta = bisect.bisect_left(self.inicios, ultima)
+        for linea, columna, linea_fin, columna_fin, etiqueta, _ in self.tramos[desde:hasta]:
+            fin = f"{linea_fin}.{columna_fin}" if linea_fin < ultima else f"{ultima}.0"
+            indices.setdefault(etiqueta, []).extend((f"{linea}.{columna}", fin))
+        for linea, columna, linea_fin, columna_fin, etiqueta, _ in self.multilinea:
+            if linea < primera < linea_fin or (linea < primera == linea_fin and columna_fin > 0):
+                fin = f"{linea_fin}.{columna_fin}" if linea_fin < ultima else f"{ultima}.0"
+                indices.setdefault(etiqueta, []).extend((f"{primera}.0", fin))
+        return indices
+
+
+def tramos_de_tokens(tokens):
+    tramos = []
+    for token in tokens:
+        valor = token.value
+        if not valor.strip():
+            continue
+        columna = token.column - 1
+        saltos = valor.count("\n")
+        if saltos:
+            linea_fin, columna_fin = token.line + saltos, len(valor.rsplit("\n", 1)[-1])
+        else:
+            linea_fin, columna_fin = token.line, columna + len(valor)
+        tramos.append((token.line, columna, linea_fin, columna_fin, etiqueta_token(token.type), valor))
+    return tramos
+
+
+def analizar_para_resaltar(texto):
+    """Trabajo en segundo plano: analiza el texto y devuelve su MapaResaltado y el
+    resultado léxico, que el IDE guarda en su UnidadCompilacion para no repetirlo"""
+    lexico = unidad_para(texto).lexico()
+    return MapaResaltado(tramos_de_tokens(lexico[0]), texto.count("\n") + 1), lexico
+
+
+def lineas_cambiadas(anterior, nuevo):
+    """Líneas [primera, ultima) del texto nuevo cuyas etiquetas difieren de las del anterior.
+
+    El widget mueve las etiquetas junto con el texto, así que los tramos del final se
+    comparan contando las líneas desde el final. Se comparan también los textos: si se
+    reescribe un token en su lugar (10 por 25) los caracteres nuevos no tienen etiqueta
+    aunque las coordenadas sean las mismas. Lo que queda entre el prefijo y el sufijo
+    comunes es lo único que hay que volver a etiquetar; None si no cambió nada.
+    """
+    viejos, nuevos = anterior.tramos, nuevo.tramos
+    comunes = min(len(viejos), len(nuevos))
+    prefijo = 0
+    while prefijo < comunes and viejos[prefijo] == nuevos[prefijo]:
+        prefijo += 1
+    corrimiento = nuevo.total_lineas - anterior.total_lineas
+    sufijo = 0
+    while sufijo < comunes - prefijo:
+        linea, columna, linea_fin, columna_fin, etiqueta, texto = viejos[-1 - sufijo]
+        if (linea + corrimiento, columna, linea_fin + corrimiento, columna_fin, etiqueta, texto) != nuevos[-1 - sufijo]:
+            break
+        sufijo += 1
+    if prefijo + sufijo == len(viejos) == len(nuevos):
+        return None
+    # Lo cambiado está entre el último tramo igual del principio y el primero igual del final
+    primera = nuevos[prefijo - 1][2] if prefijo else 1
+    ultima = nuevos[len(nuevos) - sufijo][0] + 1 if sufijo else nuevo.total_lineas + 1
+    return primera, ultima
+
+
+def regiones_por_prioridad(total_lineas, primera_visible, ultima_visible, tamano=None):
+    """Regiones [primera, ultima) de líneas en el orden en que conviene etiquetarlas.
+
+    Primero la parte visible; después bloques de tamano líneas alternando hacia abajo y
+    hacia arriba de ella, así lo más cercano a la vista se completa antes.
+    """
+    tamano = tamano or LINEAS_POR_TURNO
+    fin_texto = total_lineas + 1
+    primera_visible = max(1, min(primera_visible, total_lineas))
+    ultima_visible = max(primera_visible, min(ultima_visible, total_lineas))
+    regiones = [(primera_visible, ultima_visible + 1)]
+    abajo, arriba = ultima_visible + 1, primera_visible
+    while abajo < fin_texto or arriba > 1:
+        if abajo < fin_texto:
+            regiones.append((abajo, min(abajo + tamano, fin_texto)))
+            abajo += tamano
+        if arriba > 1:
+            regiones.append((max(1, arriba - tamano), arriba))
+            arriba -= tamano
+    return regiones
+
+
+def recortar_regiones(regiones, primera, ultima):
+    """Deja de cada región solo las líneas dentro de [primera, ultima), conservando el orden"""
+    resultado = []
+    for desde, hasta in regiones:
+        desde, hasta = max(desde, primera), min(hasta, ultima)
+        if desde < hasta:
+            resultado.append((desde, hasta))
+    return resultado
+
+
+def restar_region(regiones, primera, ultima):
+    """Quita las líneas [primera, ultima) de una lista de regiones, conservando el orden"""
+    resultado = []
+    for desde, hasta in regiones:
+        if hasta <= primera or desde >= ultima:
+            resultado.append((desde, hasta))
+            continue
+        if desde < primera:
+            resultado.append((desde, primera))
+        if hasta > ultima:
+            resultado.append((ultima, hasta))
+    return resultado
+
+
+if __name__ == '__main__':
+    # python resaltado.py programa: tramos por etiqueta y lo que tarda calcularlos
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        fuente_programa = f.read()
+    inicio = time.perf_counter()
+    mapa_programa, _ = analizar_para_resaltar(fuente_programa)
+    duracion = time.perf_counter() - inicio
+    conteo = {}
+    for tramo in mapa_programa.tramos:
+        conteo[tramo[4]] = conteo.get(tramo[4], 0) + 1
+    for etiqueta, cantidad in sorted(conteo.items()):
+        print(f"{etiqueta:<25}{cantidad:>8} tramos")
+    print(f"{len(mapa_programa.tramos)} tramos en {duracion * 1000:.1f} ms", file=sys.stderr)
@@ -8,6 +8,7 @@ class Parser:
         self.tokens = tokens
         self.index = 0
         self.errors = []
+        self.bloques = []    # (nombre, línea, columna, línea final) de cada if/while/do
 
     def current_token(self):
         if self.index < len(self.tokens):
@@ -38,6 +39,12 @@ class Parser:
         else:
             self.errors.append(f"Error sintáctico: {message}")
 
+    def registrar_bloque(self, node):
+        # El bloque termina en el último token consumido ('end' o la condición del do)
+        ultimo = self.tokens[self.index - 1] if self.index else None
+        node.end_line = max(ultimo.line, node.line) if ultimo else node.line
+        self.bloques.append((node.name, node.line, node.column, node.end_line))
+
     def parse(self):
         ast = self.parse_programa()
         return ast, self.errors
@@ -202,6 +209,7 @@ class Parser:
 
         if not self.match("RESERVED_WORD", "end"):
             self.error("Falta 'end' al cerrar if")
+        self.registrar_bloque(node)
         return node
 
     def parse_while(self):
@@ -211,6 +219,7 @@ class Parser:
         node.add_child(self.parse_lista_sentencias())
         if not self.match("RESERVED_WORD", "end"):
             self.error("Falta 'end' en while")
+        self.registrar_bloque(node)
         return node
 
     def parse_do(self):
@@ -220,6 +229,7 @@ class Parser:
         if not self.match("RESERVED_WORD", "while"):
             self.error("Falta 'while' en estructura do")
         node.add_child(self.parse_expresion())
+        self.registrar_bloque(node)
         return node
 
     def parse_entrada(self):
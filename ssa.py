@@ -0,0 +1,595 @@
+# ssa.py
+
+from collections import defaultdict
+
+from codigo_intermedio import Instruccion, ProgramaIntermedio, OPERADORES_BINARIOS, PREFIJO_TEMPORAL, SALTOS
+from ejecucion import VALORES_INICIALES, clave_constante, mismo_valor
+from optimizador_ir import BloqueBasico, GrafoFlujo, eliminar_inalcanzables, plegar
+
+
+class _Extremo:
+    def __init__(self, nombre):
+        self.nombre = nombre
+
+    def __repr__(self):
+        return self.nombre
+
+
+# Extremos del retículo de la propagación de constantes
+SUPERIOR = _Extremo("SUPERIOR")     # todavía sin valor conocido
+INFERIOR = _Extremo("INFERIOR")     # no es constante
+
+
+def campos_operandos(instruccion):
+    """Atributos de la instrucción que contienen operandos (no incluye los phi)"""
+    op = instruccion.op
+    if op in OPERADORES_BINARIOS:
+        return ("arg1", "arg2")
+    if op in ("si_falso", "si_verdadero", "copiar", "!", "convertir"):
+        return ("arg1",)
+    if op == "escribir" and not instruccion.arg2:
+        return ("arg1",)
+    return ()
+
+
+def calcular_dominadores(grafo):
+    """Dominadores inmediatos con el algoritmo iterativo de Cooper, Harvey y Kennedy.
+
+    Devuelve la lista de dominadores inmediatos (por índice de bloque) y los bloques
+    en orden posterior inverso.
+    """
+    bloques = grafo.bloques
+    visitados = {0}
+    postorden = []
+    pila = [(bloques[0], iter(bloques[0].sucesores))]
+    while pila:
+        bloque, sucesores = pila[-1]
+        for sucesor in sucesores:
+            if sucesor.indice not in visitados:
+                visitados.add(sucesor.indice)
+                pila.append((sucesor, iter(sucesor.sucesores)))
+                break
+        else:
+            pila.pop()
+            postorden.append(bloque)
+    orden = postorden[::-1]
+    numero = [0] * len(bloques)
+    for posicion, bloque in enumerate(orden):
+        numero[bloque.indice] = posicion
+
+    idom = [None] * len(bloques)
+    idom[0] = 0
+
+    def interseccion(a, b):
+        while a != b:
+            while numero[a] > numero[b]:
+                a = idom[a]
+            while numero[b] > numero[a]:
+                b = idom[b]
+        return a
+
+    cambio = True
+    while cambio:
+        cambio = False
+        for bloque in orden[1:]:
+            nuevo = None
+            for predecesor in bloque.predecesores:
+                if idom[predecesor.indice] is None:
+                    continue
+                nuevo = predecesor.indice if nuevo is None else interseccion(predecesor.indice, nuevo)
+            if idom[bloque.indice] != nuevo:
+                idom[bloque.indice] = nuevo
+                cambio = True
+    return idom, orden
+
+
+def calcular_fronteras(grafo, idom):
+    fronteras = [set() for _ in grafo.bloques]
+    for bloque in grafo.bloques:
+        if len(bloque.predecesores) < 2:
+            continue
+        for predecesor in bloque.predecesores:
+            corredor = predecesor.indice
+            while corredor != idom[bloque.indice]:
+                fronteras[corredor].add(bloque.indice)
+                corredor = idom[corredor]
+    return fronteras
+
+
+class FormaSSA:
+    """Construcción de SSA, optimizaciones sobre ella y regreso al código de tres direcciones"""
+
+    def __init__(self, programa):
+        copia = [Instruccion(i.op, i.destino, i.arg1, i.arg2, i.line, i.column) for i in programa.instrucciones]
+        self.declaraciones = programa.declaraciones
+        self.grafo = GrafoFlujo(copia)
+        self.estadisticas = {"inalcanzables": eliminar_inalcanzables(self.grafo)}
+        self.temporales = 0
+        self.etiquetas = 0
+
+    # === Construcción ===
+
+    def construir(self):
+        grafo = self.grafo
+        if grafo.bloques[0].predecesores:
+            # La entrada no debe tener predecesores para que los phi tengan un origen claro
+            grafo.bloques.insert(0, BloqueBasico(0, []))
+            for indice, bloque in enumerate(grafo.bloques):
+                bloque.indice = indice
+            grafo.enlazar()
+
+        idom, _ = calcular_dominadores(grafo)
+        fronteras = calcular_fronteras(grafo, idom)
+        hijos = [[] for _ in grafo.bloques]
+        for bloque in grafo.bloques[1:]:
+            hijos[idom[bloque.indice]].append(bloque.indice)
+
+        self.colocar_phis(fronteras)
+        self.renombrar(hijos)
+        return self
+
+    def colocar_phis(self, fronteras):
+        # SSA semipodada: solo reciben phi los nombres que se leen en un bloque distinto al que los define
+        globales = set()
+        sitios = defaultdict(set)
+        for bloque in self.grafo.bloques:
+            locales = set()
+            for instruccion in bloque.instrucciones:
+                for nombre in instruccion.usos():
+                    if nombre not in locales:
+                        globales.add(nombre)
+                if instruccion.destino is not None:
+                    locales.add(instruccion.destino)
+                    sitios[instruccion.destino].add(bloque.indice)
+
+        bloques = self.grafo.bloques
+        colocados = 0
+        for nombre in globales:
+            trabajo = list(sitios[nombre])
+            en_trabajo = set(trabajo)
+            con_phi = set()
+            while trabajo:
+                indice = trabajo.pop()
+                for frontera in fronteras[indice]:
+                    if frontera in con_phi:
+                        continue
+                    con_phi.add(frontera)
+                    bloques[frontera].phis.append(Instruccion("phi", nombre, {}, nombre))
+                    colocados += 1
+                    if frontera not in en_trabajo:
+                        en_trabajo.add(frontera)
+                        trabajo.append(frontera)
+        self.estadisticas["phis"] = colocados
+
+    def renombrar(self, hijos):
+        # Recorrido iterativo del árbol de dominadores para soportar programas muy grandes
+        pilas = defaultdict(list)
+        versiones = defaultdict(int)
+        bloques = self.grafo.bloques
+
+        def actual(nombre):
+            pila = pilas.get(nombre)
+            return pila[-1] if pila else nombre
+
+        def nueva_version(nombre):
+            versiones[nombre] += 1
+            version = f"{nombre}.{versiones[nombre]}"
+            pilas[nombre].append(version)
+            return version
+
+        trabajo = [(0, None)]
+        while trabajo:
+            indice, definidos = trabajo.pop()
+            if definidos is not None:
+                for nombre in definidos:
+                    pilas[nombre].pop()
+                continue
+
+            bloque = bloques[indice]
+            definidos = []
+            for phi in bloque.phis:
+                phi.destino = nueva_version(phi.arg2)
+                definidos.append(phi.arg2)
+            for instruccion in bloque.instrucciones:
+                for campo in campos_operandos(instruccion):
+                    operando = getattr(instruccion, campo)
+                    if isinstance(operando, str):
+                        setattr(instruccion, campo, actual(operando))
+                if instruccion.destino is not None:
+                    definidos.append(instruccion.destino)
+                    instruccion.destino = nueva_version(instruccion.destino)
+            for sucesor in bloque.sucesores:
+                for phi in sucesor.phis:
+                    phi.arg1[bloque] = actual(phi.arg2)
+
+            trabajo.append((indice, definidos))
+            for hijo in hijos[indice]:
+                trabajo.append((hijo, None))
+
+    # === Propagación condicional de constantes dispersa (Wegman-Zadeck) ===
+
+    def propagar_constantes(self):
+        bloques = self.grafo.bloques
+        por_etiqueta = {bloque.etiqueta: bloque for bloque in bloques if bloque.etiqueta}
+        usos = defaultdict(list)
+        for bloque in bloques:
+            for instruccion in bloque.phis + bloque.instrucciones:
+                for nombre in instruccion.usos():
+                    usos[nombre].append((bloque, instruccion))
+
+        valores = {}
+        aristas = set()
+        visitados = set()
+        trabajo_flujo = [(None, bloques[0])]
+        trabajo_ssa = []
+
+        def valor_de(operando):
+            if not isinstance(operando, str):
+                return operando
+            if operando in valores:
+                return valores[operando]
+            if "." in operando:
+                return SUPERIOR
+            # Nombre sin versión: el valor inicial de la variable declarada
+            tipo = self.declaraciones.get(operando)
+            return VALORES_INICIALES[tipo] if tipo else INFERIOR
+
+        def actualizar(nombre, nuevo):
+            anterior = valores.get(nombre, SUPERIOR)
+            combinado = encuentro(anterior, nuevo)
+            if combinado is not anterior and not mismo_valor(combinado, anterior):
+                valores[nombre] = combinado
+                trabajo_ssa.append(nombre)
+
+        def visitar_phi(phi, bloque):
+            resultado = SUPERIOR
+            for predecesor, operando in phi.arg1.items():
+                if (predecesor, bloque) in aristas:
+                    resultado = encuentro(resultado, valor_de(operando))
+            actualizar(phi.destino, resultado)
+
+        def visitar(instruccion, bloque):
+            op = instruccion.op
+            if op in ("si_falso", "si_verdadero"):
+                condicion = valor_de(instruccion.arg1)
+                destino = por_etiqueta[instruccion.arg2]
+                siguiente = bloques[bloque.indice + 1] if bloque.indice + 1 < len(bloques) else None
+                if condicion is INFERIOR:
+                    trabajo_flujo.append((bloque, destino))
+                    if siguiente is not None:
+                        trabajo_flujo.append((bloque, siguiente))
+                elif condicion is not SUPERIOR:
+                    if bool(condicion) == (op == "si_verdadero"):
+                        trabajo_flujo.append((bloque, destino))
+                    elif siguiente is not None:
+                        trabajo_flujo.append((bloque, siguiente))
+            elif instruccion.destino is not None:
+                actualizar(instruccion.destino, self.evaluar(instruccion, valor_de))
+
+        while trabajo_flujo or trabajo_ssa:
+            while trabajo_flujo:
+                origen, bloque = trabajo_flujo.pop()
+                if (origen, bloque) in aristas:
+                    continue
+                aristas.add((origen, bloque))
+                for phi in bloque.phis:
+                    visitar_phi(phi, bloque)
+                if bloque.indice in visitados:
+                    continue
+                visitados.add(bloque.indice)
+                for instruccion in bloque.instrucciones:
+                    visitar(instruccion, bloque)
+                ultima = bloque.instrucciones[-1] if bloque.instrucciones else None
+                if ultima is not None and ultima.op == "saltar":
+                    trabajo_flujo.append((bloque, por_etiqueta[ultima.arg1]))
+                elif (ultima is None or ultima.op not in ("si_falso", "si_verdadero")) \
+                        and bloque.indice + 1 < len(bloques):
+                    trabajo_flujo.append((bloque, bloques[bloque.indice + 1]))
+            while trabajo_ssa:
+                nombre = trabajo_ssa.pop()
+                for bloque, instruccion in usos[nombre]:
+                    if bloque.indice not in visitados:
+                        continue
+                    if instruccion.op == "phi":
+                        visitar_phi(instruccion, bloque)
+                    else:
+                        visitar(instruccion, bloque)
+
+        self.aplicar_constantes(valores, aristas, visitados, valor_de)
+        return self
+
+    def evaluar(self, instruccion, valor_de):
+        op = instruccion.op
+        if op == "leer":
+            return INFERIOR
+        if op == "copiar":
+            return valor_de(instruccion.arg1)
+        argumentos = [valor_de(getattr(instruccion, campo)) for campo in campos_operandos(instruccion)]
+        if any(argumento is INFERIOR for argumento in argumentos):
+            return INFERIOR
+        if any(argumento is SUPERIOR for argumento in argumentos):
+            return SUPERIOR
+        prueba = Instruccion(op, None, argumentos[0], argumentos[1] if len(argumentos) > 1 else instruccion.arg2)
+        plegada, valor = plegar(prueba)
+        return valor if plegada else INFERIOR
+
+    def aplicar_constantes(self, valores, aristas, visitados, valor_de):
+        eliminadas = 0
+        conservados = []
+        for bloque in self.grafo.bloques:
+            if bloque.indice not in visitados:
+                eliminadas += len(bloque.instrucciones)
+                continue
+            conservados.append(bloque)
+
+        def constante(nombre):
+            valor = valores.get(nombre)
+            return valor is not None and valor is not SUPERIOR and valor is not INFERIOR
+
+        for bloque in conservados:
+            nuevos_phis = []
+            for phi in bloque.phis:
+                if constante(phi.destino):
+                    eliminadas += 1
+                    continue
+                phi.arg1 = {predecesor: operando for predecesor, operando in phi.arg1.items()
+                            if (predecesor, bloque) in aristas}
+                for predecesor, operando in phi.arg1.items():
+                    if isinstance(operando, str) and constante(operando):
+                        phi.arg1[predecesor] = valores[operando]
+                nuevos_phis.append(phi)
+            bloque.phis = nuevos_phis
+
+            nuevas = []
+            for instruccion in bloque.instrucciones:
+                if instruccion.destino is not None and constante(instruccion.destino):
+                    eliminadas += 1
+                    continue
+                for campo in campos_operandos(instruccion):
+                    operando = getattr(instruccion, campo)
+                    if isinstance(operando, str) and constante(operando):
+                        setattr(instruccion, campo, valores[operando])
+                if instruccion.op in ("si_falso", "si_verdadero") and not isinstance(instruccion.arg1, str):
+                    if bool(instruccion.arg1) == (instruccion.op == "si_verdadero"):
+                        instruccion.op, instruccion.arg1, instruccion.arg2 = "saltar", instruccion.arg2, None
+                    else:
+                        eliminadas += 1
+                        continue
+                nuevas.append(instruccion)
+            bloque.instrucciones = nuevas
+
+        self.reenlazar(conservados)
+        self.estadisticas["constantes_propagadas"] = eliminadas
+
+    def reenlazar(self, bloques):
+        # Conserva los predecesores que usan los phi al volver a calcular el grafo
+        self.grafo.bloques = bloques
+        for indice, bloque in enumerate(bloques):
+            bloque.indice = indice
+        self.grafo.enlazar()
+        for bloque in bloques:
+            for phi in bloque.phis:
+                phi.arg1 = {p: o for p, o in phi.arg1.items() if p in bloque.predecesores}
+
+    # === Propagación de copias ===
+
+    def propagar_copias(self):
+        reemplazos = {}
+
+        def buscar(nombre):
+            vistos = []
+            while isinstance(nombre, str) and nombre in reemplazos and nombre not in vistos:
+                vistos.append(nombre)
+                nombre = reemplazos[nombre]
+            for visto in vistos:
+                reemplazos[visto] = nombre
+            return nombre
+
+        for bloque in self.grafo.bloques:
+            for instruccion in bloque.instrucciones:
+                if instruccion.op == "copiar" and isinstance(instruccion.destino, str):
+                    reemplazos[instruccion.destino] = instruccion.arg1
+
+        # Un phi cuyos argumentos (sin contarse a sí mismo) son todos iguales es una copia
+        cambio = True
+        while cambio:
+            cambio = False
+            for bloque in self.grafo.bloques:
+                for phi in bloque.phis:
+                    if phi.destino in reemplazos:
+                        continue
+                    distintos = {}
+                    for operando in phi.arg1.values():
+                        resuelto = buscar(operando)
+                        if _clave(resuelto) != _clave(phi.destino):
+                            distintos[_clave(resuelto)] = resuelto
+                    if len(distintos) == 1:
+                        reemplazos[phi.destino] = next(iter(distintos.values()))
+                        cambio = True
+
+        eliminadas = 0
+        for bloque in self.grafo.bloques:
+            nuevos_phis = []
+            for phi in bloque.phis:
+                if phi.destino in reemplazos:
+                    eliminadas += 1
+                    continue
+                phi.arg1 = {p: buscar(o) for p, o in phi.arg1.items()}
+                nuevos_phis.append(phi)
+            bloque.phis = nuevos_phis
+            nuevas = []
+            for instruccion in bloque.instrucciones:
+                if instruccion.op == "copiar" and instruccion.destino in reemplazos:
+                    eliminadas += 1
+                    continue
+                for campo in campos_operandos(instruccion):
+                    operando = getattr(instruccion, campo)
+                    if isinstance(operando, str):
+                        setattr(instruccion, campo, buscar(operando))
+                nuevas.append(instruccion)
+            bloque.instrucciones = nuevas
+        self.estadisticas["copias_propagadas"] = eliminadas
+        return self
+
+    # === Salida de SSA ===
+
+    def nuevo_temporal(self):
+        self.temporales += 1
+        return f"{PREFIJO_TEMPORAL}s{self.temporales}"
+
+    def nueva_etiqueta(self):
+        self.etiquetas += 1
+        return f"LS{self.etiquetas}"
+
+    def destruir(self):
+        """Reemplaza los phi por copias en los predecesores.
+
+        Las aristas críticas se dividen (evita el problema de la copia perdida) y las copias
+        de cada arista se ordenan como una copia paralela (evita el problema del intercambio).
+        """
+        bloques = self.grafo.bloques
+        despues_de = defaultdict(list)     # bloques nuevos que van justo después de otro
+        al_final = []                      # bloques nuevos alcanzados por un salto
+        insertadas = 0
+
+        for bloque in bloques:
+            if not bloque.phis:
+                continue
+            for predecesor in list(bloque.predecesores):
+                copias = [(phi.destino, phi.arg1[predecesor]) for phi in bloque.phis if predecesor in phi.arg1]
+                secuencia = secuenciar_copias(copias, self.nuevo_temporal)
+                if not secuencia:
+                    continue
+                insertadas += len(secuencia)
+                nuevas = [Instruccion("copiar", destino, origen) for destino, origen in secuencia]
+                ultima = predecesor.instrucciones[-1] if predecesor.instrucciones else None
+                if len(predecesor.sucesores) == 1:
+                    if ultima is not None and ultima.op in ("si_falso", "si_verdadero"):
+                        # El salto y la continuación llevan al mismo bloque: el salto sobra
+                        predecesor.instrucciones.pop()
+                        predecesor.instrucciones.extend(nuevas)
+                    elif ultima is not None and ultima.op == "saltar":
+                        predecesor.instrucciones[-1:-1] = nuevas
+                    else:
+                        predecesor.instrucciones.extend(nuevas)
+                elif ultima is not None and ultima.op in ("si_falso", "si_verdadero") \
+                        and ultima.arg2 == bloque.etiqueta:
+                    # Arista crítica por salto: el salto va a un bloque nuevo con las copias
+                    etiqueta = self.nueva_etiqueta()
+                    ultima.arg2 = etiqueta
+                    al_final.append([Instruccion("etiqueta", arg1=etiqueta)] + nuevas
+                                    + [Instruccion("saltar", arg1=bloque.etiqueta)])
+                else:
+                    # Arista crítica por continuación: las copias quedan entre ambos bloques
+                    despues_de[predecesor.indice].append(nuevas)
+            bloque.phis = []
+
+        instrucciones = []
+        for bloque in bloques:
+            instrucciones.extend(bloque.instrucciones)
+            for nuevas in despues_de[bloque.indice]:
+                instrucciones.extend(nuevas)
+        if al_final:
+            etiqueta_fin = self.nueva_etiqueta()
+            instrucciones.append(Instruccion("saltar", arg1=etiqueta_fin))
+            for nuevas in al_final:
+                instrucciones.extend(nuevas)
+            instrucciones.append(Instruccion("etiqueta", arg1=etiqueta_fin))
+        self.estadisticas["copias_insertadas"] = insertadas
+        instrucciones, fusionadas = fusionar_copias(instrucciones)
+        self.estadisticas["copias_fusionadas"] = fusionadas
+        return ProgramaIntermedio(instrucciones, self.declaraciones)
+
+
+def _clave(operando):
+    return operando if isinstance(operando, str) else clave_constante(operando)
+
+
+def encuentro(a, b):
+    if a is SUPERIOR:
+        return b
+    if b is SUPERIOR:
+        return a
+    if a is INFERIOR or b is INFERIOR:
+        return INFERIOR
+    return a if mismo_valor(a, b) else INFERIOR
+
+
+def secuenciar_copias(copias, nuevo_temporal):
+    """Ordena un conjunto de copias que deben ocurrir en paralelo"""
+    pendientes = {}
+    for destino, origen in copias:
+        if _clave(destino) != _clave(origen):
+            pendientes[destino] = origen
+    secuencia = []
+    while pendientes:
+        origenes = {origen for origen in pendientes.values() if isinstance(origen, str)}
+        listo = next((destino for destino in pendientes if destino not in origenes), None)
+        if listo is not None:
+            secuencia.append((listo, pendientes.pop(listo)))
+            continue
+        # Solo quedan ciclos: se guarda un valor en un temporal para romperlo
+        destino = next(iter(pendientes))
+        temporal = nuevo_temporal()
+        secuencia.append((temporal, destino))
+        for otro, origen in pendientes.items():
+            if origen == destino:
+                pendientes[otro] = temporal
+    return secuencia
+
+
+def fusionar_copias(instrucciones):
+    """Quita las copias "d = o" cuando o se define antes en el mismo bloque y solo se usa ahí.
+
+    La definición de o pasa a escribir directamente en d, siempre que d no se lea ni se
+    escriba entre ambas instrucciones. Así desaparecen casi todas las copias que deja la
+    salida de SSA al final de los ciclos.
+    """
+    usos = defaultdict(int)
+    for instruccion in instrucciones:
+        for nombre in instruccion.usos():
+            usos[nombre] += 1
+
+    def fusionar(copia, bloque):
+        for anterior in reversed(bloque):
+            if anterior.destino == copia.arg1:
+                anterior.destino = copia.destino
+                return True
+            if anterior.destino == copia.destino or copia.destino in anterior.usos():
+                return False
+        return False
+
+    resultado = []
+    bloque = []
+    fusionadas = 0
+    for instruccion in instrucciones:
+        if instruccion.op == "etiqueta":
+            bloque = []
+        if instruccion.op == "copiar" and isinstance(instruccion.arg1, str) and usos[instruccion.arg1] == 1 \
+                and fusionar(instruccion, bloque):
+            fusionadas += 1
+            continue
+        resultado.append(instruccion)
+        bloque.append(instruccion)
+        if instruccion.op in SALTOS:
+            bloque = []
+    return resultado, fusionadas
+
+
+def a_ssa(programa):
+    """Devuelve la forma SSA del programa (con phi por bloque) sin optimizar"""
+    return FormaSSA(programa).construir()
+
+
+def optimizar_ssa(programa, constantes=True, copias=True):
+    """Pasa el programa a SSA, aplica las optimizaciones elegidas y lo regresa a tres direcciones.
+
+    Devuelve el programa resultante y un diccionario con lo que hizo cada etapa.
+    """
+    forma = FormaSSA(programa).construir()
+    if constantes:
+        forma.propagar_constantes()
+    if copias:
+        forma.propagar_copias()
+    resultado = forma.destruir()
+    return resultado, forma.estadisticas
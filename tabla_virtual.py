@@ -0,0 +1,172 @@
+# tabla_virtual.py
+
+import tkinter as tk
+from tkinter import ttk
+
+from lexico import TokenType
+
+# Alto de fila si el tema no define uno para Treeview
+ALTO_FILA = 20
+# Filas que avanza cada paso de la rueda del ratón
+FILAS_POR_RUEDA = 3
+
+
+class IndiceTabla:
+    """Filas de una tabla en memoria con el orden y el filtro aplicados.
+
+    Las filas son tuplas con un valor por columna; vista tiene las posiciones de las
+    filas que pasan el filtro, en el orden elegido.
+    """
+
+    def __init__(self, columnas, filas):
+        self.columnas = columnas
+        self.filas = filas
+        self.orden = list(range(len(filas)))
+        self.columna_orden = None
+        self.descendente = False
+        self.textos = None      # filas en minúsculas para filtrar, se arman la primera vez
+        self.filtro = ""
+        self.vista = self.orden
+
+    def __len__(self):
+        return len(self.vista)
+
+    def fila(self, posicion):
+        return self.filas[self.vista[posicion]]
+
+    def ordenar(self, columna):
+        """Ordena por la columna; si ya estaba ordenada por ella, invierte el sentido"""
+        if columna == self.columna_orden:
+            self.descendente = not self.descendente
+        else:
+            self.columna_orden, self.descendente = columna, False
+        filas = self.filas
+        self.orden.sort(key=lambda i: filas[i][columna], reverse=self.descendente)
+        self.filtrar(self.filtro)
+
+    def filtrar(self, texto):
+        """Deja en la vista las filas que contienen texto en alguna columna"""
+        self.filtro = texto.strip().lower()
+        if not self.filtro:
+            self.vista = self.orden
+            return
+        if self.textos is None:
+            self.textos = ["\t".join(map(str, fila)).lower() for fila in self.filas]
+        textos, filtro = self.textos, self.filtro
+        self.vista = [i for i in self.orden if filtro in textos[i]]
+
+
+class TablaVirtual(ttk.Frame):
+    """Treeview que solo tiene como ítems las filas que caben en pantalla.
+
+    Al desplazarse, ordenar o filtrar se reescriben los valores de esos mismos ítems con
+    las filas del IndiceTabla, así dibujar cuesta lo mismo con cien filas que con millones.
+    """
+
+    def __init__(self, padre, columnas, anchos=None):
+        super().__init__(padre)
+        self.columnas = columnas
+        self.indice = IndiceTabla(columnas, [])
+        self.primera = 0
+        self.items = []
+
+        barra_filtro = ttk.Frame(self)
+        barra_filtro.pack(side=tk.TOP, fill=tk.X)
+        ttk.Label(barra_filtro, text="Filtrar:").pack(side=tk.LEFT, padx=2)
+        self.filtro = tk.StringVar()
+        ttk.Entry(barra_filtro, textvariable=self.filtro).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=2)
+        self.filtro.trace_add('write', self.on_filtro)
+
+        self.tabla = ttk.Treeview(self, columns=columnas, show='headings', selectmode='browse')
+        for numero, columna in enumerate(columnas):
+            self.tabla.heading(columna, text=columna, command=lambda c=numero: self.ordenar(c))
+            if anchos:
+                self.tabla.column(columna, width=anchos[numero])
+        self.barra = ttk.Scrollbar(self, orient="vertical", command=self.desplazar)
+        self.barra.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tabla.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.tabla.bind('<Configure>', lambda event: self.dibujar())
+        self.tabla.bind('<MouseWheel>', self.on_rueda)
+        self.tabla.bind('<Button-4>', self.on_rueda)
+        self.tabla.bind('<Button-5>', self.on_rueda)
+
+    def cargar(self, filas):
+        """Reemplaza las filas, conservando el filtro escrito"""
+        self.indice = IndiceTabla(self.columnas, filas)
+        self.indice.filtrar(self.filtro.get())
+        self.primera = 0
+        self.dibujar()
+
+    def filas_visibles(self):
+        alto_fila = int(ttk.Style().lookup('Treeview', 'rowheight') or ALTO_FILA)
+        # Una fila menos por el encabezado
+        return max(1, self.tabla.winfo_height() // alto_fila - 1)
+
+    def dibujar(self):
+        visibles = self.filas_visibles()
+        total = len(self.indice)
+        self.primera = max(0, min(self.primera, total - visibles))
+        while len(self.items) < visibles:
+            self.items.append(self.tabla.insert('', tk.END))
+        while len(self.items) > visibles:
+            self.tabla.delete(self.items.pop())
+        for posicion, item in enumerate(self.items, self.primera):
+            self.tabla.item(item, values=self.indice.fila(posicion) if posicion < total else ())
+        if total:
+            self.barra.set(self.primera / total, min(1.0, (self.primera + visibles) / total))
+        else:
+            self.barra.set(0.0, 1.0)
+
+    def desplazar(self, accion, cantidad, unidad=None):
+        # Recibe lo mismo que yview: ('moveto', fracción) o ('scroll', n, 'units'|'pages')
+        if accion == 'moveto':
+            self.primera = int(float(cantidad) * len(self.indice))
+        else:
+            paso = self.filas_visibles() if unidad == 'pages' else 1
+            self.primera += int(cantidad) * paso
+        self.dibujar()
+
+    def on_rueda(self, event):
+        if getattr(event, 'num', None) in (4, 5):
+            arriba = event.num == 4
+        else:
+            arriba = event.delta > 0
+        self.desplazar('scroll', -FILAS_POR_RUEDA if arriba else FILAS_POR_RUEDA)
+        return "break"
+
+    def ordenar(self, columna):
+        self.indice.ordenar(columna)
+        self.primera = 0
+        self.dibujar()
+
+    def on_filtro(self, *args):
+        self.indice.filtrar(self.filtro.get())
+        self.primera = 0
+        self.dibujar()
+
+
+def filas_lexico(tokens):
+    """Filas (tipo, valor, línea, columna) de la pestaña léxica, sin errores ni comentarios"""
+    return [
+        (token.type.name, token.value, token.line, token.column)
+        for token in tokens
+        if token.type not in (TokenType.ERROR, TokenType.COMMENT)
+    ]
+
+
+def filas_simbolos(tokens):
+    """Filas de la tabla de símbolos en una sola pasada por los tokens.
+
+    Cada identificador aparece una vez, en su primera aparición; las palabras reservadas
+    aparecen cada vez que se usan, después de los identificadores.
+    """
+    identificadores = {}
+    reservadas = []
+    for token in tokens:
+        if token.type == TokenType.IDENTIFIER:
+            if token.value not in identificadores:
+                identificadores[token.value] = (token.value, 'IDENTIFICADOR', token.line, token.column)
+        elif token.type == TokenType.RESERVED_WORD:
+            reservadas.append((token.value, 'RESERVADA', token.line, token.column))
+    return list(identificadores.values()) + reservadas
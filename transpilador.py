@@ -0,0 +1,296 @@
+# transpilador.py
+
+import hashlib
+import importlib.util
+import marshal
+import math
+import os
+import sys
+
+from arbol_sintaxis import NodeType
+from optimizador_ast import optimizar
+from ejecucion import (ErrorCompilacion, ErrorEjecucion, VALORES_INICIALES, analizar_programa,
+                       recolectar_declaraciones, valor_literal, texto_cadena, convertir,
+                       leer_valor, tipo_estatico, dividir, modulo, potencia)
+from entrada_salida import entrada_estandar, salida_estandar
+
+# Cambiar este valor invalida los programas guardados en la caché de disco
+VERSION_GENERADOR = "4"
+
+DIRECTORIO_CACHE = os.environ.get(
+    "COMPILADOR_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "compilador_phyton")
+)
+
+OPERADORES_NATIVOS = {"+": "+", "-": "-", "*": "*", "<": "<", ">": ">",
+                      "<=": "<=", ">=": ">=", "==": "==", "!=": "!="}
+
+
+class GeneradorPython:
+    """Traduce el AST a una función de Python cuyas variables son locales"""
+
+    def __init__(self, ast):
+        self.ast = ast
+        self.declaraciones = recolectar_declaraciones(ast)
+        self.lineas = []
+        self.mapa_lineas = {}   # línea de Python -> (línea, columna) del código fuente
+        self.errores = []
+
+    def generar(self):
+        self.emitir(0, "def __programa__(__leer, __escribir):")
+        for nombre, tipo in self.declaraciones.items():
+            self.emitir(1, f"{self.variable(nombre)} = {VALORES_INICIALES[tipo]!r}")
+        self.generar_bloque(self.ast, 1)
+        self.emitir(1, "return None")
+        if self.errores:
+            raise ErrorCompilacion(self.errores)
+        return "\n".join(self.lineas) + "\n", self.mapa_lineas
+
+    def emitir(self, nivel, texto, nodo=None):
+        self.lineas.append("    " * nivel + texto)
+        if nodo is not None and nodo.line is not None:
+            self.mapa_lineas[len(self.lineas)] = (nodo.line, nodo.column)
+
+    def error(self, mensaje, nodo):
+        mensaje = f"Error de traducción en línea {nodo.line}, columna {nodo.column}: {mensaje}"
+        if mensaje not in self.errores:
+            self.errores.append(mensaje)
+
+    def variable(self, nombre):
+        return f"v_{nombre}"
+
+    def generar_bloque(self, nodo, nivel):
+        inicio = len(self.lineas)
+        for hijo in nodo.children:
+            self.generar_sentencia(hijo, nivel)
+        if len(self.lineas) == inicio:
+            self.emitir(nivel, "pass")
+
+    def generar_sentencia(self, nodo, nivel):
+        tipo = nodo.node_type
+        if tipo == NodeType.LISTA:
+            for hijo in nodo.children:
+                self.generar_sentencia(hijo, nivel)
+        elif tipo == NodeType.TIPO:
+            return
+        elif tipo == NodeType.ASIGNACION:
+            destino = nodo.children[0]
+            if len(nodo.children) < 2:
+                return
+            valor = self.expresion(nodo.children[1])
+            self.emitir(nivel, f"{self.destino(destino)} = {self.coercion(destino, nodo.children[1], valor)}", nodo)
+        elif tipo == NodeType.INPUT:
+            if not nodo.children:
+                return
+            destino = nodo.children[0]
+            tipo_var = self.tipo_de(destino)
+            self.emitir(nivel, f"{self.destino(destino)} = __leer_valor(__leer(), {tipo_var!r})", nodo)
+        elif tipo == NodeType.OUTPUT:
+            if not nodo.children:
+                return
+            valor = nodo.children[0]
+            if valor.node_type == NodeType.CADENA:
+                self.emitir(nivel, f"__escribir({texto_cadena(valor)!r})", nodo)
+            else:
+                self.emitir(nivel, f"__escribir({self.expresion(valor)})", nodo)
+        elif tipo == NodeType.IF:
+            self.emitir(nivel, f"if {self.expresion(nodo.children[0])}:", nodo)
+            self.generar_bloque(nodo.children[1], nivel + 1)
+            if len(nodo.children) > 2:
+                self.emitir(nivel, "else:")
+                self.generar_bloque(nodo.children[2], nivel + 1)
+        elif tipo == NodeType.WHILE:
+            self.emitir(nivel, f"while {self.expresion(nodo.children[0])}:", nodo)
+            self.generar_bloque(nodo.children[1], nivel + 1)
+        elif tipo == NodeType.DO:
+            self.emitir(nivel, "while True:", nodo)
+            self.generar_bloque(nodo.children[0], nivel + 1)
+            condicion = nodo.children[1] if len(nodo.children) > 1 else None
+            if condicion is not None:
+                self.emitir(nivel + 1, f"if not {self.expresion(condicion)}:", condicion)
+            else:
+                self.emitir(nivel + 1, "if True:")
+            self.emitir(nivel + 2, "break")
+        else:
+            self.error(f"Sentencia '{nodo.name}' no soportada", nodo)
+
+    def tipo_de(self, nodo_id):
+        tipo = self.declaraciones.get(nodo_id.name)
+        if tipo is None:
+            self.error(f"Variable '{nodo_id.name}' no declarada", nodo_id)
+            return "int"
+        return tipo
+
+    def destino(self, nodo_id):
+        self.tipo_de(nodo_id)
+        return self.variable(nodo_id.name)
+
+    def coercion(self, nodo_id, nodo_valor, valor):
+        # Se evita la llamada de conversión cuando la expresión ya es del tipo de la variable
+        tipo = self.tipo_de(nodo_id)
+        if tipo_estatico(nodo_valor, self.declaraciones) == tipo:
+            return valor
+        return f"__convertir({valor}, {tipo!r})"
+
+    def expresion(self, nodo):
+        if nodo is None:
+            return "0"
+        tipo = nodo.node_type
+        hijos = nodo.children
+        if tipo == NodeType.FACTOR:
+            valor = valor_literal(nodo)
+            if isinstance(valor, float) and not math.isfinite(valor):
+                # repr daría 'inf' o 'nan', que no son nombres de Python
+                return f"float({repr(valor)!r})"
+            return repr(valor)
+        if tipo == NodeType.IDENTIFICADOR:
+            self.tipo_de(nodo)
+            return self.variable(nodo.name)
+        if tipo == NodeType.CADENA:
+            self.error("Las cadenas solo pueden usarse con 'cout'", nodo)
+            return "0"
+        if tipo in (NodeType.INCREMENTO, NodeType.DECREMENTO):
+            signo = "+" if tipo == NodeType.INCREMENTO else "-"
+            return f"({self.expresion(hijos[0] if hijos else None)} {signo} 1)"
+        if tipo == NodeType.LOGICO:
+            if len(hijos) == 1 and nodo.name == "!":
+                return f"(not {self.expresion(hijos[0])})"
+            if len(hijos) == 2 and nodo.name in ("&&", "||"):
+                operador = "and" if nodo.name == "&&" else "or"
+                return f"bool({self.expresion(hijos[0])} {operador} {self.expresion(hijos[1])})"
+            self.error(f"Operador lógico '{nodo.name}' incompleto", nodo)
+            return "False"
+        if len(hijos) != 2:
+            self.error(f"Operador '{nodo.name}' incompleto", nodo)
+            return "0"
+        izquierda = self.expresion(hijos[0])
+        derecha = self.expresion(hijos[1])
+        if nodo.name in OPERADORES_NATIVOS:
+            return f"({izquierda} {OPERADORES_NATIVOS[nodo.name]} {derecha})"
+        if nodo.name == "/":
+            return f"__dividir({izquierda}, {derecha})"
+        if nodo.name == "%":
+            return f"__modulo({izquierda}, {derecha})"
+        if nodo.name == "^":
+            return f"__potencia({izquierda}, {derecha})"
+        self.error(f"Operador '{nodo.name}' no soportado", nodo)
+        return "0"
+
+
+class ProgramaCompilado:
+    def __init__(self, codigo_objeto, mapa_lineas):
+        self.codigo_objeto = codigo_objeto
+        self.mapa_lineas = mapa_lineas
+
+    def ejecutar(self, leer, escribir):
+        entorno = {
+            "__convertir": convertir, "__leer_valor": leer_valor, "__dividir": dividir,
+            "__modulo": modulo, "__potencia": potencia,
+        }
+        exec(self.codigo_objeto, entorno)
+        try:
+            entorno["__programa__"](leer, escribir)
+        except ErrorEjecucion as e:
+            if e.line is None:
+                e.line, e.column = self.posicion_error(e.__traceback__)
+            raise
+        except (ZeroDivisionError, ValueError, OverflowError, TypeError) as e:
+            line, column = self.posicion_error(e.__traceback__)
+            raise ErrorEjecucion(str(e), line, column) from e
+        except Exception as e:
+            # Un fallo del código generado no debe llegar al IDE como excepción de Python
+            line, column = self.posicion_error(e.__traceback__)
+            raise ErrorEjecucion(f"{type(e).__name__}: {e}", line, column) from e
+
+    def posicion_error(self, tb):
+        # Busca el marco del programa generado para traducir su línea a la del código fuente
+        posicion = (None, None)
+        while tb is not None:
+            if tb.tb_frame.f_code.co_filename == self.codigo_objeto.co_filename:
+                posicion = self.mapa_lineas.get(tb.tb_lineno, posicion)
+            tb = tb.tb_next
+        return posicion
+
+
+_cache_memoria = {}
+
+
+def clave_cache(codigo):
+    digest = hashlib.sha256()
+    digest.update(VERSION_GENERADOR.encode())
+    digest.update(importlib.util.MAGIC_NUMBER)
+    digest.update(codigo.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def traducir(codigo):
+    """Devuelve el código Python generado y el mapa de líneas para un programa fuente"""
+    ast, _ = optimizar(analizar_programa(codigo))
+    return GeneradorPython(ast).generar()
+
+
+def compilar(codigo, usar_cache=True):
+    """Compila el programa a un objeto de código de Python.
+
+    Si el mismo texto ya se compiló antes, se reutiliza el objeto de código guardado
+    (en memoria o en disco) sin volver a hacer el análisis léxico, sintáctico ni la traducción.
+    """
+    clave = clave_cache(codigo)
+    if usar_cache:
+        if clave in _cache_memoria:
+            return _cache_memoria[clave]
+        programa = _cargar_de_disco(clave)
+        if programa is not None:
+            _cache_memoria[clave] = programa
+            return programa
+
+    fuente, mapa_lineas = traducir(codigo)
+    codigo_objeto = compile(fuente, f"<programa {clave[:12]}>", "exec")
+    programa = ProgramaCompilado(codigo_objeto, mapa_lineas)
+    if usar_cache:
+        _cache_memoria[clave] = programa
+        _guardar_en_disco(clave, programa)
+    return programa
+
+
+def ejecutar(codigo, leer, escribir, usar_cache=True):
+    compilar(codigo, usar_cache).ejecutar(leer, escribir)
+
+
+def _ruta_cache(clave):
+    return os.path.join(DIRECTORIO_CACHE, f"{clave}.bin")
+
+
+def _cargar_de_disco(clave):
+    try:
+        with open(_ruta_cache(clave), "rb") as f:
+            codigo_objeto, mapa_lineas = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    return ProgramaCompilado(codigo_objeto, mapa_lineas)
+
+
+def _guardar_en_disco(clave, programa):
+    # Se escribe en un archivo temporal y se renombra para que otro proceso nunca lea un archivo a medias
+    ruta = _ruta_cache(clave)
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(DIRECTORIO_CACHE, exist_ok=True)
+        with open(temporal, "wb") as f:
+            marshal.dump((programa.codigo_objeto, programa.mapa_lineas), f)
+        os.replace(temporal, ruta)
+    except OSError:
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
+
+
+if __name__ == '__main__':
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        fuente_programa = f.read()
+    try:
+        with salida_estandar() as escribir:
+            ejecutar(fuente_programa, entrada_estandar(), escribir)
+    except (ErrorCompilacion, ErrorEjecucion) as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
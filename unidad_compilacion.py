@@ -0,0 +1,133 @@
+# unidad_compilacion.py
+
+import hashlib
+import pickle
+from collections import OrderedDict
+
+from lexico import LexicalAnalyzer
+from sintactico import Parser
+from ejecucion import ErrorCompilacion
+from codigo_intermedio import generar_intermedio
+from optimizador_ir import optimizar_intermedio
+from analisis_tipos import analizar_tipos
+from tabla_virtual import filas_simbolos
+
+# Unidades que recuerda cada proceso: alcanza para el texto actual y algunos anteriores
+UNIDADES_EN_MEMORIA = 4
+
+
+def clave_texto(texto):
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def empaquetar(artefactos):
+    """{nombre: bytes} de los artefactos que pueden pasar a otro proceso.
+
+    Se serializa cada uno por separado: un AST muy profundo da RecursionError y una
+    ErrorCompilacion no se reconstruye; esos se omiten y el otro proceso los recalcula.
+    """
+    paquete = {}
+    for nombre, valor in artefactos.items():
+        if isinstance(valor, ErrorCompilacion):
+            continue
+        try:
+            paquete[nombre] = pickle.dumps(valor, pickle.HIGHEST_PROTOCOL)
+        except (RecursionError, pickle.PicklingError, TypeError, AttributeError):
+            pass
+    return paquete
+
+
+def desempaquetar(paquete):
+    return {nombre: pickle.loads(datos) for nombre, datos in paquete.items()}
+
+
+class UnidadCompilacion:
+    """Un texto y todo lo que se calcula a partir de él, cada cosa una sola vez.
+
+    artefactos guarda, por nombre, el resultado de cada paso o la ErrorCompilacion que
+    produjo; así una fase que falla tampoco se repite. Los pasos que dependen de otros
+    los piden a la misma unidad: el parser usa los tokens ya calculados, y así sigue.
+    """
+
+    def __init__(self, texto):
+        self.texto = texto
+        self.clave = clave_texto(texto)
+        self.artefactos = {}
+
+    def _calcular(self, nombre, funcion):
+        if nombre not in self.artefactos:
+            try:
+                self.artefactos[nombre] = funcion()
+            except ErrorCompilacion as e:
+                self.artefactos[nombre] = e
+        resultado = self.artefactos[nombre]
+        if isinstance(resultado, ErrorCompilacion):
+            raise resultado
+        return resultado
+
+    def __getstate__(self):
+        # Al pasar a otro proceso (spawn) viajan solo los artefactos que se pueden serializar
+        return {"texto": self.texto, "clave": self.clave, "artefactos": empaquetar(self.artefactos)}
+
+    def __setstate__(self, estado):
+        self.texto = estado["texto"]
+        self.clave = estado["clave"]
+        self.artefactos = desempaquetar(estado["artefactos"])
+
+    def incorporar(self, artefactos):
+        """Agrega lo que otro proceso calculó sobre este mismo texto"""
+        for nombre, valor in artefactos.items():
+            self.artefactos.setdefault(nombre, valor)
+
+    def lexico(self):
+        """(tokens, errores léxicos)"""
+        return self._calcular("lexico", lambda: LexicalAnalyzer().analyze(self.texto))
+
+    def sintaxis(self):
+        """(ast, errores sintácticos), sin importar los errores léxicos"""
+        def calcular():
+            parser = Parser(self.lexico()[0])
+            resultado = parser.parse()
+            self.artefactos["bloques"] = sorted(parser.bloques, key=lambda bloque: (bloque[1], bloque[2]))
+            return resultado
+        return self._calcular("sintaxis", calcular)
+
+    def bloques(self):
+        """(nombre, línea, columna, línea final) de cada if/while/do, en orden de aparición"""
+        self.sintaxis()
+        return self.artefactos["bloques"]
+
+    def simbolos(self):
+        return self._calcular("simbolos", lambda: filas_simbolos(self.lexico()[0]))
+
+    def programa(self):
+        """El AST de un programa sin errores sintácticos, como analizar_programa"""
+        def calcular():
+            ast, errores = self.sintaxis()
+            if errores or ast is None:
+                raise ErrorCompilacion(errores or ["Error sintáctico: programa vacío"])
+            return ast
+        return self._calcular("programa", calcular)
+
+    def tipos(self):
+        return self._calcular("tipos", lambda: analizar_tipos(self.programa()))
+
+    def intermedio(self):
+        """(programa optimizado, estadísticas de optimización)"""
+        return self._calcular("intermedio", lambda: optimizar_intermedio(generar_intermedio(self.programa())))
+
+
+_unidades = OrderedDict()
+
+
+def unidad_para(texto):
+    """La unidad de texto en este proceso, reutilizando la que ya exista para él"""
+    clave = clave_texto(texto)
+    unidad = _unidades.get(clave)
+    if unidad is None:
+        unidad = _unidades[clave] = UnidadCompilacion(texto)
+        if len(_unidades) > UNIDADES_EN_MEMORIA:
+            _unidades.popitem(last=False)
+    else:
+        _unidades.move_to_end(clave)
+    return unidad